@@ -164,8 +164,8 @@ class TreatmentAdmin(admin.ModelAdmin):
     GenericTabularInline.extra = 1
 
     list_display = ("treatment_type",)
-    list_filter = ("treatment_type", "interventions")
-    search_fields = ("treatment_type", "interventions")
+    list_filter = ("treatment_type",)
+    search_fields = ("treatment_type",)
     list_per_page = 25
 
 
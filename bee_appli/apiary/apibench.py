@@ -0,0 +1,211 @@
+# Standard library imports
+import json
+import math
+import time
+import tracemalloc
+from pathlib import Path
+
+# Third-party imports
+from django.core.cache import cache
+from django.urls import reverse
+
+# Local imports
+from .urls import router
+from .utils import CountQueries
+from public_api.urls import public_router
+
+# Baseline the benchmark is compared to by default
+BASELINE_PATH = Path(__file__).with_name("apibench_baseline.json")
+
+# A route is over its latency budget when its p95 is above the baseline's
+# multiplied by the tolerance plus this slack, as the fastest routes take a few
+# milliseconds and vary by more than their own duration between machines
+LATENCY_SLACK_MS = 5.0
+# Same for the peak memory, in kilobytes
+MEMORY_SLACK_KB = 64.0
+
+# Routers the benchmark goes through, with their namespace and whether their
+# routes are requested as the beekeeper
+ROUTERS = (("apiary", router, True), ("public_api", public_router, False))
+
+
+class Route:
+    """Class describing a request sent by the benchmark. Its name is the method
+    and the URL name, along with the query string when one is given, and the
+    request is sent as the beekeeper unless the route is public."""
+
+    def __init__(self, name, method, path, data=None, private=True):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.private = private
+
+
+def action_bodies(ids):
+    """Function returning the body of the requests which need one, by route
+    name. Every call of a POST action writes new interventions, so its cost
+    stays the same however many times it is sent."""
+    return {
+        "POST apiary:beeyards-apply-intervention": {
+            "intervention_type": "harvest",
+            "hives": [ids["apiary"]["hives"]],
+            "detail": {"quantity": 1},
+        },
+        "PATCH apiary:hives-list": [{"id": ids["apiary"]["hives"], "status": "active"}],
+        "PATCH apiary:interventions-list": [
+            {"id": ids["apiary"]["interventions"], "intervention_type": "health_check"}
+        ],
+    }
+
+
+def collect_routes(ids, search):
+    """Function returning the routes of the benchmark, built from the routers so
+    new viewsets and actions are picked up: the API root, the list and detail of
+    every viewset, the batch update of the private lists and every method of the
+    extra actions, followed by the template views and a public search by
+    beekeeper name. `ids` gives the object used in the detail routes by
+    namespace and basename, `search` the name searched. The routes which write
+    come last, so what the others read doesn't depend on the number of times
+    the writes are repeated."""
+    bodies = action_bodies(ids)
+    routes = []
+    for namespace, viewset_router, private in ROUTERS:
+        routes.append(
+            Route(
+                f"GET {namespace}:api-root",
+                "get",
+                reverse(f"{namespace}:api-root"),
+                private=private,
+            )
+        )
+        for prefix, viewset, basename in viewset_router.registry:
+            detail = {"pk": ids[namespace][basename]}
+            urls = [
+                (f"{basename}-list", {}, ["get"]),
+                (f"{basename}-detail", detail, ["get"]),
+            ]
+            # The router only sends PATCH on the list to viewsets which have it
+            if private and hasattr(viewset, "bulk_partial_update"):
+                urls[0][2].append("patch")
+            for action in viewset.get_extra_actions():
+                urls.append(
+                    (
+                        f"{basename}-{action.url_name}",
+                        detail if action.detail else {},
+                        list(action.mapping),
+                    )
+                )
+            for url_name, kwargs, methods in urls:
+                path = reverse(f"{namespace}:{url_name}", kwargs=kwargs)
+                for method in methods:
+                    name = f"{method.upper()} {namespace}:{url_name}"
+                    routes.append(
+                        Route(name, method, path, bodies.get(name), private=private)
+                    )
+    hive_id = ids["apiary"]["hives"]
+    routes += [
+        Route("GET show_beeyards", "get", reverse("show_beeyards")),
+        Route(
+            "GET show_interventions?hive",
+            "get",
+            f"/apiary/interventions/?hive={hive_id}",
+        ),
+        Route("GET login", "get", reverse("login"), private=False),
+        Route(
+            "GET public_api:hives-list?beeyard__beekeeper",
+            "get",
+            f"{reverse('public_api:hives-list')}?beeyard__beekeeper={search}",
+            private=False,
+        ),
+    ]
+    return sorted(routes, key=lambda route: route.method != "get")
+
+
+def send(client, route):
+    """Function to send the request of a route and return the response, whose
+    content is read in full when it is streamed."""
+    if route.method == "get":
+        response = client.get(route.path)
+    else:
+        response = getattr(client, route.method)(
+            route.path, json.dumps(route.data or {}), content_type="application/json"
+        )
+    if response.streaming:
+        for chunk in response.streaming_content:
+            pass
+    return response
+
+
+def percentile(durations, fraction):
+    """Function returning the percentile of the durations, by nearest rank."""
+    ordered = sorted(durations)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(client, route, repeat):
+    """Function returning the status code, SQL queries, p50 and p95 latencies in
+    milliseconds and peak memory in kilobytes of a route. The queries are
+    counted with empty caches ("cold_queries") and once they are filled
+    ("queries"). The peak memory is measured on a separate request as tracing
+    the allocations slows them down."""
+    cache.clear()
+    with CountQueries() as cold:
+        response = send(client, route)
+    with CountQueries() as warm:
+        send(client, route)
+    durations = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        send(client, route)
+        durations.append((time.perf_counter() - start) * 1000)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    send(client, route)
+    peak = tracemalloc.get_traced_memory()[1]
+    if not tracing:
+        tracemalloc.stop()
+    return {
+        "status": response.status_code,
+        "cold_queries": cold.count,
+        "queries": warm.count,
+        "p50_ms": round(percentile(durations, 0.5), 2),
+        "p95_ms": round(percentile(durations, 0.95), 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def check_budgets(
+    results, baseline, latency_tolerance=3.0, memory_tolerance=1.5, queries_only=False
+):
+    """Function returning the budgets of the baseline exceeded by the results,
+    as messages. The query counts must not go up at all, the p95 latency and
+    the peak memory may grow by their tolerance. Routes without a budget are
+    left out."""
+    violations = []
+    for name, result in results.items():
+        budget = baseline["routes"].get(name)
+        if budget is None:
+            continue
+        for key in ("cold_queries", "queries"):
+            if result[key] > budget[key]:
+                violations.append(
+                    f"{name}: {result[key]} {key.replace('_', ' ')}, "
+                    f"budget {budget[key]}"
+                )
+        if queries_only:
+            continue
+        limit = budget["p95_ms"] * latency_tolerance + LATENCY_SLACK_MS
+        if result["p95_ms"] > limit:
+            violations.append(
+                f"{name}: p95 of {result['p95_ms']:.2f} ms, budget {limit:.2f} ms"
+            )
+        limit = budget["peak_kb"] * memory_tolerance + MEMORY_SLACK_KB
+        if result["peak_kb"] > limit:
+            violations.append(
+                f"{name}: peak memory of {result['peak_kb']:.1f} KB, "
+                f"budget {limit:.1f} KB"
+            )
+    return violations
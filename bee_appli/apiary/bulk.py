@@ -0,0 +1,249 @@
+# Third-party imports
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+# Local imports
+from .models import Harvest, Intervention, SyrupDistribution, Treatment
+from .rollup import sync_interventions
+from .serializers import OwnedPrimaryKeyRelatedField
+
+
+def build_content_objects(intervention_type, detail, count):
+    """Function to create the detail objects (harvest, syrup distribution,
+    treatment or child hive) needed by `count` interventions of the given type.
+    Returns one object (or None) per intervention, in order."""
+
+    if intervention_type == Intervention.HARVEST:
+        # Each hive gets its own harvest row so quantities can be edited later
+        harvests = [Harvest(quantity=detail["quantity"]) for i in range(count)]
+        return Harvest.objects.bulk_create(harvests)
+
+    elif intervention_type == Intervention.SYRUP_DISTRIBUTION:
+        syrups = [
+            SyrupDistribution(
+                quantity=detail["quantity"], syrup_type=detail["syrup_type"]
+            )
+            for i in range(count)
+        ]
+        return SyrupDistribution.objects.bulk_create(syrups)
+
+    elif intervention_type == Intervention.TREATMENT:
+        # Treatment types are unique so every intervention shares the same row
+        treatment, created = Treatment.objects.get_or_create(
+            treatment_type=detail["treatment_type"]
+        )
+        return [treatment] * count
+
+    elif intervention_type == Intervention.ARTIFICIAL_SWARMING:
+        # The child hive is looked up and checked by the view
+        return [detail["child_hive"]] * count
+
+    return [None] * count
+
+
+def bulk_apply_intervention(hives, intervention_type, detail=None):
+    """Function to log the same intervention on every given hive using one
+    bulk insert per table inside a single transaction. The created interventions
+    are returned with their hive and content object already attached so they
+    can be serialized without any further queries."""
+
+    hives = list(hives)
+    detail = detail or {}
+
+    with transaction.atomic():
+        content_objects = build_content_objects(intervention_type, detail, len(hives))
+        interventions = []
+        for hive, content_object in zip(hives, content_objects):
+            intervention = Intervention(
+                intervention_type=intervention_type,
+                hive_affected=hive,
+                owner_id=hive.owner_id,
+            )
+            if content_object is not None:
+                # Also fills the generic foreign key cache
+                intervention.content_object = content_object
+            interventions.append(intervention)
+        Intervention.objects.bulk_create(interventions)
+        # bulk_create doesn't send the post_save signal updating the rollup
+        sync_interventions(interventions)
+
+    return interventions
+
+
+def as_pk(value):
+    """Function to convert a primary key sent by a client to an integer,
+    returns None if it isn't one."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class BatchModelMixin:
+    """Mixin for model viewsets which accepts a list of objects in the body of
+    a POST to create them all at once, and a list of partial updates (each with
+    its "id") in a PATCH on the list route. Related objects are checked against
+    the beekeeper's ownership with one query per field for the whole batch, rows
+    are written with bulk_create/bulk_update and a result is returned per item."""
+
+    # Number of rows per INSERT/UPDATE statement
+    batch_size = 1000
+    # Relations to load on the saved objects before serializing them
+    batch_prefetch = ()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if getattr(self, "preloaded", None) is not None:
+            context["preloaded"] = self.preloaded
+        return context
+
+    def preload_related(self, items):
+        """Function to fetch the related objects referenced by all of the items
+        with one query per field, keeping only the ones the user may access."""
+        self.preloaded = None
+        fields = self.get_serializer().fields
+        preloaded = {}
+        # Fields linking the object to its beekeeper
+        self.owner_fields = []
+        for name, field in fields.items():
+            if not isinstance(field, OwnedPrimaryKeyRelatedField):
+                continue
+            if field.owner_lookup is not None:
+                self.owner_fields.append(name)
+            ids = set()
+            for item in items:
+                pk = as_pk(item.get(name)) if isinstance(item, dict) else None
+                if pk is not None:
+                    ids.add(pk)
+            preloaded[name] = field.get_queryset().in_bulk(ids) if ids else {}
+        self.preloaded = preloaded
+
+    def batch_saved(self, objects):
+        """Called with the objects written by a batch request, which doesn't
+        send the model signals."""
+
+    def batch_response(self, saved, results, success_status):
+        """Function to serialize the saved objects in one pass and place them in
+        the per-item results. Answers 207 if some of the items were refused."""
+        if self.batch_prefetch:
+            prefetch_related_objects(saved, *self.batch_prefetch)
+        data = self.get_serializer(saved, many=True).data
+        saved_data = iter(data)
+        for result in results:
+            if result["status"] == success_status:
+                result["data"] = next(saved_data)
+        if all(result["status"] == success_status for result in results):
+            return Response(results, status=success_status)
+        return Response(results, status=status.HTTP_207_MULTI_STATUS)
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.batch_create(request)
+        return super().create(request, *args, **kwargs)
+
+    def batch_create(self, request):
+        """Function to validate and insert a list of new objects."""
+        items = request.data
+        self.preload_related(items)
+        model = self.get_queryset().model
+        # One serializer validates every item, its fields are only built once
+        serializer = self.get_serializer()
+        objects = []
+        results = []
+        for item in items:
+            try:
+                validated_data = serializer.run_validation(item)
+            except serializers.ValidationError as exc:
+                results.append(
+                    {
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": serializers.as_serializer_error(exc),
+                    }
+                )
+                continue
+            # Objects which aren't attached to the beekeeper would be lost
+            missing = [
+                name for name in self.owner_fields if name not in validated_data
+            ]
+            if missing:
+                results.append(
+                    {
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": {name: ["This field is required."] for name in missing},
+                    }
+                )
+                continue
+            instance = model(**validated_data)
+            if hasattr(instance, "set_owner"):
+                # bulk_create doesn't send the pre_save signal
+                instance.set_owner()
+            objects.append(instance)
+            results.append({"status": status.HTTP_201_CREATED})
+
+        with transaction.atomic():
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.batch_saved(objects)
+        return self.batch_response(objects, results, status.HTTP_201_CREATED)
+
+    def bulk_partial_update(self, request, *args, **kwargs):
+        """Function to apply a list of partial updates, each identified by its "id"."""
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"detail": "Expected a list of objects."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        self.preload_related(items)
+        model = self.get_queryset().model
+        # Objects of other beekeepers aren't in the queryset so are not found
+        ids = [as_pk(item.get("id")) for item in items if isinstance(item, dict)]
+        instances = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+        serializer = self.get_serializer(partial=True)
+        updated = {}
+        updated_fields = set()
+        saved = []
+        results = []
+        for item in items:
+            instance = None
+            if isinstance(item, dict):
+                instance = instances.get(as_pk(item.get("id")))
+            if instance is None:
+                results.append(
+                    {"status": status.HTTP_404_NOT_FOUND, "errors": {"id": "Not found."}}
+                )
+                continue
+            serializer.instance = instance
+            try:
+                validated_data = serializer.run_validation(item)
+            except serializers.ValidationError as exc:
+                results.append(
+                    {
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": serializers.as_serializer_error(exc),
+                    }
+                )
+                continue
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+                updated_fields.add(attr)
+            updated[instance.pk] = instance
+            saved.append(instance)
+            results.append({"status": status.HTTP_200_OK})
+
+        if updated_fields:
+            # bulk_update skips pre_save so auto_now dates are set here
+            for field in model._meta.concrete_fields:
+                if getattr(field, "auto_now", False):
+                    for instance in updated.values():
+                        field.pre_save(instance, add=False)
+                    updated_fields.add(field.name)
+            with transaction.atomic():
+                model.objects.bulk_update(
+                    updated.values(), updated_fields, batch_size=self.batch_size
+                )
+            self.batch_saved(list(updated.values()))
+        return self.batch_response(saved, results, status.HTTP_200_OK)
@@ -0,0 +1,53 @@
+# Standard library imports
+import time
+
+# Third-party imports
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+# Time in seconds a beekeeper's list of beeyards stays cached. Changes to the
+# beeyards or hives remove it before that.
+BEEYARDS_FRAGMENT_TIMEOUT = 600
+
+
+def beeyards_fragment_key(user_id):
+    """Function returning the cache key of the beeyards fragment of index.html."""
+    return make_template_fragment_key("beeyards", [user_id])
+
+
+def invalidate_beeyards_fragment(*user_ids):
+    """Function to remove the cached beeyards page of the given beekeepers."""
+    cache.delete_many(
+        [beeyards_fragment_key(user_id) for user_id in user_ids if user_id is not None]
+    )
+
+
+# Time in seconds the statistics of a hive or beeyard stay cached. Changes to
+# the beekeeper's data make them out of date before that.
+STATS_TIMEOUT = 600
+
+
+def stats_version_key(user_id):
+    """Function returning the cache key of the version of a beekeeper's statistics."""
+    return f"stats-version:{user_id}"
+
+
+def stats_cache_key(user_id, name, object_id, group):
+    """Function returning the cache key of the statistics of a hive or beeyard.
+    It includes the version of the beekeeper's statistics, so raising it leaves
+    every cached entry of the beekeeper unused."""
+    # Starting from the time, a version which was evicted can't come back
+    version = cache.get_or_set(stats_version_key(user_id), time.time_ns, None)
+    return f"stats:{user_id}:{version}:{name}:{object_id}:{group}"
+
+
+def invalidate_stats(*user_ids):
+    """Function to make the cached statistics of the given beekeepers out of date."""
+    for user_id in user_ids:
+        if user_id is None:
+            continue
+        try:
+            cache.incr(stats_version_key(user_id))
+        except ValueError:
+            # No statistics were cached since the version was evicted
+            pass
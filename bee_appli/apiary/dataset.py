@@ -0,0 +1,301 @@
+# Standard library imports
+import calendar
+import datetime
+import random
+
+# Third-party imports
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+
+# Local imports
+from .importing import bulk_create_with_dates, copy_objects
+from .models import (
+    BeeYard,
+    Contamination,
+    Harvest,
+    Hive,
+    Intervention,
+    SyrupDistribution,
+    Treatment,
+)
+from public_api.models import PublicContact
+
+# Beekeepers of the dataset, repeated with a number after the first ones when
+# there are more
+USERS = [
+    ("Idgie", "Threadgood"),
+    ("Frank", "Wang"),
+    ("Alice", "Taylor"),
+    ("Ivy", "Clark"),
+    ("David", "Lee"),
+    ("Eva", "Aldridge"),
+    ("Grace", "Johnson"),
+    ("Henry", "Garcia"),
+    ("Charlie", "Brown"),
+    ("Jodie", "Taylor"),
+]
+PASSWORD = "Bees4ever!"
+HIVE_NAMES = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Last day of the generated history, fixed so that a seed always gives the same
+# dataset
+END_DATE = datetime.date(2024, 10, 31)
+
+# Hives whose history is generated and written at a time, bounding the memory
+# used
+HIVE_CHUNK_SIZE = 2000
+
+# Share of each status of the hives
+STATUS_WEIGHTS = {Hive.ACTIVE: 70, Hive.PENDING: 15, Hive.DESTROYED: 15}
+
+# Share of each type of intervention
+INTERVENTION_WEIGHTS = {
+    Intervention.HEALTH_CHECK: 35,
+    Intervention.HARVEST: 20,
+    Intervention.SYRUP_DISTRIBUTION: 15,
+    Intervention.TREATMENT: 10,
+    Intervention.SUPER_INSTALLATION: 10,
+    Intervention.DESTRUCTION_QUEEN_CELLS: 5,
+    Intervention.ARTIFICIAL_SWARMING: 5,
+}
+
+# Weight of each month, January first, in the dates of each type of
+# intervention and contamination, following the beekeeping season
+MONTH_WEIGHTS = {
+    Intervention.HEALTH_CHECK: [1, 2, 6, 9, 10, 10, 9, 9, 8, 6, 2, 1],
+    Intervention.HARVEST: [0, 0, 0, 1, 4, 8, 10, 9, 5, 1, 0, 0],
+    Intervention.SYRUP_DISTRIBUTION: [1, 4, 5, 1, 0, 0, 0, 1, 6, 8, 4, 1],
+    Intervention.TREATMENT: [2, 1, 1, 1, 0, 0, 2, 8, 9, 3, 1, 6],
+    Intervention.SUPER_INSTALLATION: [0, 0, 1, 8, 10, 6, 2, 0, 0, 0, 0, 0],
+    Intervention.DESTRUCTION_QUEEN_CELLS: [0, 0, 0, 6, 10, 7, 1, 0, 0, 0, 0, 0],
+    Intervention.ARTIFICIAL_SWARMING: [0, 0, 0, 5, 10, 6, 1, 0, 0, 0, 0, 0],
+    Contamination.PARASITE: [1, 1, 1, 2, 3, 4, 6, 9, 10, 7, 3, 1],
+    Contamination.ILLNESS: [1, 2, 6, 8, 7, 5, 3, 2, 2, 2, 1, 1],
+}
+MONTHS = range(1, 13)
+
+
+def draw(rng, mean, minimum=1):
+    """Function returning a random whole number at least `minimum` whose average
+    is `mean`."""
+    value = rng.uniform(minimum, max(minimum, 2 * mean - minimum))
+    return int(value) + (rng.random() < value - int(value))
+
+
+def seasonal_day(rng, kind, years):
+    """Function returning a random day of the last `years` years up to END_DATE,
+    in a month chosen with the weights of the kind of intervention or
+    contamination."""
+    month = rng.choices(MONTHS, MONTH_WEIGHTS[kind])[0]
+    year = END_DATE.year - rng.randrange(years)
+    if (year, month) > (END_DATE.year, END_DATE.month):
+        year -= 1
+    day = rng.randint(1, calendar.monthrange(year, month)[1])
+    return min(datetime.date(year, month, day), END_DATE)
+
+
+def seasonal_moment(rng, kind, years):
+    """Function returning a random time of a day given by seasonal_day()."""
+    return datetime.datetime.combine(
+        seasonal_day(rng, kind, years),
+        datetime.time(rng.randint(8, 18), rng.randint(0, 59)),
+        tzinfo=datetime.timezone.utc,
+    )
+
+
+class DatasetGenerator:
+    """Class generating beekeepers along with their beeyards, hives and a history
+    of every type of intervention and of contaminations, dated following the
+    season, for filltestdb and the benchmarks. The numbers of beeyards, hives,
+    interventions and contaminations are averages, or exact numbers with
+    `exact`, and a seed always gives the same dataset. Usernames start with
+    `username_prefix`. Rows are bulk inserted, so the daily rollup, the search
+    index and the versions of the public collections must be updated
+    afterwards."""
+
+    def __init__(
+        self,
+        seed=0,
+        years=3,
+        yards_per_keeper=2.5,
+        hives_per_yard=3,
+        interventions_per_hive=8,
+        contaminations_per_hive=0.2,
+        exact=False,
+        username_prefix="",
+    ):
+        self.rng = random.Random(seed)
+        self.years = years
+        self.yards_per_keeper = yards_per_keeper
+        self.hives_per_yard = hives_per_yard
+        self.interventions_per_hive = interventions_per_hive
+        self.contaminations_per_hive = contaminations_per_hive
+        self.exact = exact
+        self.username_prefix = username_prefix
+        self.counts = dict.fromkeys(
+            ["users", "beeyards", "hives", "interventions", "contaminations"], 0
+        )
+        # COPY is used for the tables whose ids aren't needed afterwards
+        self.use_copy = connection.vendor == "postgresql"
+        # Hashing is slow, every beekeeper gets the same hash
+        self.password = make_password(PASSWORD, salt=f"filltestdb{seed}")
+        self.date_joined = datetime.datetime(
+            END_DATE.year - years, 1, 1, tzinfo=datetime.timezone.utc
+        )
+        # Treatment types are unique so every intervention shares the same row
+        self.treatments = [
+            Treatment.objects.get_or_create(treatment_type=treatment_type)[0]
+            for treatment_type, name in Treatment.TREATMENTS
+        ]
+
+    def draw(self, mean, minimum=1):
+        """Function returning the number of objects to create for an average."""
+        if self.exact:
+            return max(minimum, round(mean))
+        return draw(self.rng, mean, minimum)
+
+    def write(self, model, objects):
+        """Function to insert objects whose ids aren't needed, keeping their
+        dates."""
+        if self.use_copy:
+            copy_objects(model, objects)
+        else:
+            bulk_create_with_dates(model, objects)
+
+    def fill_keepers(self, numbers):
+        """Function to create the beekeepers with the given numbers along with
+        their beeyards, hives, interventions and contaminations. Returns the
+        beekeepers."""
+        rng = self.rng
+        users = []
+        names = []
+        for number in numbers:
+            first_name, last_name = USERS[number % len(USERS)]
+            name = first_name + last_name
+            if number >= len(USERS):
+                name += str(number // len(USERS))
+            username = self.username_prefix + name
+            names.append(name)
+            users.append(
+                User(
+                    username=username,
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=self.password,
+                    email=username + "@testmail.com",
+                    date_joined=self.date_joined,
+                )
+            )
+        User.objects.bulk_create(users)
+        # Keepers with D in their name will not share contact information in
+        # the public API
+        PublicContact.objects.bulk_create(
+            PublicContact(public_beekeeper_info=user)
+            for user, name in zip(users, names)
+            if "d" not in name
+        )
+
+        beeyards = [
+            BeeYard(name=name[2:6] + str(i), beekeeper=user)
+            for user, name in zip(users, names)
+            for i in range(self.draw(self.yards_per_keeper))
+        ]
+        BeeYard.objects.bulk_create(beeyards)
+
+        hives = []
+        for beeyard in beeyards:
+            for j in range(self.draw(self.hives_per_yard)):
+                hives.append(
+                    Hive(
+                        status=rng.choices(
+                            list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+                        )[0],
+                        species=rng.choice(Hive.BEE_SPECIES)[0],
+                        beeyard=beeyard,
+                        owner_id=beeyard.beekeeper_id,
+                        queen_year=END_DATE.year - rng.randrange(self.years),
+                        name=HIVE_NAMES[j % 26] + (str(j // 26) if j >= 26 else ""),
+                        date_updated=seasonal_day(
+                            rng, Intervention.HEALTH_CHECK, self.years
+                        ),
+                    )
+                )
+        bulk_create_with_dates(Hive, hives)
+
+        hives_by_owner = {}
+        for hive in hives:
+            hives_by_owner.setdefault(hive.owner_id, []).append(hive)
+        for first in range(0, len(hives), HIVE_CHUNK_SIZE):
+            self.fill_history(hives[first : first + HIVE_CHUNK_SIZE], hives_by_owner)
+        self.counts["users"] += len(users)
+        self.counts["beeyards"] += len(beeyards)
+        self.counts["hives"] += len(hives)
+        return users
+
+    def fill_history(self, hives, hives_by_owner):
+        """Function to create the interventions and contaminations of the hives,
+        dated following the season of each type. Artificial swarmings create
+        one of the other hives of the beekeeper, from `hives_by_owner`."""
+        rng = self.rng
+        years = self.years
+
+        interventions = []
+        contaminations = []
+        for hive in hives:
+            for i in range(self.draw(self.interventions_per_hive, 0)):
+                intervention_type = rng.choices(
+                    list(INTERVENTION_WEIGHTS), list(INTERVENTION_WEIGHTS.values())
+                )[0]
+                content_object = None
+                if intervention_type == Intervention.HARVEST:
+                    content_object = Harvest(quantity=round(rng.uniform(2, 20), 1))
+                elif intervention_type == Intervention.SYRUP_DISTRIBUTION:
+                    content_object = SyrupDistribution(
+                        syrup_type=rng.choice(SyrupDistribution.SYRUP_TYPES)[0],
+                        quantity=round(rng.randint(1, 12) / 4, 2),
+                    )
+                elif intervention_type == Intervention.TREATMENT:
+                    content_object = rng.choice(self.treatments)
+                elif intervention_type == Intervention.ARTIFICIAL_SWARMING:
+                    # The child hive is another hive of the beekeeper
+                    content_object = rng.choice(hives_by_owner[hive.owner_id])
+                    if content_object is hive:
+                        intervention_type = Intervention.HEALTH_CHECK
+                        content_object = None
+                intervention = Intervention(
+                    intervention_type=intervention_type,
+                    hive_affected=hive,
+                    owner_id=hive.owner_id,
+                    date=seasonal_moment(rng, intervention_type, years),
+                )
+                # The detail rows get their ids before the link is made
+                intervention.detail = content_object
+                interventions.append(intervention)
+            for i in range(self.draw(self.contaminations_per_hive, 0)):
+                contamination_type = rng.choice(Contamination.CONTAMINATION_TYPES)[0]
+                contaminations.append(
+                    Contamination(
+                        type=contamination_type,
+                        hive=hive,
+                        owner_id=hive.owner_id,
+                        date=seasonal_day(rng, contamination_type, years),
+                    )
+                )
+
+        for model in (Harvest, SyrupDistribution):
+            model.objects.bulk_create(
+                [
+                    intervention.detail
+                    for intervention in interventions
+                    if isinstance(intervention.detail, model)
+                ],
+                batch_size=1000,
+            )
+        for intervention in interventions:
+            if intervention.detail is not None:
+                intervention.content_object = intervention.detail
+        self.write(Intervention, interventions)
+        self.write(Contamination, contaminations)
+        self.counts["interventions"] += len(interventions)
+        self.counts["contaminations"] += len(contaminations)
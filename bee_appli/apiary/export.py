@@ -0,0 +1,135 @@
+# Standard library imports
+from itertools import islice
+
+# Third-party imports
+from django.contrib.contenttypes.models import ContentType
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+
+# Local imports
+from .models import Harvest, Hive, SyrupDistribution, Treatment
+from .renderers import CSVExportRenderer, NDJSONExportRenderer
+
+# Rows read from the database at a time. On PostgreSQL they are fetched from a
+# server-side cursor, so the memory used doesn't depend on the size of the export
+EXPORT_CHUNK_SIZE = 2000
+
+# Columns of the content object of an intervention added to its export row,
+# for each model it can be, with the column of the model giving each value
+DETAIL_COLUMNS = {
+    Harvest: {"harvest_quantity": "quantity"},
+    SyrupDistribution: {"syrup_type": "syrup_type", "syrup_quantity": "quantity"},
+    Treatment: {"treatment_type": "treatment_type"},
+    Hive: {"child_hive": "id"},
+}
+
+
+def chunks(rows, size=EXPORT_CHUNK_SIZE):
+    """Function yielding lists of at most `size` of the rows."""
+    chunk = list(islice(rows, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(rows, size))
+
+
+def detail_header():
+    """Function returning the names of the content object columns."""
+    return [name for columns in DETAIL_COLUMNS.values() for name in columns]
+
+
+def add_details(rows):
+    """Function returning a chunk of intervention rows, ending with their content
+    type and object id, with those two replaced by the columns of their content
+    object. The content objects are read with one query per model."""
+    header = detail_header()
+    ids_by_type = {}
+    for row in rows:
+        if row[-2] is not None and row[-1] is not None:
+            ids_by_type.setdefault(row[-2], set()).add(row[-1])
+    details = {}
+    for model, columns in DETAIL_COLUMNS.items():
+        content_type_id = ContentType.objects.get_for_model(model).id
+        if content_type_id not in ids_by_type:
+            continue
+        positions = [header.index(name) for name in columns]
+        for object_id, *values in model.objects.filter(
+            id__in=ids_by_type[content_type_id]
+        ).values_list("id", *columns.values()):
+            detail = [None] * len(header)
+            for position, value in zip(positions, values):
+                detail[position] = value
+            details[content_type_id, object_id] = detail
+    empty = [None] * len(header)
+    return [[*row[:-2], *details.get(tuple(row[-2:]), empty)] for row in rows]
+
+
+class ExportMixin:
+    """Mixin adding an export route to the list of a viewset, giving every row
+    of the beekeeper, filtered like the list, as a streamed CSV file or as
+    newline delimited JSON with ?format=ndjson. Rows are read in chunks and
+    written as they come, so exporting a whole history uses constant memory."""
+
+    # Columns of the export, model fields or lookups through relations
+    export_columns = ()
+    # Order of the rows, which should match an index of the owner's rows
+    export_ordering = ("id",)
+
+    def export_header(self):
+        """Function returning the names of the columns of the export."""
+        return [column.replace("__", "_") for column in self.export_columns]
+
+    def export_rows(self, queryset):
+        """Function yielding the chunks of rows written to the export."""
+        return chunks(
+            queryset.values_list(*self.export_columns).iterator(
+                chunk_size=EXPORT_CHUNK_SIZE
+            )
+        )
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        renderer_classes=[CSVExportRenderer, NDJSONExportRenderer],
+    )
+    def export(self, request):
+        """Function streaming every row of the list, with the list's filters."""
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .order_by(*self.export_ordering)
+        )
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        rows = (row for chunk in self.export_rows(queryset) for row in chunk)
+        response = StreamingHttpResponse(
+            renderer.stream(self.export_header(), rows), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.basename}.{renderer.format}"'
+        )
+        return response
+
+
+class InterventionExportMixin(ExportMixin):
+    """Export of the interventions with the columns of their harvest, syrup
+    distribution, treatment or child hive."""
+
+    export_columns = (
+        "id",
+        "date",
+        "intervention_type",
+        "hive_affected",
+        "hive_affected__name",
+    )
+    export_ordering = ("date", "id")
+
+    def export_header(self):
+        return [*super().export_header(), *detail_header()]
+
+    def export_rows(self, queryset):
+        rows = queryset.values_list(
+            *self.export_columns, "content_type", "object_id"
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return (add_details(chunk) for chunk in chunks(rows))
@@ -0,0 +1,298 @@
+# Third-party imports
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ManyToOneRel
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+# Plans compiled so far, keyed by serializer class and fields. None when the
+# serializer has a field the fast path can't convert.
+PLANS = {}
+
+
+class Unsupported(Exception):
+    """Raised when a serializer has a field the fast path can't convert."""
+
+
+class RowPlan:
+    """Class holding what the fast path needs to serialize rows of a model: the
+    columns to read with values_list(), the function turning a row into the
+    serializer's output and the loaders fetching related data for a whole page
+    at once. A plan is compiled once and used for every request."""
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = []
+        self.loaders = []
+        # Plans of the objects of reverse relations, by name of the relation
+        self.relations = {}
+        self.convert = None
+
+    def column(self, lookup):
+        """Function returning the position of a column in the rows, adding it to
+        the columns read if it isn't there yet."""
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return self.columns.index(lookup)
+
+    def load(self, rows):
+        """Function returning the related data of a list of rows."""
+        loaded = {}
+        for load in self.loaders:
+            load(rows, loaded)
+        return loaded
+
+    def serialize(self, rows):
+        """Function returning the data of a list of rows."""
+        loaded = self.load(rows)
+        convert = self.convert
+        return [convert(row, loaded) for row in rows]
+
+
+def compile_value(field):
+    """Function returning the function converting a column value for a field,
+    skipping the generic to_representation() of the most common fields. Like
+    DRF, None is returned as it is."""
+    method = type(field).to_representation
+    if method is serializers.CharField.to_representation:
+        convert = str
+    elif method is serializers.IntegerField.to_representation:
+        convert = int
+    elif method is serializers.ChoiceField.to_representation:
+        choices = field.choice_strings_to_values
+
+        def convert(value):
+            if value == "":
+                return value
+            return choices.get(str(value), value)
+
+    else:
+        convert = field.to_representation
+    return convert
+
+
+def compile_field(field, model, plan, prefix):
+    """Function returning the function reading the value of a field from a row."""
+    source = field.source
+    if source == "*" or "." in source:
+        raise Unsupported(field.field_name)
+    try:
+        model_field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        raise Unsupported(field.field_name)
+
+    if isinstance(field, (ManyRelatedField, serializers.ListSerializer)):
+        if prefix or not isinstance(model_field, ManyToOneRel):
+            raise Unsupported(field.field_name)
+        return compile_reverse(field, model_field, plan)
+    if model_field.is_relation and not model_field.concrete:
+        raise Unsupported(field.field_name)
+
+    if isinstance(field, serializers.ModelSerializer):
+        # Nested object reached through a foreign key, read with joins
+        index = plan.column(prefix + model_field.name)
+        nested_prefix = f"{prefix}{model_field.name}__"
+        convert_nested = compile_serializer(field, plan, nested_prefix)
+
+        def convert(row, loaded):
+            if row[index] is None:
+                return None
+            return convert_nested(row, loaded)
+
+        return convert
+
+    index = plan.column(prefix + model_field.name)
+    if isinstance(field, PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            raise Unsupported(field.field_name)
+        # The column already holds the primary key
+        return lambda row, loaded: row[index]
+    if isinstance(field, serializers.ReadOnlyField):
+        return lambda row, loaded: row[index]
+    if not type(field).__module__.startswith("rest_framework"):
+        # Custom fields may read more than the value of their column
+        raise Unsupported(field.field_name)
+    convert_value = compile_value(field)
+
+    def convert(row, loaded):
+        value = row[index]
+        return None if value is None else convert_value(value)
+
+    return convert
+
+
+def compile_reverse(field, relation, plan):
+    """Function returning the function reading a list of objects pointing to the
+    row, such as the hives of a beeyard. The objects of a relation are fetched
+    for the whole page with one query ordered by primary key, shared by all the
+    fields reading the relation."""
+    related_model = relation.related_model
+    if relation.name not in plan.relations:
+        plan.relations[relation.name] = RowPlan(related_model)
+        plan.loaders.append(load_reverse(relation, plan))
+    related_plan = plan.relations[relation.name]
+    if isinstance(field, ManyRelatedField):
+        if not isinstance(field.child_relation, PrimaryKeyRelatedField):
+            raise Unsupported(field.field_name)
+        related_pk_index = related_plan.column(related_model._meta.pk.name)
+
+        def convert_item(row, loaded):
+            return row[related_pk_index]
+
+    else:
+        convert_item = compile_serializer(field.child, related_plan)
+    pk_index = plan.column(plan.model._meta.pk.name)
+    key = relation.name
+
+    def convert(row, loaded):
+        related_rows, related_loaded = loaded[key]
+        return [
+            convert_item(related_row, related_loaded)
+            for related_row in related_rows.get(row[pk_index], ())
+        ]
+
+    return convert
+
+
+def load_reverse(relation, plan):
+    """Function returning the loader of the objects of a reverse relation."""
+    related_plan = plan.relations[relation.name]
+    related_model = relation.related_model
+    foreign_key = relation.field.name
+    key_index = related_plan.column(foreign_key)
+    pk_index = plan.column(plan.model._meta.pk.name)
+
+    def load(rows, loaded):
+        related = related_model._default_manager.filter(
+            **{f"{foreign_key}__in": {row[pk_index] for row in rows}}
+        ).order_by(foreign_key, related_model._meta.pk.name)
+        related_rows = list(related.values_list(*related_plan.columns))
+        rows_by_key = {}
+        for related_row in related_rows:
+            rows_by_key.setdefault(related_row[key_index], []).append(related_row)
+        loaded[relation.name] = (rows_by_key, related_plan.load(related_rows))
+
+    return load
+
+
+def compile_serializer(serializer, plan, prefix=""):
+    """Function returning the function turning a row into the output of the
+    serializer. Fields the generic rules can't handle may be given a fast version
+    in the serializer's `fast_fields`, a dict of field names to objects with a
+    compile(serializer, name, plan, prefix) method."""
+    model = serializer.Meta.model
+    fast_fields = getattr(serializer, "fast_fields", {})
+    steps = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in fast_fields:
+            step = fast_fields[name].compile(serializer, name, plan, prefix)
+        else:
+            step = compile_field(field, model, plan, prefix)
+        steps.append((name, step))
+
+    def convert(row, loaded):
+        return {name: step(row, loaded) for name, step in steps}
+
+    return convert
+
+
+def get_plan(serializer, extra_columns=()):
+    """Function returning the plan of a serializer, compiled on first use, or None
+    if the serializer can't use the fast path. `extra_columns` are read along
+    with the fields, for the pagination."""
+    key = (type(serializer), tuple(serializer.fields), tuple(extra_columns))
+    if key not in PLANS:
+        plan = RowPlan(serializer.Meta.model)
+        try:
+            plan.convert = compile_serializer(serializer, plan)
+        except Unsupported:
+            plan = None
+        else:
+            for column in extra_columns:
+                plan.column(column)
+        PLANS[key] = plan
+    return PLANS[key]
+
+
+class GenericObjectFastField:
+    """Fast version of a generic foreign key field serialized with a different
+    serializer for each model, the objects of each content type being fetched
+    with one query per page."""
+
+    def __init__(self, serializers_by_model):
+        self.serializers_by_model = serializers_by_model
+
+    def compile(self, serializer, name, plan, prefix):
+        generic_key = serializer.Meta.model._meta.get_field(name)
+        if prefix or not isinstance(generic_key, GenericForeignKey):
+            raise Unsupported(name)
+        type_index = plan.column(generic_key.ct_field)
+        id_index = plan.column(generic_key.fk_field)
+        object_plans = {}
+        for model, serializer_class in self.serializers_by_model.items():
+            object_plan = RowPlan(model)
+            pk_index = object_plan.column(model._meta.pk.name)
+            object_plan.convert = compile_serializer(serializer_class(), object_plan)
+            if object_plan.loaders:
+                raise Unsupported(name)
+            object_plans[model] = (object_plan, pk_index)
+        key = name
+
+        def load(rows, loaded):
+            ids_by_type = {}
+            for row in rows:
+                if row[type_index] is not None and row[id_index] is not None:
+                    ids_by_type.setdefault(row[type_index], set()).add(row[id_index])
+            objects = {}
+            for type_id, ids in ids_by_type.items():
+                model = ContentType.objects.get_for_id(type_id).model_class()
+                if model not in object_plans:
+                    raise Exception("Unexpected type of tagged object")
+                object_plan, pk_index = object_plans[model]
+                object_rows = model._default_manager.filter(pk__in=ids).values_list(
+                    *object_plan.columns
+                )
+                for object_row in object_rows:
+                    objects[(type_id, object_row[pk_index])] = object_plan.convert(
+                        object_row, {}
+                    )
+            loaded[key] = objects
+
+        plan.loaders.append(load)
+
+        def convert(row, loaded):
+            return loaded[key].get((row[type_index], row[id_index]))
+
+        return convert
+
+
+class FastListMixin:
+    """Mixin for the viewsets whose list action can skip the serializer fields:
+    rows are read with values_list() and turned into the same data the serializer
+    would give by a plan compiled from the serializer. Serializers with fields the
+    plan can't handle go through the usual path."""
+
+    # Turned off to compare the two paths
+    use_fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        plan = None
+        if self.use_fast_list:
+            ordering = getattr(self, "keyset_ordering", None) or ()
+            plan = get_plan(
+                self.get_serializer(), [name.lstrip("-") for name in ordering]
+            )
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Named rows let the keyset pagination read the ordering columns
+        rows = queryset.prefetch_related(None).values_list(*plan.columns, named=True)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(list(rows)))
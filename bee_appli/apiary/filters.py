@@ -1,4 +1,5 @@
 # Third-party imports
+from django.db.models import Q
 from django_filters import rest_framework as filters
 
 # Local imports
@@ -53,91 +54,81 @@ class HiveFilter(filters.FilterSet):
 class InterventionFilter(filters.FilterSet):
     """Class for a beekeeper to filter their interventions"""
 
+    def content_condition(self, model, **lookups):
+        """Function returning the condition for interventions whose content object
+        is a `model` matching the lookups. The content type is part of the
+        condition so a harvest can't match a treatment with the same ID, and the
+        matching objects are found in a subquery run by the database."""
+        matches = model.objects.filter(**lookups).values("pk")
+        return Q(
+            content_type__app_label=model._meta.app_label,
+            content_type__model=model._meta.model_name,
+            object_id__in=matches,
+        )
+
     # Use a function to filter interventions by treatment type
     treatment_type = filters.CharFilter(method="find_treatment_type")
 
     def find_treatment_type(self, queryset, name, value):
         """Function to filter interventions and return those which are
         treatments with a type which includes the search term."""
-        # To save the results
-        matching_interventions = []
-        for result in queryset:
-            # Can possibly be refactored to be done with exclude
-            # Filter only interventions which are treatments
-            if hasattr(result.content_object, "treatment_type"):
-                matching_interventions.append(result.object_id)
-        # Find all treatment objects which match the interventions found
-        treatment_query = Treatment.objects.filter(pk__in=matching_interventions)
-        # Filter these for only the treatments matching the search term
-        treatment_query = treatment_query.filter(treatment_type__icontains=value)
-        # This seems very convoluted and I should definitely redo it when I've slept
-        # better. Goal is to return a queryset of matching intervention objects.
-        treatment_matches = []
-        for treatment in treatment_query:
-            treatment_matches.append(treatment.id)
-        queryset = queryset.filter(object_id__in=treatment_matches)
-
-        return queryset
+        return queryset.filter(
+            self.content_condition(Treatment, treatment_type__icontains=value)
+        )
 
     syrup_type = filters.CharFilter(method="find_syrup_type")
 
     def find_syrup_type(self, queryset, name, value):
         """Function to filter interventions and return those which are
         syrup distributions with a type which includes the search term."""
-        matching_interventions = []
-        for result in queryset:
-            if hasattr(result.content_object, "syrup_type"):
-                matching_interventions.append(result.object_id)
-        syrup_query = SyrupDistribution.objects.filter(pk__in=matching_interventions)
-        syrup_query = syrup_query.filter(syrup_type__icontains=value)
-        syrup_matches = []
-        for syrup in syrup_query:
-            syrup_matches.append(syrup.id)
-        queryset = queryset.filter(object_id__in=syrup_matches)
-
-        return queryset
+        return queryset.filter(
+            self.content_condition(SyrupDistribution, syrup_type__icontains=value)
+        )
 
-    harvest_lt = filters.CharFilter(method="find_harvest_lt")
+    harvest_lt = filters.NumberFilter(method="find_harvest_lt")
 
     def find_harvest_lt(self, queryset, name, value):
         """Function to filter interventions and return those which are
         harvests with less than the given amount of honey harvested."""
+        return queryset.filter(self.content_condition(Harvest, quantity__lt=value))
 
-        matching_interventions = []
-        for result in queryset:
-            if hasattr(result.content_object, "quantity") and isinstance(
-                result.content_object, Harvest
-            ):
-                matching_interventions.append(result.object_id)
-        harvest_query = Harvest.objects.filter(pk__in=matching_interventions)
-        harvest_query = harvest_query.filter(quantity__lt=value)
-        harvest_matches = []
-        for harvest in harvest_query:
-            harvest_matches.append(harvest.id)
-        queryset = queryset.filter(object_id__in=harvest_matches)
-
-        return queryset
-
-    harvest_gt = filters.CharFilter(method="find_harvest_gt")
+    harvest_gt = filters.NumberFilter(method="find_harvest_gt")
 
     def find_harvest_gt(self, queryset, name, value):
         """Function to filter interventions and return those which are
         harvests with more than the given amount of honey harvested."""
+        return queryset.filter(self.content_condition(Harvest, quantity__gt=value))
+
+    syrup_lt = filters.NumberFilter(method="find_syrup_lt")
 
-        matching_interventions = []
-        for result in queryset:
-            if hasattr(result.content_object, "quantity") and isinstance(
-                result.content_object, Harvest
-            ):
-                matching_interventions.append(result.object_id)
-        harvest_query = Harvest.objects.filter(pk__in=matching_interventions)
-        harvest_query = harvest_query.filter(quantity__gt=value)
-        harvest_matches = []
-        for harvest in harvest_query:
-            harvest_matches.append(harvest.id)
-        queryset = queryset.filter(object_id__in=harvest_matches)
-
-        return queryset
+    def find_syrup_lt(self, queryset, name, value):
+        """Function to filter interventions and return those which are
+        syrup distributions with less than the given quantity of syrup."""
+        return queryset.filter(
+            self.content_condition(SyrupDistribution, quantity__lt=value)
+        )
+
+    syrup_gt = filters.NumberFilter(method="find_syrup_gt")
+
+    def find_syrup_gt(self, queryset, name, value):
+        """Function to filter interventions and return those which are
+        syrup distributions with more than the given quantity of syrup."""
+        return queryset.filter(
+            self.content_condition(SyrupDistribution, quantity__gt=value)
+        )
+
+    # Searches the treatment type, syrup type and child hive name at once
+    detail = filters.CharFilter(method="find_detail")
+
+    def find_detail(self, queryset, name, value):
+        """Function to filter interventions and return those whose details
+        (treatment type, syrup type or name of the child hive of an artificial
+        swarming) include the search term."""
+        return queryset.filter(
+            self.content_condition(Treatment, treatment_type__icontains=value)
+            | self.content_condition(SyrupDistribution, syrup_type__icontains=value)
+            | self.content_condition(Hive, name__icontains=value)
+        )
 
     class Meta:
         model = Intervention
@@ -0,0 +1,392 @@
+# Standard library imports
+import csv
+import datetime
+import io
+
+# Third-party imports
+import orjson
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, connections, router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Local imports
+from .caching import invalidate_beeyards_fragment, invalidate_stats
+from .models import (
+    BeeYard,
+    Contamination,
+    Harvest,
+    Hive,
+    Intervention,
+    SyrupDistribution,
+    Treatment,
+)
+from .rollup import rebuild_rollup
+from public_api.versions import BEEYARDS, HIVES, bump_versions
+
+# Rows parsed and written at a time
+IMPORT_BATCH_SIZE = 5000
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+
+
+class InvalidRow(ValueError):
+    """Raised when a row of the file can't be imported."""
+
+
+def read_rows(file, file_format):
+    """Function yielding the line number and each row of a CSV file with a
+    header line, or of a newline delimited JSON file, as they are read. CSV rows
+    are dicts, JSON rows are decoded by as_dict()."""
+    if file_format == CSV:
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(file, 1):
+        if line.strip():
+            yield line_number, line
+
+
+def as_dict(row):
+    """Function returning the dict of a row given by read_rows()."""
+    if isinstance(row, dict):
+        return row
+    try:
+        row = orjson.loads(row)
+    except orjson.JSONDecodeError as exc:
+        raise InvalidRow(f"invalid JSON, {exc}")
+    if not isinstance(row, dict):
+        raise InvalidRow("expected a JSON object")
+    return row
+
+
+def value_of(row, name, required=True):
+    """Function returning the value of a column, None if it is empty. Raises
+    InvalidRow if a required value is missing."""
+    value = row.get(name)
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ""):
+        if required:
+            raise InvalidRow(f"{name}: this value is required")
+        return None
+    return value
+
+
+def parse_choice(row, name, choices, required=True):
+    """Function returning the value of a column which must be one of the choices."""
+    value = value_of(row, name, required)
+    # JSON values may be numbers or lists, which aren't choices
+    if value is not None and (not isinstance(value, str) or value not in dict(choices)):
+        raise InvalidRow(f"{name}: {value!r} is not a valid choice")
+    return value
+
+
+def parse_number(row, name, number_type=float, required=True):
+    """Function returning the value of a numeric column."""
+    value = value_of(row, name, required)
+    if value is None:
+        return None
+    try:
+        return number_type(value)
+    except (TypeError, ValueError):
+        raise InvalidRow(f"{name}: {value!r} is not a valid number")
+
+
+def parse_id(row, name, allowed, required=True):
+    """Function returning the id in a column, which must be one of the allowed
+    ids, those of the beekeeper's objects."""
+    value = parse_number(row, name, int, required)
+    if value is not None and value not in allowed:
+        raise InvalidRow(f"{name}: {value} is not one of the beekeeper's")
+    return value
+
+
+def parse_moment(row, name):
+    """Function returning the date and time of a column as an aware datetime. A
+    date alone is taken as midnight and times without an offset are in the
+    current time zone. Empty values give the current time."""
+    value = value_of(row, name, required=False)
+    if value is None:
+        return timezone.now()
+    # JSON values may be numbers, such as 20200101, which aren't dates
+    if not isinstance(value, str):
+        raise InvalidRow(f"{name}: {value!r} is not a valid date")
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise InvalidRow(f"{name}: {value!r} is not a valid date")
+        moment = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_day(row, name):
+    """Function returning the date of a column, today if it is empty."""
+    value = value_of(row, name, required=False)
+    if value is None:
+        return timezone.localdate()
+    if not isinstance(value, str):
+        raise InvalidRow(f"{name}: {value!r} is not a valid date")
+    day = parse_date(value[:10])
+    if day is None:
+        raise InvalidRow(f"{name}: {value!r} is not a valid date")
+    return day
+
+
+def bulk_create_with_dates(model, objects, batch_size=1000):
+    """Function to insert objects like bulk_create but keeping their auto_now and
+    auto_now_add dates, which bulk_create replaces by the current date. They are
+    written back afterwards with bulk_update, which doesn't run pre_save, so
+    each batch takes one INSERT and one UPDATE. The ids of the objects are
+    set."""
+    db = router.db_for_write(model)
+    date_fields = [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    for first in range(0, len(objects), batch_size):
+        batch = objects[first : first + batch_size]
+        dates = [
+            [getattr(obj, field.attname) for field in date_fields] for obj in batch
+        ]
+        # No row is seen with the date of the insert
+        with transaction.atomic(using=db, savepoint=False):
+            model._base_manager.using(db).bulk_create(batch)
+            for obj, values in zip(batch, dates):
+                for field, value in zip(date_fields, values):
+                    # Objects without a date keep the one of the insert
+                    if value is not None:
+                        setattr(obj, field.attname, value)
+            model._base_manager.using(db).bulk_update(
+                batch, [field.name for field in date_fields]
+            )
+
+
+def copy_value(value):
+    """Function returning a value written in COPY's text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_objects(model, objects):
+    """Function to insert objects with PostgreSQL's COPY, which is several times
+    faster than INSERT for large batches. No pre_save is run so the dates of the
+    objects are kept. The ids of the objects aren't set."""
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    # The connection itself, going through django.db.connection for every value
+    # is slow
+    db = connections[router.db_for_write(model)]
+    buffer = io.StringIO()
+    for obj in objects:
+        values = [
+            field.get_db_prep_save(getattr(obj, field.attname), db) for field in fields
+        ]
+        buffer.write("\t".join(copy_value(value) for value in values) + "\n")
+    buffer.seek(0)
+    columns = ", ".join(db.ops.quote_name(field.column) for field in fields)
+    table = db.ops.quote_name(model._meta.db_table)
+    with db.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+
+def analyze(*models):
+    """Function to refresh PostgreSQL's statistics of the tables of the models
+    after a bulk load. Until the next autovacuum, or at all inside the loading
+    transaction, the planner would still expect the tables to be nearly empty
+    and pick plans which are very slow on what was loaded."""
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+
+class Importer:
+    """Base class of the imports of a type of rows for a beekeeper. parse()
+    turns a row into the object to insert, or raises InvalidRow, write() inserts
+    a batch of parsed objects and finish() is called once everything is written,
+    as the bulk inserts don't send the model signals."""
+
+    model = None
+
+    def __init__(self, owner, use_copy=False):
+        self.owner = owner
+        self.use_copy = use_copy
+
+    def parse(self, row):
+        """Function returning the object to insert for a row of the file."""
+        raise NotImplementedError("Importers must define parse()")
+
+    def write(self, objects):
+        """Function to insert the parsed objects, keeping their dates."""
+        if self.use_copy:
+            copy_objects(self.model, objects)
+        else:
+            bulk_create_with_dates(self.model, objects)
+
+    def finish(self):
+        """Function to update what depends on the imported rows."""
+        invalidate_stats(self.owner.id)
+
+
+class HiveImporter(Importer):
+    """Import of hives, columns: name, status, species, queen_year,
+    date_updated and beeyard, the id of one of the beekeeper's beeyards."""
+
+    model = Hive
+
+    def __init__(self, owner, use_copy=False):
+        super().__init__(owner, use_copy)
+        self.beeyard_ids = set(
+            BeeYard.objects.filter(beekeeper=owner).values_list("id", flat=True)
+        )
+
+    def parse(self, row):
+        queen_year = parse_number(row, "queen_year", int, required=False)
+        if queen_year is not None and not 2000 <= queen_year <= 2040:
+            raise InvalidRow(f"queen_year: {queen_year} is not between 2000 and 2040")
+        hive = Hive(
+            name=value_of(row, "name"),
+            status=parse_choice(row, "status", Hive.HIVE_STATUS),
+            species=parse_choice(row, "species", Hive.BEE_SPECIES),
+            date_updated=parse_day(row, "date_updated"),
+            beeyard_id=parse_id(row, "beeyard", self.beeyard_ids),
+            owner_id=self.owner.id,
+        )
+        if queen_year is not None:
+            hive.queen_year = queen_year
+        return hive
+
+    def finish(self):
+        super().finish()
+        invalidate_beeyards_fragment(self.owner.id)
+        bump_versions(BEEYARDS, HIVES)
+
+
+class ContaminationImporter(Importer):
+    """Import of contaminations, columns: date, type and hive, the id of one of
+    the beekeeper's hives."""
+
+    model = Contamination
+
+    def __init__(self, owner, use_copy=False):
+        super().__init__(owner, use_copy)
+        self.hive_ids = set(
+            Hive.objects.filter(owner=owner).values_list("id", flat=True)
+        )
+
+    def parse(self, row):
+        return Contamination(
+            type=parse_choice(row, "type", Contamination.CONTAMINATION_TYPES),
+            date=parse_day(row, "date"),
+            hive_id=parse_id(row, "hive", self.hive_ids),
+            owner_id=self.owner.id,
+        )
+
+
+class InterventionImporter(Importer):
+    """Import of interventions, columns: date, intervention_type and
+    hive_affected, the id of one of the beekeeper's hives, along with the
+    columns of the detail of the type of intervention: harvest_quantity,
+    syrup_type and syrup_quantity, treatment_type or child_hive. The detail
+    rows are created with one bulk insert per table and batch."""
+
+    model = Intervention
+
+    def __init__(self, owner, use_copy=False):
+        super().__init__(owner, use_copy)
+        self.hive_ids = set(
+            Hive.objects.filter(owner=owner).values_list("id", flat=True)
+        )
+        # Hives whose rollup is rebuilt at the end
+        self.imported_hive_ids = set()
+        self.treatments = {}
+
+    def parse(self, row):
+        intervention_type = parse_choice(
+            row, "intervention_type", Intervention.INTERVENTION_TYPES
+        )
+        intervention = Intervention(
+            intervention_type=intervention_type,
+            date=parse_moment(row, "date"),
+            hive_affected_id=parse_id(row, "hive_affected", self.hive_ids),
+            owner_id=self.owner.id,
+        )
+        # The content object is kept aside until it is written
+        if intervention_type == Intervention.HARVEST:
+            intervention.detail = Harvest(
+                quantity=parse_number(row, "harvest_quantity")
+            )
+        elif intervention_type == Intervention.SYRUP_DISTRIBUTION:
+            intervention.detail = SyrupDistribution(
+                syrup_type=parse_choice(
+                    row, "syrup_type", SyrupDistribution.SYRUP_TYPES
+                ),
+                quantity=parse_number(row, "syrup_quantity"),
+            )
+        elif intervention_type == Intervention.TREATMENT:
+            intervention.detail = parse_choice(
+                row, "treatment_type", Treatment.TREATMENTS
+            )
+        elif intervention_type == Intervention.ARTIFICIAL_SWARMING:
+            intervention.detail = parse_id(row, "child_hive", self.hive_ids)
+        else:
+            intervention.detail = None
+        return intervention
+
+    def write(self, objects):
+        for model in (Harvest, SyrupDistribution):
+            details = [
+                intervention.detail
+                for intervention in objects
+                if isinstance(intervention.detail, model)
+            ]
+            if details:
+                model.objects.bulk_create(details, batch_size=1000)
+        for intervention in objects:
+            detail = intervention.detail
+            if isinstance(detail, str):
+                # Treatment types are unique so interventions share their row
+                if detail not in self.treatments:
+                    self.treatments[detail] = Treatment.objects.get_or_create(
+                        treatment_type=detail
+                    )[0]
+                detail = self.treatments[detail]
+            if isinstance(detail, int):
+                intervention.content_type = ContentType.objects.get_for_model(Hive)
+                intervention.object_id = detail
+            elif detail is not None:
+                intervention.content_type = ContentType.objects.get_for_model(detail)
+                intervention.object_id = detail.id
+            self.imported_hive_ids.add(intervention.hive_affected_id)
+        super().write(objects)
+
+    def finish(self):
+        super().finish()
+        analyze(Intervention, Harvest, SyrupDistribution)
+        for progress in rebuild_rollup(
+            hives=Hive.objects.filter(id__in=self.imported_hive_ids)
+        ):
+            pass
+
+
+# Importer of each type of rows
+IMPORTERS = {
+    "hives": HiveImporter,
+    "interventions": InterventionImporter,
+    "contaminations": ContaminationImporter,
+}
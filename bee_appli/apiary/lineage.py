@@ -0,0 +1,101 @@
+# Third-party imports
+from django.contrib.contenttypes.models import ContentType
+
+# Local imports
+from .models import Hive, Intervention
+
+# Generations walked at most in each direction. Lineages are far shorter, the
+# limit only stops the walk if bad data links a hive to its own ancestor.
+MAX_LINEAGE_DEPTH = 1000
+
+ANCESTOR = "ancestor"
+DESCENDANT = "descendant"
+
+
+def lineage_query():
+    """Function returning the SQL of a hive's lineage. An artificial swarming
+    intervention links the hive affected, the parent, to the hive in its content
+    object, the child. The links are followed both ways by recursive CTEs, which
+    PostgreSQL and SQLite both support, so the whole lineage is one query
+    whatever its depth. Each step starts from the hives already reached, the
+    ancestors through the index on the content object and the descendants
+    through the one on the hive affected, so only the swarmings of the lineage
+    are read. There is a row per link, for the hive at its far end."""
+    hive = Hive._meta
+    intervention = Intervention._meta
+    hive_affected = intervention.get_field("hive_affected").column
+    owner = hive.get_field("owner").column
+    swarming = "i.intervention_type = %s AND i.content_type_id = %s"
+    return f"""
+        WITH RECURSIVE ancestors (hive_id, linked_id, generation) AS (
+            SELECT i.{hive_affected}, i.object_id, 1
+            FROM {intervention.db_table} i
+            WHERE i.object_id = %s AND {swarming}
+            UNION
+            SELECT i.{hive_affected}, i.object_id, a.generation + 1
+            FROM ancestors a JOIN {intervention.db_table} i
+                ON i.object_id = a.hive_id AND {swarming}
+            WHERE a.generation < %s
+        ),
+        descendants (hive_id, linked_id, generation) AS (
+            SELECT i.object_id, i.{hive_affected}, 1
+            FROM {intervention.db_table} i
+            WHERE i.{hive_affected} = %s AND {swarming} AND i.object_id IS NOT NULL
+            UNION
+            SELECT i.object_id, i.{hive_affected}, d.generation + 1
+            FROM descendants d JOIN {intervention.db_table} i
+                ON i.{hive_affected} = d.hive_id AND {swarming}
+            WHERE d.generation < %s AND i.object_id IS NOT NULL
+        ),
+        lineage (relation, hive_id, linked_id, generation) AS (
+            SELECT '{ANCESTOR}', hive_id, linked_id, generation FROM ancestors
+            UNION ALL
+            SELECT '{DESCENDANT}', hive_id, linked_id, generation FROM descendants
+        )
+        SELECT h.*, l.relation, l.linked_id, l.generation
+        FROM lineage l JOIN {hive.db_table} h ON h.id = l.hive_id
+        WHERE h.{owner} = %s
+        ORDER BY l.relation, l.generation, h.id
+    """
+
+
+def get_lineage(hive_id, owner_id, max_depth=MAX_LINEAGE_DEPTH):
+    """Function returning the ancestors and descendants of a hive, each hive
+    with the generation it is first reached at, and the (parent, child) links
+    between them. Only the hives of the owner are returned, but the links are
+    followed through the hives of other beekeepers."""
+    # Cached by Django after the first request, so it costs no query
+    swarming = [
+        Intervention.ARTIFICIAL_SWARMING,
+        ContentType.objects.get_for_model(Hive).id,
+    ]
+    rows = Hive.objects.raw(
+        lineage_query(),
+        [
+            hive_id,
+            *swarming,
+            *swarming,
+            max_depth,
+            hive_id,
+            *swarming,
+            *swarming,
+            max_depth,
+            owner_id,
+        ],
+    )
+    lineage = {ANCESTOR: {}, DESCENDANT: {}}
+    links = set()
+    for row in rows:
+        # Rows come by generation, so the first one of a hive is the closest
+        lineage[row.relation].setdefault(row.id, row)
+        if row.relation == ANCESTOR:
+            links.add((row.id, row.linked_id))
+        else:
+            links.add((row.linked_id, row.id))
+    # Links to the hives of other beekeepers aren't shown
+    shown = {hive_id, *lineage[ANCESTOR], *lineage[DESCENDANT]}
+    return (
+        list(lineage[ANCESTOR].values()),
+        list(lineage[DESCENDANT].values()),
+        sorted(link for link in links if shown.issuperset(link)),
+    )
@@ -0,0 +1,318 @@
+# Standard library imports
+import asyncio
+import random
+import re
+import ssl
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+# Third-party imports
+import orjson
+from django.urls import reverse
+
+# Local imports
+from .apibench import percentile
+
+# Scenarios, each made of a few requests
+LOGIN = "login"
+DASHBOARD = "dashboard"
+SYNC = "intervention sync"
+SEARCH = "public search"
+SCENARIOS = (LOGIN, DASHBOARD, SYNC, SEARCH)
+
+# How often a logged in beekeeper picks each scenario. Scrapers only search.
+KEEPER_WEIGHTS = {LOGIN: 1, DASHBOARD: 6, SYNC: 3}
+
+CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class Response:
+    """Class holding the status, headers and body of an HTTP response."""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+def dechunk(body):
+    """Function returning the body of a response sent with chunked encoding."""
+    data = b""
+    while body:
+        size_line, body = body.split(b"\r\n", 1)
+        size = int(size_line.split(b";")[0], 16)
+        if size == 0:
+            break
+        data += body[:size]
+        body = body[size + 2 :]
+    return data
+
+
+def parse_response(data):
+    """Function returning the Response read from a connection closed by the
+    server. The headers are (lowercase name, value) pairs as Set-Cookie can be
+    repeated. Raises ValueError if the response is cut short."""
+    head, separator, body = data.partition(b"\r\n\r\n")
+    if not separator:
+        raise ValueError("incomplete response")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = []
+    for line in lines[1:]:
+        name, value = line.split(":", 1)
+        headers.append((name.strip().lower(), value.strip()))
+    if ("transfer-encoding", "chunked") in headers:
+        body = dechunk(body)
+    return Response(status, headers, body)
+
+
+class HTTPClient:
+    """Class sending requests to the server like the browser or script of one
+    user, keeping the cookies it is given. It only needs asyncio streams, so no
+    package or network access is required. Each request opens its own
+    connection, which the server closes once it has answered."""
+
+    def __init__(self, url, timeout=10):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.netloc = parts.netloc
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.timeout = timeout
+        self.cookies = {}
+
+    async def request(self, method, path, body=b"", headers=None):
+        """Function sending a request and returning its Response."""
+        return await asyncio.wait_for(
+            self.send(method, path, body, headers or {}), self.timeout
+        )
+
+    async def send(self, method, path, body, headers):
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl
+        )
+        try:
+            lines = [
+                f"{method} {path} HTTP/1.1",
+                f"Host: {self.netloc}",
+                "Connection: close",
+                f"Content-Length: {len(body)}",
+            ]
+            if self.cookies:
+                cookies = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+                lines.append(f"Cookie: {cookies}")
+            lines += [f"{name}: {value}" for name, value in headers.items()]
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+            response = parse_response(await reader.read())
+        finally:
+            writer.close()
+        for name, value in response.headers:
+            if name == "set-cookie":
+                cookie, _, value = value.split(";", 1)[0].partition("=")
+                self.cookies[cookie.strip()] = value.strip()
+        return response
+
+
+class Recorder:
+    """Class recording the duration and the outcome of every request, by
+    scenario. A request fails if it can't be sent, times out or gets an error
+    status, or a status other than the expected ones when they are given."""
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.errors = Counter()
+
+    async def send(
+        self, scenario, client, method, path, body=b"", headers=None, expect=None
+    ):
+        """Function sending a request for a scenario, returning its Response or
+        None if it couldn't be sent."""
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, body, headers)
+        except (OSError, ValueError, asyncio.TimeoutError):
+            response = None
+        self.durations[scenario].append((time.perf_counter() - start) * 1000)
+        if response is None or (
+            response.status not in expect if expect else response.status >= 400
+        ):
+            self.errors[scenario] += 1
+        return response
+
+    def report(self, elapsed):
+        """Function returning a row of results per scenario: the number of
+        requests, the requests per second, the error rate in percent and the
+        p50, p95, p99 and maximum latencies in milliseconds."""
+        rows = []
+        for scenario in SCENARIOS:
+            durations = self.durations.get(scenario)
+            if not durations:
+                continue
+            rows.append(
+                {
+                    "scenario": scenario,
+                    "requests": len(durations),
+                    "per_second": len(durations) / elapsed,
+                    "error_rate": 100 * self.errors[scenario] / len(durations),
+                    "p50_ms": percentile(durations, 0.5),
+                    "p95_ms": percentile(durations, 0.95),
+                    "p99_ms": percentile(durations, 0.99),
+                    "max_ms": max(durations),
+                }
+            )
+        return rows
+
+
+def api_headers(client):
+    """Function returning the headers of a JSON request of the private API,
+    whose session authentication checks the CSRF token of unsafe methods."""
+    return {
+        "Content-Type": "application/json",
+        "X-CSRFToken": client.cookies.get("csrftoken", ""),
+    }
+
+
+async def login(recorder, client, keeper):
+    """Scenario of a beekeeper loading the login page and sending the form.
+    Returns whether they are logged in."""
+    client.cookies.clear()
+    path = reverse("login")
+    response = await recorder.send(LOGIN, client, "GET", path)
+    match = response and CSRF_INPUT.search(response.body)
+    if not match:
+        return False
+    form = {
+        "csrfmiddlewaretoken": match.group(1).decode(),
+        "username": keeper["username"],
+        "password": keeper["password"],
+    }
+    # A successful login redirects, a failed one shows the form again
+    response = await recorder.send(
+        LOGIN,
+        client,
+        "POST",
+        path,
+        urlencode(form).encode(),
+        {"Content-Type": "application/x-www-form-urlencoded"},
+        expect=(302,),
+    )
+    return response is not None and response.status == 302
+
+
+async def dashboard(recorder, client, keeper, rng):
+    """Scenario of a beekeeper looking at their beeyards, the timeline of one
+    hive and the statistics of the beeyard."""
+    hive_id = rng.choice(keeper["hive_ids"])
+    await recorder.send(DASHBOARD, client, "GET", reverse("show_beeyards"))
+    await recorder.send(
+        DASHBOARD, client, "GET", f"/apiary/interventions/?hive={hive_id}"
+    )
+    await recorder.send(
+        DASHBOARD,
+        client,
+        "GET",
+        reverse("apiary:beeyards-stats", kwargs={"pk": keeper["beeyard_id"]}),
+    )
+
+
+async def sync(recorder, client, keeper, rng, batch_size):
+    """Scenario of the app of a beekeeper sending the interventions logged
+    offline as one batch, then a health check of a whole beeyard, which both
+    write to the rollup of the same hives, and reading the interventions back."""
+    interventions = [
+        {
+            "intervention_type": "health_check",
+            "hive_affected": rng.choice(keeper["hive_ids"]),
+        }
+        for i in range(batch_size)
+    ]
+    await recorder.send(
+        SYNC,
+        client,
+        "POST",
+        reverse("apiary:interventions-list"),
+        orjson.dumps(interventions),
+        api_headers(client),
+    )
+    await recorder.send(
+        SYNC,
+        client,
+        "POST",
+        reverse(
+            "apiary:beeyards-health-check-all-hives",
+            kwargs={"pk": keeper["beeyard_id"]},
+        ),
+        headers=api_headers(client),
+    )
+    await recorder.send(SYNC, client, "GET", reverse("apiary:interventions-list"))
+
+
+async def search(recorder, client, names, rng):
+    """Scenario of an anonymous visitor or scraper searching the public API for
+    a beekeeper and their beeyards and hives."""
+    name = rng.choice(names)
+    for path in (
+        f"{reverse('public_api:beekeepers-list')}?last_name={name}",
+        f"{reverse('public_api:beeyards-list')}?beekeeper={name}",
+        f"{reverse('public_api:hives-list')}?beeyard__beekeeper={name}",
+    ):
+        await recorder.send(SEARCH, client, "GET", path)
+
+
+async def think(rng, think_time):
+    """Function waiting for a random time averaging think_time seconds between
+    two scenarios of a simulated user."""
+    if think_time:
+        await asyncio.sleep(rng.expovariate(1 / think_time))
+
+
+async def run_beekeeper(recorder, url, keeper, rng, deadline, options):
+    """Function simulating a beekeeper until the deadline. They all log in when
+    the load starts, then pick scenarios at random, logging in again now and
+    then."""
+    client = HTTPClient(url, options["timeout"])
+    logged_in = await login(recorder, client, keeper)
+    scenarios = list(KEEPER_WEIGHTS)
+    weights = list(KEEPER_WEIGHTS.values())
+    while time.monotonic() < deadline:
+        await think(rng, options["think_time"])
+        scenario = rng.choices(scenarios, weights)[0]
+        if scenario == LOGIN or not logged_in:
+            logged_in = await login(recorder, client, keeper)
+        elif scenario == DASHBOARD:
+            await dashboard(recorder, client, keeper, rng)
+        else:
+            await sync(recorder, client, keeper, rng, options["batch_size"])
+
+
+async def run_scraper(recorder, url, names, rng, deadline, options):
+    """Function simulating an anonymous scraper of the public API until the
+    deadline."""
+    client = HTTPClient(url, options["timeout"])
+    while time.monotonic() < deadline:
+        await search(recorder, client, names, rng)
+        await think(rng, options["think_time"])
+
+
+async def generate_load(url, keepers, names, scrapers, duration, seed, **options):
+    """Function running the simulated beekeepers, given as dicts with their
+    username, password, beeyard_id and hive_ids, and `scrapers` anonymous
+    scrapers searching for the names against the server for `duration`
+    seconds. Every simulated user draws from its own generator, seeded from
+    `seed`. Returns the Recorder and the time taken in seconds."""
+    recorder = Recorder()
+    start = time.monotonic()
+    deadline = start + duration
+    rngs = [random.Random(seed + i) for i in range(len(keepers) + scrapers)]
+    tasks = [
+        run_beekeeper(recorder, url, keeper, rngs.pop(), deadline, options)
+        for keeper in keepers
+    ]
+    tasks += [
+        run_scraper(recorder, url, names, rngs.pop(), deadline, options)
+        for i in range(scrapers)
+    ]
+    await asyncio.gather(*tasks)
+    return recorder, time.monotonic() - start
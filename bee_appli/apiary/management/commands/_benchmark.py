@@ -0,0 +1,86 @@
+# Standard library imports
+import tempfile
+import time
+
+# Third-party imports
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+# Local imports
+from apiary.dataset import DatasetGenerator
+from apiary.models import Hive
+from apiary.rollup import rebuild_rollup
+
+
+class Rollback(Exception):
+    """Raised to undo everything a benchmark wrote to the database."""
+
+
+class BenchmarkCommand(BaseCommand):
+    """Base class for the benchmark commands. The benchmark runs with DEBUG
+    turned off (so neither the debug toolbar nor query logging skew the results)
+    inside a transaction which is rolled back at the end, leaving the database
+    as it was. The public API responses are cached in a temporary directory
+    removed at the end, as entries built from rolled back rows would otherwise
+    be served by the application once the collection versions catch up."""
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            caches = {
+                **settings.CACHES,
+                "public_api": {**settings.CACHES["public_api"], "LOCATION": cache_dir},
+            }
+            with override_settings(DEBUG=False, CACHES=caches):
+                try:
+                    with transaction.atomic():
+                        self.run_benchmark(*args, **options)
+                        raise Rollback
+                except Rollback:
+                    pass
+
+    def run_benchmark(self, *args, **options):
+        raise NotImplementedError("Benchmark commands must define run_benchmark()")
+
+    def make_keeper(self, username="benchmark_keeper"):
+        """Function to create the beekeeper the benchmark data belongs to."""
+        return User.objects.create_user(username=username, password="Bench4ever!")
+
+    def make_client(self, user=None):
+        """Function to make a test client, connected as the user if one is given."""
+        # The host must be one of the ALLOWED_HOSTS
+        client = Client(SERVER_NAME="localhost")
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def time_calls(self, function, repeat):
+        """Function to call the function `repeat` times and return the total time
+        in seconds along with the result of the last call."""
+        start = time.perf_counter()
+        for i in range(repeat):
+            result = function()
+        return time.perf_counter() - start, result
+
+    def seed_dataset(self, keepers, yards, hives, interventions, contaminations=1):
+        """Function to insert `keepers` beekeepers, each with `yards` beeyards of
+        `hives` hives. Every hive gets `interventions` interventions, of every
+        type and following the season as in filltestdb, and `contaminations`
+        contaminations. The dataset is always the same. Returns the list of
+        beekeepers."""
+        generator = DatasetGenerator(
+            yards_per_keeper=yards,
+            hives_per_yard=hives,
+            interventions_per_hive=interventions,
+            contaminations_per_hive=contaminations,
+            exact=True,
+            username_prefix="benchmark_",
+        )
+        users = generator.fill_keepers(range(keepers))
+        # Bulk inserts don't send the signals keeping the rollup up to date
+        for progress in rebuild_rollup(hives=Hive.objects.filter(owner__in=users)):
+            pass
+        return users
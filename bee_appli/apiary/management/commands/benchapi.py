@@ -0,0 +1,176 @@
+# Standard library imports
+import json
+
+# Third-party imports
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+
+# Local imports
+from apiary.apibench import (
+    BASELINE_PATH,
+    check_budgets,
+    collect_routes,
+    measure,
+    send,
+)
+from apiary.models import BeeYard, Contamination, Hive, Intervention
+from public_api.models import PublicContact
+from public_api.search import rebuild_search_index
+from public_api.versions import BEEKEEPERS, BEEYARDS, HIVES, bump_versions
+from ._benchmark import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measures the latency, SQL queries and peak memory of every route of the "
+        "private and public APIs and of the template views, and compares them to "
+        "the budgets of a baseline file"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keepers", type=int, default=2, help="Beekeepers")
+        parser.add_argument(
+            "--yards", type=int, default=2, help="Beeyards per beekeeper"
+        )
+        parser.add_argument("--hives", type=int, default=10, help="Hives per beeyard")
+        parser.add_argument(
+            "--interventions", type=int, default=20, help="Interventions per hive"
+        )
+        parser.add_argument(
+            "--contaminations", type=int, default=2, help="Contaminations per hive"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed requests per route"
+        )
+        parser.add_argument(
+            "--baseline", default=str(BASELINE_PATH), help="Path of the baseline file"
+        )
+        parser.add_argument(
+            "--write-baseline",
+            action="store_true",
+            help="Write the results to the baseline file instead of checking them",
+        )
+        parser.add_argument(
+            "--latency-tolerance",
+            type=float,
+            default=3.0,
+            help="Factor the p95 latency of a route may grow by",
+        )
+        parser.add_argument(
+            "--memory-tolerance",
+            type=float,
+            default=1.5,
+            help="Factor the peak memory of a route may grow by",
+        )
+        parser.add_argument(
+            "--queries-only",
+            action="store_true",
+            help="Only check the query counts, which don't depend on the machine",
+        )
+
+    def run_benchmark(self, *args, **options):
+        dataset = {
+            key: options[key]
+            for key in ("keepers", "yards", "hives", "interventions", "contaminations")
+        }
+        baseline = None
+        if not options["write_baseline"]:
+            try:
+                with open(options["baseline"]) as file:
+                    baseline = json.load(file)
+            except FileNotFoundError:
+                raise CommandError(
+                    f"No baseline at {options['baseline']}, create it with "
+                    "--write-baseline"
+                )
+            # The budgets only hold for the dataset they were measured on
+            if baseline["dataset"] != dataset:
+                raise CommandError(
+                    f"The baseline was measured on {baseline['dataset']}, run the "
+                    "benchmark with the same dataset options"
+                )
+
+        keepers = self.seed_dataset(**dataset)
+        keeper = keepers[0]
+        self.make_public(keepers)
+        beeyard = BeeYard.objects.filter(beekeeper=keeper).earliest("id")
+        hive = Hive.objects.filter(owner=keeper).earliest("id")
+        contact = PublicContact.objects.get(public_beekeeper_info=keeper)
+        ids = {
+            "apiary": {
+                "beeyards": beeyard.id,
+                "hives": hive.id,
+                "interventions": Intervention.objects.filter(owner=keeper)
+                .earliest("id")
+                .id,
+                "contaminations": Contamination.objects.filter(owner=keeper)
+                .earliest("id")
+                .id,
+            },
+            "public_api": {
+                "beeyards": beeyard.id,
+                "hives": hive.id,
+                "beekeepers": contact.id,
+            },
+        }
+        routes = collect_routes(ids, keeper.last_name)
+        clients = {True: self.make_client(keeper), False: self.make_client()}
+
+        # One request per route first, so the caches of the process (content
+        # types, templates, URL resolvers) are filled before anything is counted
+        for route in routes:
+            send(clients[route.private], route)
+
+        self.stdout.write(
+            f"{'route':<52}{'status':>7}{'cold q':>7}{'queries':>8}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'peak KB':>10}"
+        )
+        results = {}
+        for route in routes:
+            result = measure(clients[route.private], route, options["repeat"])
+            results[route.name] = result
+            self.stdout.write(
+                f"{route.name:<52}{result['status']:>7}{result['cold_queries']:>7}"
+                f"{result['queries']:>8}{result['p50_ms']:>9.2f}"
+                f"{result['p95_ms']:>9.2f}{result['peak_kb']:>10.1f}"
+            )
+        failed = [name for name, result in results.items() if result["status"] >= 400]
+        if failed:
+            raise CommandError(f"Requests failed: {', '.join(failed)}")
+
+        if options["write_baseline"]:
+            with open(options["baseline"], "w") as file:
+                json.dump({"dataset": dataset, "routes": results}, file, indent=2)
+                file.write("\n")
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+
+        for name in sorted(set(results) - set(baseline["routes"])):
+            self.stdout.write(f"No budget for {name}")
+        violations = check_budgets(
+            results,
+            baseline,
+            options["latency_tolerance"],
+            options["memory_tolerance"],
+            options["queries_only"],
+        )
+        if violations:
+            raise CommandError("Budgets exceeded:\n" + "\n".join(violations))
+        self.stdout.write(self.style.SUCCESS("All routes are within their budgets"))
+
+    def make_public(self, keepers):
+        """Function to name the beekeepers and make their contact public, so the
+        public routes and the search have something to show."""
+        for i, keeper in enumerate(keepers):
+            keeper.first_name = "Bench"
+            keeper.last_name = f"Keeper{i}"
+        User.objects.bulk_update(keepers, ["first_name", "last_name"])
+        # Some of the generated beekeepers already share it
+        PublicContact.objects.bulk_create(
+            (PublicContact(public_beekeeper_info=keeper) for keeper in keepers),
+            ignore_conflicts=True,
+        )
+        # Bulk writes don't send the signals indexing the names and raising
+        # the versions of the public collections
+        rebuild_search_index()
+        bump_versions(BEEYARDS, HIVES, BEEKEEPERS)
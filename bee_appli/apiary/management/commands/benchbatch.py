@@ -0,0 +1,91 @@
+# Standard library imports
+import json
+
+# Third-party imports
+from django.core.management.base import CommandError
+
+# Local imports
+from apiary.models import BeeYard, Hive
+from ._benchmark import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    help = "Measures the throughput of the batch create and update of interventions and hives"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1, 100, 10000],
+            help="Number of items per request",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Requests sent for each size"
+        )
+
+    def run_benchmark(self, *args, **options):
+        keeper = self.make_keeper()
+        client = self.make_client(keeper)
+        beeyard = BeeYard.objects.create(name="Benchmark", beekeeper=keeper)
+        hives = Hive.objects.bulk_create(
+            Hive(
+                status="active",
+                species="black_bee",
+                beeyard=beeyard,
+                owner=keeper,
+                queen_year=2022,
+                name="Hive_" + str(i),
+            )
+            for i in range(100)
+        )
+
+        self.stdout.write(
+            f"{'request':<28}{'items':>8}{'requests/s':>14}{'items/s':>14}"
+        )
+        for size in options["sizes"]:
+            interventions = [
+                {
+                    "intervention_type": "health_check",
+                    "hive_affected": hives[i % len(hives)].id,
+                }
+                for i in range(size)
+            ]
+            self.run_request(
+                client, "post", "/interventions/", interventions, size, options
+            )
+
+            new_hives = [
+                {
+                    "name": "New_" + str(i),
+                    "status": "pending",
+                    "species": "italian_bee",
+                    "beeyard": beeyard.id,
+                }
+                for i in range(size)
+            ]
+            self.run_request(client, "post", "/hives/", new_hives, size, options)
+
+            updates = [
+                {"id": hives[i % len(hives)].id, "status": "active"}
+                for i in range(size)
+            ]
+            self.run_request(client, "patch", "/hives/", updates, size, options)
+
+    def run_request(self, client, method, url, items, size, options):
+        """Function to send the same batch several times and print its throughput."""
+        body = json.dumps(items)
+        send = getattr(client, method)
+        elapsed, response = self.time_calls(
+            lambda: send(url, body, content_type="application/json"),
+            options["repeat"],
+        )
+        if response.status_code not in (200, 201):
+            raise CommandError(
+                f"{method.upper()} {url} answered {response.status_code}"
+            )
+        requests_per_second = options["repeat"] / elapsed
+        self.stdout.write(
+            f"{method.upper() + ' ' + url:<28}{size:>8}"
+            f"{requests_per_second:>14.2f}{requests_per_second * size:>14.0f}"
+        )
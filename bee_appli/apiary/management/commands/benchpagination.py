@@ -0,0 +1,69 @@
+# Standard library imports
+from urllib.parse import quote
+
+# Third-party imports
+from django.core.management.base import CommandError
+from django.db import connection
+
+# Local imports
+from apiary.models import Contamination, Intervention
+from apiary.pagination import KeysetPagination, encode_cursor
+from apiary.utils import CountQueries
+from ._benchmark import BenchmarkCommand
+
+# Lists compared, with the ordering of their cursor pages
+ROUTES = [
+    ("/interventions/", Intervention, ("-date", "-id")),
+    ("/contaminations/", Contamination, ("-date", "-id")),
+]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Compares the time taken to read a deep page of the private lists with "
+        "page numbers and with a cursor"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page", type=int, default=5000, help="Deep page compared to page 1"
+        )
+        parser.add_argument("--hives", type=int, default=50, help="Hives of the keeper")
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per page")
+
+    def run_benchmark(self, *args, **options):
+        page_size = KeysetPagination.page_size
+        # Enough rows of each list for the deep page to exist
+        per_hive = -(-options["page"] * page_size // options["hives"])
+        self.stdout.write(
+            f"Seeding {per_hive * options['hives']} interventions and contaminations..."
+        )
+        keeper = self.seed_dataset(1, 1, options["hives"], per_hive, per_hive)[0]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        client = self.make_client(keeper)
+
+        self.stdout.write(f"{'url':<48}{'ms/request':>12}{'queries':>9}")
+        for url, model, ordering in ROUTES:
+            queryset = model.objects.filter(owner=keeper).order_by(*ordering)
+            # The cursor of a page holds the last row of the page before it
+            last = queryset[(options["page"] - 1) * page_size - 1]
+            cursor = encode_cursor(
+                [getattr(last, name.lstrip("-")) for name in ordering]
+            )
+            self.measure(client, f"{url}?page=1", options)
+            self.measure(client, f"{url}?page={options['page']}", options)
+            self.measure(client, f"{url}?cursor=", options)
+            self.measure(client, f"{url}?cursor={quote(cursor)}", options)
+
+    def measure(self, client, url, options):
+        """Function to time the requests to a page and print the result."""
+        with CountQueries() as queries:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} answered {response.status_code}")
+        elapsed, response = self.time_calls(lambda: client.get(url), options["repeat"])
+        label = url if len(url) <= 46 else url[:43] + "..."
+        self.stdout.write(
+            f"{label:<48}{elapsed / options['repeat'] * 1000:>12.1f}{queries.count:>9}"
+        )
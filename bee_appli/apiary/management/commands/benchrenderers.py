@@ -0,0 +1,72 @@
+# Standard library imports
+import gzip
+import json
+from collections import OrderedDict
+
+# Third-party imports
+import msgpack
+import orjson
+from django.core.management.base import CommandError
+from rest_framework.renderers import JSONRenderer
+
+# Local imports
+from apiary.models import Intervention
+from apiary.renderers import MessagePackRenderer, ORJSONRenderer
+from apiary.serializers import InterventionSerializer
+from ._benchmark import BenchmarkCommand
+
+# Formats compared, with the function reading them back as a client would
+FORMATS = [
+    ("json (stdlib)", JSONRenderer(), json.loads),
+    ("json (orjson)", ORJSONRenderer(), orjson.loads),
+    ("msgpack", MessagePackRenderer(), msgpack.unpackb),
+]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Compares the size and the encode and decode times of a large page of "
+        "interventions in JSON and MessagePack"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Rows of the page")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per format")
+
+    def run_benchmark(self, *args, **options):
+        # One hundred interventions of every type per hive
+        hives = -(-options["rows"] // 100)
+        keeper = self.seed_dataset(1, 1, hives, 100, 0)[0]
+        interventions = Intervention.objects.filter(owner=keeper).prefetch_related(
+            "content_object"
+        )[: options["rows"]]
+        # Laid out like a page of the API
+        data = OrderedDict(
+            [
+                ("count", len(interventions)),
+                ("next", "http://localhost/interventions/?page=2"),
+                ("previous", None),
+                ("results", InterventionSerializer(interventions, many=True).data),
+            ]
+        )
+        expected = json.loads(JSONRenderer().render(data))
+
+        self.stdout.write(f"Page of {len(interventions)} interventions")
+        self.stdout.write(
+            f"{'format':<16}{'bytes':>10}{'gzip bytes':>12}"
+            f"{'encode ms':>11}{'decode ms':>11}"
+        )
+        for name, renderer, decode in FORMATS:
+            encode_time, content = self.time_calls(
+                lambda: renderer.render(data, renderer.media_type), options["repeat"]
+            )
+            decode_time, decoded = self.time_calls(
+                lambda: decode(content), options["repeat"]
+            )
+            if decoded != expected:
+                raise CommandError(f"The {name} page doesn't read back the same")
+            self.stdout.write(
+                f"{name:<16}{len(content):>10}{len(gzip.compress(content)):>12}"
+                f"{encode_time / options['repeat'] * 1000:>11.1f}"
+                f"{decode_time / options['repeat'] * 1000:>11.1f}"
+            )
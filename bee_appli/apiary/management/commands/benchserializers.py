@@ -0,0 +1,72 @@
+# Third-party imports
+from django.core.management.base import CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+# Local imports
+from apiary import views
+from apiary.fastpath import get_plan
+from public_api import views as public_views
+from ._benchmark import BenchmarkCommand
+
+# Lists compared, with whether they are read as the first beekeeper
+ROUTES = [
+    ("/hives/", views.HiveViewSet, True),
+    ("/interventions/", views.InterventionViewSet, True),
+    ("/contaminations/", views.ContaminationViewSet, True),
+    ("/public_api/hives/", public_views.HiveViewSet, False),
+    ("/public_api/beeyards/", public_views.BeeYardViewSet, False),
+    ("/public_api/beekeepers/", public_views.BeekeeperViewSet, False),
+]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Compares the rows per second turned into data by the serializers and by "
+        "the fast path of the list routes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keepers", type=int, default=20)
+        parser.add_argument("--hives", type=int, default=50, help="Hives per beeyard")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per list")
+
+    def run_benchmark(self, *args, **options):
+        keepers = self.seed_dataset(options["keepers"], 2, options["hives"], 4, 2)
+        self.stdout.write(
+            f"{'url':<26}{'rows':>8}{'serializer rows/s':>19}"
+            f"{'fast rows/s':>13}{'speedup':>9}"
+        )
+        for url, viewset, private in ROUTES:
+            view = self.make_view(viewset, url, keepers[0] if private else None)
+            queryset = view.filter_queryset(view.get_queryset())
+            serializer_class = view.get_serializer_class()
+            plan = get_plan(view.get_serializer())
+            if plan is None:
+                raise CommandError(f"{url} can't use the fast path")
+
+            def slow():
+                return serializer_class(queryset.all(), many=True).data
+
+            def fast():
+                rows = list(queryset.prefetch_related(None).values_list(*plan.columns))
+                return plan.serialize(rows)
+
+            slow_time, expected = self.time_calls(slow, options["repeat"])
+            fast_time, data = self.time_calls(fast, options["repeat"])
+            if data != expected:
+                raise CommandError(f"The fast path of {url} returns other data")
+            rows = len(data) * options["repeat"]
+            self.stdout.write(
+                f"{url:<26}{len(data):>8}{rows / slow_time:>19.0f}"
+                f"{rows / fast_time:>13.0f}{slow_time / fast_time:>8.1f}x"
+            )
+
+    def make_view(self, viewset, url, user):
+        """Function to set up a viewset as it is for a GET request to its list."""
+        request = Request(APIRequestFactory().get(url))
+        if user is not None:
+            request.user = user
+        view = viewset(action="list", request=request, format_kwarg=None)
+        view.args, view.kwargs = (), {}
+        return view
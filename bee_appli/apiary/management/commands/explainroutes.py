@@ -0,0 +1,127 @@
+# Standard library imports
+import re
+
+# Third-party imports
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Local imports
+from apiary.models import BeeYard, Contamination, Hive, Intervention
+from apiary.urls import router
+from ._benchmark import BenchmarkCommand
+
+# How each model of the private API is linked to its beekeeper
+OWNER_LOOKUPS = {
+    BeeYard: "beekeeper",
+    Hive: "owner",
+    Intervention: "owner",
+    Contamination: "owner",
+}
+
+# Lines of a query plan showing a table being read in full, for PostgreSQL
+# and SQLite
+SEQ_SCAN_PATTERNS = [
+    re.compile(r"Seq Scan on (\w+)"),
+    re.compile(r"^SCAN (\w+)$"),
+]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Seeds a large dataset, runs EXPLAIN on the queries behind each route of "
+        "the private API and flags the sequential scans"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keepers", type=int, default=100)
+        parser.add_argument("--yards", type=int, default=4, help="Beeyards per keeper")
+        parser.add_argument("--hives", type=int, default=10, help="Hives per beeyard")
+        parser.add_argument(
+            "--interventions", type=int, default=20, help="Interventions per hive"
+        )
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=1000,
+            help="Sequential scans of smaller tables are expected and not flagged",
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error if a sequential scan is found",
+        )
+
+    def run_benchmark(self, *args, **options):
+        keepers = self.seed_dataset(
+            options["keepers"],
+            options["yards"],
+            options["hives"],
+            options["interventions"],
+        )
+        # Refresh the planner statistics so the plans match a real database
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        self.table_sizes = {}
+        keeper = keepers[len(keepers) // 2]
+        client = self.make_client(keeper)
+        flagged = 0
+        for url in self.get_urls(keeper):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} answered {response.status_code}")
+            scans = []
+            for query in queries:
+                for table in self.find_seq_scans(query["sql"]):
+                    if self.count_rows(table) >= options["min_rows"]:
+                        scans.append((table, query["sql"]))
+            self.stdout.write(
+                f"GET {url}: {len(queries)} queries, {len(scans)} sequential scans"
+            )
+            for table, sql in scans:
+                self.stdout.write(
+                    self.style.WARNING(f"    Seq Scan on {table}: {sql[:150]}")
+                )
+            flagged += len(scans)
+
+        if flagged and options["fail"]:
+            raise CommandError(f"{flagged} sequential scans found")
+
+    def get_urls(self, keeper):
+        """Function to list the GET routes of the private API and the template
+        views, using objects of the beekeeper for the detail routes."""
+        urls = []
+        for prefix, viewset, basename in router.registry:
+            model = viewset.queryset.model
+            obj = model.objects.filter(**{OWNER_LOOKUPS[model]: keeper}).first()
+            urls.append(f"/{prefix}/")
+            urls.append(f"/{prefix}/{obj.pk}/")
+        hive = Hive.objects.filter(owner=keeper).first()
+        urls.append("/apiary/")
+        urls.append(f"/apiary/interventions/?hive={hive.pk}")
+        return urls
+
+    def count_rows(self, table):
+        """Function returning the number of rows of a table, counted only once."""
+        if table not in self.table_sizes:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+                self.table_sizes[table] = cursor.fetchone()[0]
+        return self.table_sizes[table]
+
+    def find_seq_scans(self, sql):
+        """Function returning the tables read in full by the query plan of a query."""
+        if not sql.lstrip().upper().startswith("SELECT"):
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}")
+            plan = [str(row[-1]).strip() for row in cursor.fetchall()]
+        tables = []
+        for line in plan:
+            for pattern in SEQ_SCAN_PATTERNS:
+                match = pattern.search(line)
+                if match:
+                    tables.append(match.group(1))
+        return tables
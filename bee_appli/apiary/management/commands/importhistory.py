@@ -0,0 +1,123 @@
+# Standard library imports
+import sys
+import time
+
+# Third-party imports
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+# Local imports
+from apiary.importing import (
+    CSV,
+    FORMATS,
+    IMPORT_BATCH_SIZE,
+    IMPORTERS,
+    NDJSON,
+    InvalidRow,
+    as_dict,
+    read_rows,
+)
+
+# Invalid rows listed by a dry run
+SHOWN_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports the history of a beekeeper, hives, interventions or "
+        "contaminations, from a CSV or newline delimited JSON file, keeping the "
+        "dates of the file. The columns are the ones of the exports of the API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, - to read the input")
+        parser.add_argument("--type", required=True, choices=sorted(IMPORTERS))
+        parser.add_argument("--owner", required=True, help="Username of the beekeeper")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Format of the file, found from its extension by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help="Rows written per batch",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only check the rows, listing the invalid ones",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Insert with bulk_create even on PostgreSQL instead of COPY",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        owner = User.objects.filter(username=options["owner"]).first()
+        if owner is None:
+            raise CommandError(f"No beekeeper named {options['owner']!r}")
+        file_format = options["format"] or (
+            NDJSON if options["path"].endswith((".ndjson", ".jsonl")) else CSV
+        )
+        use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+        if options["path"] == "-":
+            self.import_file(sys.stdin, file_format, owner, use_copy, options)
+        else:
+            with open(options["path"], newline="", encoding="utf-8") as file:
+                self.import_file(file, file_format, owner, use_copy, options)
+
+    def import_file(self, file, file_format, owner, use_copy, options):
+        """Function to import the rows of the file, in a single transaction."""
+        dry_run = options["dry_run"]
+        start = time.perf_counter()
+        count = 0
+        errors = []
+        with transaction.atomic():
+            importer = IMPORTERS[options["type"]](owner, use_copy)
+            batch = []
+            for line_number, row in read_rows(file, file_format):
+                try:
+                    batch.append(importer.parse(as_dict(row)))
+                except InvalidRow as exc:
+                    if not dry_run:
+                        raise CommandError(f"Line {line_number}: {exc}")
+                    errors.append(f"Line {line_number}: {exc}")
+                if len(batch) == options["batch_size"]:
+                    count += self.write(importer, batch, dry_run, start, count)
+                    batch = []
+            count += self.write(importer, batch, dry_run, start, count)
+            if not dry_run:
+                importer.finish()
+
+        elapsed = time.perf_counter() - start
+        if dry_run:
+            for error in errors[:SHOWN_ERRORS]:
+                self.stderr.write(error)
+            if errors:
+                raise CommandError(f"{len(errors)} invalid rows, nothing was imported")
+            self.stdout.write(self.style.SUCCESS(f"{count} valid rows"))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} {options['type']} imported in {elapsed:.2f} s "
+                f"({count / max(elapsed, 1e-9):.0f} rows/s"
+                f"{', with COPY' if use_copy else ''})"
+            )
+        )
+
+    def write(self, importer, batch, dry_run, start, count):
+        """Function to write a batch and show the progress, returns its size."""
+        if not batch:
+            return 0
+        if not dry_run:
+            importer.write(batch)
+        count += len(batch)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{count} rows, {count / max(elapsed, 1e-9):.0f} rows/s")
+        return len(batch)
@@ -0,0 +1,184 @@
+# Standard library imports
+import asyncio
+from collections import defaultdict
+
+# Third-party imports
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+# Local imports
+from apiary.loadtest import HTTPClient, generate_load
+from apiary.models import BeeYard, Hive
+from public_api.models import PublicContact
+from public_api.search import update_search_index
+from public_api.versions import BEEKEEPERS, BEEYARDS, HIVES, bump_versions
+
+# Prefix of the usernames of the simulated beekeepers, whose data is removed
+# at the end
+USERNAME_PREFIX = "loadtest_keeper_"
+PASSWORD = "Load4ever!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends concurrent requests from simulated beekeepers and anonymous "
+        "scrapers to a running server, for example 'manage.py runserver "
+        "--noreload' for bee_appli.wsgi or any ASGI server for bee_appli.asgi, "
+        "and reports the throughput, latency and error rate of each scenario. "
+        "The beekeepers are created in the database of the server beforehand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Address of the server under load",
+        )
+        parser.add_argument(
+            "--beekeepers", type=int, default=10, help="Simulated beekeepers"
+        )
+        parser.add_argument(
+            "--scrapers", type=int, default=10, help="Anonymous scrapers"
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Length of the load in seconds"
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=0.5,
+            help="Average pause of a simulated user between two scenarios, in seconds",
+        )
+        parser.add_argument(
+            "--hives", type=int, default=10, help="Hives of each simulated beekeeper"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Interventions sent per intervention sync",
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=10, help="Request timeout in seconds"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--max-error-rate",
+            type=float,
+            default=None,
+            help="Fail if a scenario's error rate, in percent, is above this",
+        )
+
+    def handle(self, *args, **options):
+        url = options["url"].rstrip("/")
+        try:
+            asyncio.run(HTTPClient(url, options["timeout"]).request("GET", "/"))
+        except (OSError, ValueError, asyncio.TimeoutError) as exc:
+            raise CommandError(f"No server answers at {url}: {exc}")
+
+        keepers = self.create_keepers(options["beekeepers"], options["hives"])
+        try:
+            self.stdout.write(
+                f"{len(keepers)} beekeepers and {options['scrapers']} scrapers "
+                f"for {options['duration']:g} s against {url}"
+            )
+            recorder, elapsed = asyncio.run(
+                generate_load(
+                    url,
+                    keepers,
+                    [keeper["last_name"] for keeper in keepers],
+                    options["scrapers"],
+                    options["duration"],
+                    options["seed"],
+                    think_time=options["think_time"],
+                    batch_size=options["batch_size"],
+                    timeout=options["timeout"],
+                )
+            )
+        finally:
+            self.remove_keepers()
+
+        rows = recorder.report(elapsed)
+        self.stdout.write(
+            f"{'scenario':<20}{'requests':>10}{'req/s':>9}{'errors %':>10}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['scenario']:<20}{row['requests']:>10}{row['per_second']:>9.1f}"
+                f"{row['error_rate']:>10.2f}{row['p50_ms']:>9.1f}"
+                f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+            )
+        total = sum(row["requests"] for row in rows)
+        self.stdout.write(f"{total} requests in {elapsed:.1f} s")
+
+        limit = options["max_error_rate"]
+        if limit is not None:
+            failed = [row["scenario"] for row in rows if row["error_rate"] > limit]
+            if failed:
+                raise CommandError(
+                    f"Error rate above {limit:g}% for: {', '.join(failed)}"
+                )
+
+    def create_keepers(self, count, hives):
+        """Function to create the simulated beekeepers, who share their contact
+        so the scrapers can find them, with a beeyard of `hives` hives each.
+        Returns the details the simulation needs about them."""
+        # Left over if a previous run was killed
+        self.remove_keepers()
+        # Hashing the password once is much faster than once per user
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create(
+            User(
+                username=f"{USERNAME_PREFIX}{i}",
+                password=password,
+                first_name="Load",
+                last_name=f"Tester{i}",
+            )
+            for i in range(count)
+        )
+        PublicContact.objects.bulk_create(
+            PublicContact(public_beekeeper_info=user) for user in users
+        )
+        beeyards = BeeYard.objects.bulk_create(
+            BeeYard(name="Load test", beekeeper=user) for user in users
+        )
+        hive_rows = Hive.objects.bulk_create(
+            Hive(
+                status=Hive.ACTIVE,
+                species=Hive.BLACB,
+                beeyard=beeyard,
+                owner_id=beeyard.beekeeper_id,
+                queen_year=2022,
+                name=f"Hive {i}",
+            )
+            for beeyard in beeyards
+            for i in range(hives)
+        )
+        # Bulk writes don't send the signals indexing the names and raising the
+        # versions of the public collections
+        for user in users:
+            update_search_index(user)
+        bump_versions(BEEYARDS, HIVES, BEEKEEPERS)
+        hive_ids = defaultdict(list)
+        for hive in hive_rows:
+            hive_ids[hive.beeyard_id].append(hive.id)
+        return [
+            {
+                "username": user.username,
+                "password": PASSWORD,
+                "last_name": user.last_name,
+                "beeyard_id": beeyard.id,
+                "hive_ids": hive_ids[beeyard.id],
+            }
+            for user, beeyard in zip(users, beeyards)
+        ]
+
+    def remove_keepers(self):
+        """Function to delete the simulated beekeepers along with everything
+        they wrote. Beeyards and hives outlive their beekeeper so are deleted
+        first, taking the interventions and contaminations with them."""
+        Hive.objects.filter(owner__username__startswith=USERNAME_PREFIX).delete()
+        BeeYard.objects.filter(beekeeper__username__startswith=USERNAME_PREFIX).delete()
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
@@ -0,0 +1,37 @@
+# Standard library imports
+import time
+
+# Third-party imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Local imports
+from apiary.rollup import REBUILD_CHUNK_SIZE, rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the daily rollup of the interventions from scratch, for data "
+        "written without sending signals (bulk inserts, update(), raw SQL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=REBUILD_CHUNK_SIZE,
+            help="Hives rebuilt per transaction, bounding the memory used",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        start = time.perf_counter()
+        hives = rows = 0
+        for hives, rows in rebuild_rollup(options["chunk_size"]):
+            self.stdout.write(f"{hives} hives, {rows} rows")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{rows} rollup rows written for {hives} hives in "
+                f"{time.perf_counter() - start:.2f} s"
+            )
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apiary', '0018_alter_treatment_treatment_type'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contamination',
+            index=models.Index(fields=['hive', 'date'], name='contamination_hive_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hive',
+            index=models.Index(fields=['beeyard', 'status'], name='hive_beeyard_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hive',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['beeyard'], name='hive_active_beeyard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='intervention',
+            index=models.Index(fields=['hive_affected', 'date'], name='intervention_hive_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='intervention',
+            index=models.Index(fields=['content_type', 'object_id'], name='intervention_content_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-18 15:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apiary', '0019_ownership_and_timeline_indexes'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contamination',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, help_text='The beekeeper of the infected hive.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='owned_contaminations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='hive',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, help_text="The beekeeper of the hive's beeyard.", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='owned_hives', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='intervention',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, help_text='The beekeeper of the hive affected.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='owned_interventions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='contamination',
+            index=models.Index(fields=['owner', 'date', 'id'], name='contamination_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hive',
+            index=models.Index(fields=['owner', 'id'], name='hive_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='intervention',
+            index=models.Index(fields=['owner', 'date', 'id'], name='intervention_owner_date_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Fills in the owner columns added in 0020 from BeeYard.beekeeper
+
+from django.db import migrations
+from django.db.models import Max, Min, OuterRef, Subquery
+
+# Rows updated per statement, each chunk is committed on its own so big
+# tables are never locked for the whole backfill
+CHUNK_SIZE = 10000
+
+
+def update_in_chunks(model, owner):
+    """Runs model.update(owner_id=owner) over ranges of primary keys."""
+    bounds = model.objects.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        return
+    for start in range(bounds["low"], bounds["high"] + 1, CHUNK_SIZE):
+        model.objects.filter(pk__gte=start, pk__lt=start + CHUNK_SIZE).update(
+            owner_id=owner
+        )
+
+
+def backfill_owner(apps, schema_editor):
+    BeeYard = apps.get_model("apiary", "BeeYard")
+    Hive = apps.get_model("apiary", "Hive")
+    Intervention = apps.get_model("apiary", "Intervention")
+    Contamination = apps.get_model("apiary", "Contamination")
+
+    # Hives first as the other tables copy the owner of their hive
+    update_in_chunks(
+        Hive,
+        Subquery(
+            BeeYard.objects.filter(pk=OuterRef("beeyard_id")).values("beekeeper_id")
+        ),
+    )
+    update_in_chunks(
+        Intervention,
+        Subquery(Hive.objects.filter(pk=OuterRef("hive_affected_id")).values("owner_id")),
+    )
+    update_in_chunks(
+        Contamination,
+        Subquery(Hive.objects.filter(pk=OuterRef("hive_id")).values("owner_id")),
+    )
+
+
+class Migration(migrations.Migration):
+    # Commit after every chunk instead of once at the end
+    atomic = False
+
+    dependencies = [
+        ("apiary", "0020_owner"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_owner, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-18 16:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apiary', '0021_backfill_owner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyInterventionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='The day of the interventions')),
+                ('intervention_type', models.CharField(choices=[('artificial_swarming', 'Artificial Swarming'), ('destruction_queen_cells', 'Destruction Queen Cells'), ('harvest', 'Harvest'), ('health_check', 'Health Check'), ('super_installation', 'Super Installation'), ('syrup_distribution', 'Syrup Distribution'), ('treatment', 'Treatment')], help_text='The type of the interventions')),
+                ('count', models.PositiveIntegerField(default=0, help_text='The number of interventions')),
+                ('honey', models.FloatField(default=0, help_text='Honey harvested in kilos')),
+                ('syrup', models.FloatField(default=0, help_text='Syrup distributed in liters')),
+                ('beeyard', models.ForeignKey(db_index=False, help_text='The beeyard of the hive.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='apiary.beeyard')),
+                ('hive', models.ForeignKey(help_text='The hive concerned by the interventions.', on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='apiary.hive')),
+                ('owner', models.ForeignKey(db_index=False, help_text='The beekeeper of the hive.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'day'], name='rollup_owner_day_idx'), models.Index(fields=['beeyard', 'day'], name='rollup_beeyard_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyinterventionrollup',
+            constraint=models.UniqueConstraint(fields=('hive', 'day', 'intervention_type'), name='rollup_unique_key'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Fills in the daily rollup added in 0022 from the existing interventions
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+# Hives whose rollup is computed at a time, so the memory used doesn't depend
+# on the number of interventions
+CHUNK_SIZE = 500
+
+# Rollup column each type of content object adds its quantity to
+QUANTITY_COLUMNS = {"harvest": "honey", "syrupdistribution": "syrup"}
+
+
+def backfill_rollup(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Hive = apps.get_model("apiary", "Hive")
+    Intervention = apps.get_model("apiary", "Intervention")
+    DailyInterventionRollup = apps.get_model("apiary", "DailyInterventionRollup")
+    content_types = {
+        content_type.id: (apps.get_model("apiary", content_type.model), column)
+        for content_type in ContentType.objects.filter(
+            app_label="apiary", model__in=QUANTITY_COLUMNS
+        )
+        for column in [QUANTITY_COLUMNS[content_type.model]]
+    }
+
+    last_id = 0
+    while True:
+        hives = {
+            hive["id"]: hive
+            for hive in Hive.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values("id", "owner_id", "beeyard_id")[:CHUNK_SIZE]
+        }
+        if not hives:
+            break
+        last_id = max(hives)
+        interventions = Intervention.objects.filter(hive_affected_id__in=list(hives))
+
+        rows = {}
+        for row in (
+            interventions.values(
+                "hive_affected_id", "intervention_type", day=TruncDate("date")
+            )
+            .annotate(total=Count("id"))
+            .order_by()
+        ):
+            hive = hives[row["hive_affected_id"]]
+            rows[hive["id"], row["day"], row["intervention_type"]] = (
+                DailyInterventionRollup(
+                    hive_id=hive["id"],
+                    owner_id=hive["owner_id"],
+                    beeyard_id=hive["beeyard_id"],
+                    day=row["day"],
+                    intervention_type=row["intervention_type"],
+                    count=row["total"],
+                )
+            )
+        for content_type_id, (model, column) in content_types.items():
+            linked = list(
+                interventions.filter(
+                    content_type_id=content_type_id, object_id__isnull=False
+                ).values_list(
+                    "hive_affected_id",
+                    TruncDate("date"),
+                    "intervention_type",
+                    "object_id",
+                )
+            )
+            quantities = dict(
+                model.objects.filter(
+                    id__in={object_id for *key, object_id in linked}
+                ).values_list("id", "quantity")
+            )
+            for *key, object_id in linked:
+                row = rows[tuple(key)]
+                setattr(
+                    row, column, getattr(row, column) + quantities.get(object_id, 0)
+                )
+        DailyInterventionRollup.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apiary", "0022_dailyinterventionrollup"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -7,6 +7,7 @@ from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelatio
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models import CASCADE, SET_NULL
+from django.utils import timezone
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 
@@ -28,6 +29,24 @@ class BeeYard(models.Model):
     def __str__(self):
         return f"{self.name} Bee Yard"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the beekeeper to find out if it changes when saving
+        if "beekeeper_id" in field_names:
+            instance._loaded_beekeeper_id = instance.beekeeper_id
+        return instance
+
+    def update_owner(self, owner_id):
+        """Function to copy a new owner to the hives of the beeyard and to
+        their interventions and contaminations."""
+        Hive.objects.filter(beeyard=self).update(owner_id=owner_id)
+        Intervention.objects.filter(hive_affected__beeyard=self).update(
+            owner_id=owner_id
+        )
+        Contamination.objects.filter(hive__beeyard=self).update(owner_id=owner_id)
+        DailyInterventionRollup.objects.filter(beeyard=self).update(owner_id=owner_id)
+
 
 class Hive(models.Model):
     """Model to store the details of individual hives"""
@@ -77,13 +96,59 @@ class Hive(models.Model):
         "Intervention",
         help_text="Stores any parent hives in cases of artificial swarming.",
     )
+    # Copy of beeyard.beekeeper kept up to date by apiary.signals so access
+    # can be checked without joining the beeyard table
+    owner = models.ForeignKey(
+        User,
+        on_delete=SET_NULL,
+        null=True,
+        editable=False,
+        db_index=False,
+        related_name="owned_hives",
+        help_text="The beekeeper of the hive's beeyard.",
+    )
 
     def __str__(self):
         return f"Hive {self.name} in {self.beeyard.name} Bee Yard "
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the owner and beeyard to find out if they change when saving
+        if "owner_id" in field_names:
+            instance._loaded_owner_id = instance.owner_id
+        if "beeyard_id" in field_names:
+            instance._loaded_beeyard_id = instance.beeyard_id
+        return instance
+
+    def set_owner(self):
+        """Function to copy the beekeeper of the hive's beeyard to its owner."""
+        self.owner_id = self.beeyard.beekeeper_id if self.beeyard_id else None
+
+    def update_owner(self):
+        """Function to copy the owner of the hive to its interventions and
+        contaminations, and its owner and beeyard to its daily rollup."""
+        Intervention.objects.filter(hive_affected=self).update(owner_id=self.owner_id)
+        Contamination.objects.filter(hive=self).update(owner_id=self.owner_id)
+        DailyInterventionRollup.objects.filter(hive=self).update(
+            owner_id=self.owner_id, beeyard_id=self.beeyard_id
+        )
+
     class Meta:
         # Necessary for showing properly in intervention admin
         verbose_name = "Hive"
+        indexes = [
+            # Hives of the connected beekeeper, by ID
+            models.Index(fields=["owner", "id"], name="hive_owner_idx"),
+            # Listing the hives of a beeyard by status
+            models.Index(fields=["beeyard", "status"], name="hive_beeyard_status_idx"),
+            # Only active hives are looked up this way, so the index stays small
+            models.Index(
+                fields=["beeyard"],
+                condition=models.Q(status="active"),
+                name="hive_active_beeyard_idx",
+            ),
+        ]
 
 
 class Intervention(models.Model):
@@ -153,6 +218,74 @@ class Intervention(models.Model):
         "content_type",
         "object_id",
     )
+    # Copy of hive_affected.owner kept up to date by apiary.signals
+    owner = models.ForeignKey(
+        User,
+        on_delete=SET_NULL,
+        null=True,
+        editable=False,
+        db_index=False,
+        related_name="owned_interventions",
+        help_text="The beekeeper of the hive affected.",
+    )
+
+    # Columns giving the rollup row an intervention is counted in
+    ROLLUP_FIELDS = {
+        "hive_affected_id",
+        "date",
+        "intervention_type",
+        "content_type_id",
+        "object_id",
+    }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the intervention adds to the daily rollup to take it
+        # back out if it changes
+        if cls.ROLLUP_FIELDS.issubset(field_names):
+            instance._rollup_state = instance.rollup_state()
+        return instance
+
+    @classmethod
+    def linked_to(cls, content_object):
+        """Function returning the interventions whose content object is the given
+        harvest, syrup distribution, treatment or hive."""
+        return cls.objects.filter(
+            content_type=ContentType.objects.get_for_model(content_object),
+            object_id=content_object.pk,
+        )
+
+    def set_owner(self):
+        """Function to copy the owner of the hive affected to the intervention."""
+        self.owner_id = self.hive_affected.owner_id
+
+    def rollup_state(self):
+        """Function returning the rollup key of the intervention, its hive, day
+        and type, followed by the content object its quantity comes from."""
+        return (
+            self.hive_affected_id,
+            timezone.localdate(self.date),
+            self.intervention_type,
+            self.content_type_id,
+            self.object_id,
+        )
+
+    class Meta:
+        indexes = [
+            # Interventions of the connected beekeeper, by date
+            models.Index(
+                fields=["owner", "date", "id"], name="intervention_owner_date_idx"
+            ),
+            # Timeline of the interventions of a hive
+            models.Index(
+                fields=["hive_affected", "date"], name="intervention_hive_date_idx"
+            ),
+            # Finding the interventions linked to a content object
+            models.Index(
+                fields=["content_type", "object_id"], name="intervention_content_idx"
+            ),
+        ]
 
 
 class Harvest(models.Model):
@@ -164,6 +297,14 @@ class Harvest(models.Model):
     def __str__(self):
         return f"{self.quantity} kilograms"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the quantity to update the daily rollup by the difference
+        if "quantity" in field_names:
+            instance._loaded_quantity = instance.quantity
+        return instance
+
     class Meta:
         # Necessary for showing properly in intervention admin
         verbose_name = "Harvest"
@@ -194,6 +335,14 @@ class SyrupDistribution(models.Model):
     def __str__(self):
         return f"{self.quantity} liters"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the quantity to update the daily rollup by the difference
+        if "quantity" in field_names:
+            instance._loaded_quantity = instance.quantity
+        return instance
+
     class Meta:
         # Necessary for showing properly in intervention admin
         verbose_name = "Syrup Distribution"
@@ -218,7 +367,6 @@ class Treatment(models.Model):
         unique=True,
         help_text="Name of the treatment applied to the hive",
     )
-    interventions = GenericRelation("Intervention")
 
     def __str__(self):
         return f"{self.treatment_type}"
@@ -251,3 +399,80 @@ class Contamination(models.Model):
         related_name="contaminations",
         help_text="The infected hive.",
     )
+    # Copy of hive.owner kept up to date by apiary.signals
+    owner = models.ForeignKey(
+        User,
+        on_delete=SET_NULL,
+        null=True,
+        editable=False,
+        db_index=False,
+        related_name="owned_contaminations",
+        help_text="The beekeeper of the infected hive.",
+    )
+
+    def set_owner(self):
+        """Function to copy the owner of the infected hive to the contamination."""
+        self.owner_id = self.hive.owner_id
+
+    class Meta:
+        indexes = [
+            # Contaminations of the connected beekeeper, by date
+            models.Index(
+                fields=["owner", "date", "id"], name="contamination_owner_date_idx"
+            ),
+            # Timeline of the contaminations of a hive
+            models.Index(fields=["hive", "date"], name="contamination_hive_date_idx"),
+        ]
+
+
+class DailyInterventionRollup(models.Model):
+    """Model storing, for each hive, day and type of intervention, the number of
+    interventions and the honey harvested or syrup distributed, so reports read
+    a row per day instead of every intervention. It is kept up to date by
+    apiary.rollup and can be rebuilt with the rebuildrollup command. The owner
+    and beeyard follow the hive's."""
+
+    owner = models.ForeignKey(
+        User,
+        on_delete=SET_NULL,
+        null=True,
+        db_index=False,
+        related_name="+",
+        help_text="The beekeeper of the hive.",
+    )
+    beeyard = models.ForeignKey(
+        BeeYard,
+        on_delete=SET_NULL,
+        null=True,
+        db_index=False,
+        related_name="+",
+        help_text="The beeyard of the hive.",
+    )
+    hive = models.ForeignKey(
+        Hive,
+        on_delete=CASCADE,
+        related_name="daily_rollups",
+        help_text="The hive concerned by the interventions.",
+    )
+    day = models.DateField(help_text="The day of the interventions")
+    intervention_type = models.CharField(
+        choices=Intervention.INTERVENTION_TYPES,
+        help_text="The type of the interventions",
+    )
+    count = models.PositiveIntegerField(
+        default=0, help_text="The number of interventions"
+    )
+    honey = models.FloatField(default=0, help_text="Honey harvested in kilos")
+    syrup = models.FloatField(default=0, help_text="Syrup distributed in liters")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hive", "day", "intervention_type"], name="rollup_unique_key"
+            ),
+        ]
+        indexes = [
+            # Reports of a beekeeper or of a beeyard over a period
+            models.Index(fields=["owner", "day"], name="rollup_owner_day_idx"),
+            models.Index(fields=["beeyard", "day"], name="rollup_beeyard_day_idx"),
+        ]
@@ -0,0 +1,189 @@
+# Standard library imports
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as Base64Error
+from collections import OrderedDict
+
+# Third-party imports
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Local imports
+from public_api.paginaton import PublicAPIPagination
+
+
+def encode_cursor(values, reverse=False):
+    """Function returning the cursor of the page coming after the values of the
+    ordering fields, or before them if reverse is set."""
+    # Dates are stored as ISO strings and read back by the model fields
+    data = {
+        "v": [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in values
+        ]
+    }
+    if reverse:
+        data["r"] = 1
+    return b64encode(json.dumps(data).encode("utf-8")).decode("ascii")
+
+
+class KeysetPagination(pagination.BasePagination):
+    """Class paginating a queryset on the values of its ordering fields instead
+    of an OFFSET. Each page is read from the index, so deep pages cost the same
+    as the first one, and no COUNT(*) is run. The view gives the ordering with
+    a `keyset_ordering` attribute, which must end with a unique field."""
+
+    page_size = PublicAPIPagination.page_size
+    max_page_size = PublicAPIPagination.max_page_size
+    page_size_query_param = PublicAPIPagination.page_size_query_param
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = view.keyset_ordering
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip("-")) for name in self.ordering
+        ]
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.flip(name) for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.after(ordering, values))
+
+        # One more row than needed tells whether there is a following page
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Going back from a page always leads to a page with a next link,
+        # and going forward to a page with a previous link
+        self.next_values = self.previous_values = None
+        if rows:
+            if has_more or reverse:
+                self.next_values = self.get_values(rows[-1])
+            if values is not None and (has_more or not reverse):
+                self.previous_values = self.get_values(rows[0])
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def flip(self, name):
+        """Function returning the opposite ordering of a field."""
+        return name[1:] if name.startswith("-") else "-" + name
+
+    def after(self, ordering, values):
+        """Function returning the condition keeping the rows which come after the
+        cursor values. For (date, id) it is `date <= d AND (date < d OR id > i)`,
+        the first part letting the database read a range of the index."""
+        lookups = [
+            (name.lstrip("-"), "lt" if name.startswith("-") else "gt")
+            for name in ordering
+        ]
+        field, lookup = lookups[0]
+        condition = Q()
+        if len(lookups) > 1:
+            condition &= Q(**{f"{field}__{lookup}e": values[0]})
+        following = Q()
+        for i, (field, lookup) in enumerate(lookups):
+            equal = {lookups[j][0]: values[j] for j in range(i)}
+            following |= Q(**equal, **{f"{field}__{lookup}": values[i]})
+        return condition & following
+
+    def get_values(self, obj):
+        return [getattr(obj, field.attname) for field in self.fields]
+
+    def decode_cursor(self, request):
+        """Function returning the values and direction stored in the cursor of
+        the request, (None, False) for the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            values = [
+                field.to_python(value) for field, value in zip(self.fields, data["v"])
+            ]
+            if len(values) != len(self.fields):
+                raise ValueError
+            return values, bool(data.get("r"))
+        except (Base64Error, ValidationError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, values, reverse=False):
+        """Function returning the url of the page starting after the values."""
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_cursor(values, reverse)
+        )
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        return self.encode_cursor(self.next_values)
+
+    def get_previous_link(self):
+        if self.previous_values is None:
+            return None
+        return self.encode_cursor(self.previous_values, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+class PrivateAPIPagination(PublicAPIPagination):
+    """Class for the pagination of the private API. Lists are paginated by page
+    number, as in the public API, unless the request has a `cursor` parameter
+    (empty for the first page), in which case the keyset pagination is used.
+    The links of each mode keep the request in the same mode."""
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params and getattr(
+            view, "keyset_ordering", None
+        ):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
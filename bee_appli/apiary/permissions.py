@@ -20,16 +20,16 @@ class IsKeeperOrReadOnly(BasePermission):
 
 
 class IsKeeper(BasePermission):
-    """Used to ensure only a beeyard's beekeeper can edit its data."""
+    """Used to ensure only a beeyard's beekeeper can edit its data. Hives,
+    interventions and contaminations store their beekeeper in their owner
+    column, so no related object needs to be loaded."""
 
     def has_object_permission(self, request, view, obj):
+        # Objects without a beekeeper must not match anonymous users
+        if not request.user.is_authenticated:
+            return False
         if isinstance(obj, BeeYard):
-            return obj.beekeeper == request.user
-        elif isinstance(obj, Intervention):
-            hive = Hive.objects.get(id=obj.hive_affected)
-            return hive.beeyard.beekeeper == request.user
-        elif isinstance(obj, Hive):
-            return obj.beeyard.beekeeper == request.user
-        elif isinstance(obj, Contamination):
-            return obj.hive.beeyard.beekeeper == request.user
+            return obj.beekeeper_id == request.user.id
+        elif isinstance(obj, (Intervention, Hive, Contamination)):
+            return obj.owner_id == request.user.id
         return False
@@ -0,0 +1,280 @@
+# Third-party imports
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Local imports
+from .models import (
+    DailyInterventionRollup,
+    Harvest,
+    Hive,
+    Intervention,
+    SyrupDistribution,
+)
+
+# Rollup column each type of content object adds its quantity to
+QUANTITY_COLUMNS = {Harvest: "honey", SyrupDistribution: "syrup"}
+
+# Hives rebuilt at a time by rebuild_rollup
+REBUILD_CHUNK_SIZE = 500
+
+# Rollup keys upserted per INSERT statement
+UPSERT_BATCH_SIZE = 1000
+
+
+def load_quantities(states, interventions=()):
+    """Function returning the (honey, syrup) added by the content object of each
+    rollup state, read with one query per type of content object. Objects
+    already attached to the interventions are used as they are."""
+    quantities = {}
+    for intervention in interventions:
+        field = Intervention.content_object
+        if intervention.content_type_id and field.is_cached(intervention):
+            content_object = intervention.content_object
+            column = QUANTITY_COLUMNS.get(type(content_object))
+            if column is not None:
+                quantities[intervention.content_type_id, intervention.object_id] = (
+                    content_object.quantity if column == "honey" else 0,
+                    content_object.quantity if column == "syrup" else 0,
+                )
+    for model, column in QUANTITY_COLUMNS.items():
+        content_type_id = ContentType.objects.get_for_model(model).id
+        ids = {
+            state[4]
+            for state in states
+            if state[3] == content_type_id
+            and (content_type_id, state[4]) not in quantities
+        }
+        if not ids:
+            continue
+        for object_id, quantity in model.objects.filter(id__in=ids).values_list(
+            "id", "quantity"
+        ):
+            quantities[content_type_id, object_id] = (
+                quantity if column == "honey" else 0,
+                quantity if column == "syrup" else 0,
+            )
+    return quantities
+
+
+def add_delta(deltas, key, count, honey, syrup):
+    """Function to add a change to the deltas of a rollup key."""
+    delta = deltas.setdefault(key, [0, 0, 0])
+    delta[0] += count
+    delta[1] += honey
+    delta[2] += syrup
+
+
+def upsert_query(count):
+    """Function returning the SQL adding `count` deltas to the rollup. Rows are
+    inserted with the owner and beeyard of their hive, or added to if they
+    exist, with ON CONFLICT which PostgreSQL and SQLite both support. The
+    addition is done by the database so concurrent requests can't lose one
+    another's counts."""
+    rollup = DailyInterventionRollup._meta
+    hive = Hive._meta
+    owner = hive.get_field("owner").column
+    beeyard = hive.get_field("beeyard").column
+    row = (
+        "SELECT %s AS hive_id, %s AS day, %s AS type, %s AS n, %s AS honey, "
+        "%s AS syrup"
+    )
+    values = " UNION ALL ".join([row] * count)
+    return f"""
+        INSERT INTO {rollup.db_table}
+            (owner_id, beeyard_id, hive_id, day, intervention_type, count, honey, syrup)
+        SELECT h.{owner}, h.{beeyard}, v.hive_id, v.day, v.type, v.n, v.honey, v.syrup
+        FROM ({values}) v JOIN {hive.db_table} h ON h.id = v.hive_id
+        WHERE TRUE
+        ON CONFLICT (hive_id, day, intervention_type) DO UPDATE SET
+            count = {rollup.db_table}.count + EXCLUDED.count,
+            honey = {rollup.db_table}.honey + EXCLUDED.honey,
+            syrup = {rollup.db_table}.syrup + EXCLUDED.syrup
+    """
+
+
+def apply_deltas(deltas):
+    """Function to add the deltas, a dict of (hive, day, type) keys to [count,
+    honey, syrup] changes, to the rollup. Rows gaining interventions are
+    upserted with one query per thousand keys, the others are read and written
+    in bulk, so the number of queries doesn't depend on the number of keys.
+    Rows left without interventions are removed."""
+    added = [(*key, *delta) for key, delta in deltas.items() if delta[0] > 0]
+    deltas = {
+        key: delta for key, delta in deltas.items() if delta[0] <= 0 and any(delta)
+    }
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for start in range(0, len(added), UPSERT_BATCH_SIZE):
+                batch = added[start : start + UPSERT_BATCH_SIZE]
+                cursor.execute(
+                    upsert_query(len(batch)), [value for row in batch for value in row]
+                )
+        if not deltas:
+            return
+        rows = DailyInterventionRollup.objects.select_for_update().filter(
+            hive_id__in={key[0] for key in deltas},
+            day__in={key[1] for key in deltas},
+        )
+        updated, removed = [], []
+        for row in rows:
+            delta = deltas.get((row.hive_id, row.day, row.intervention_type))
+            if delta is None:
+                continue
+            row.count += delta[0]
+            row.honey += delta[1]
+            row.syrup += delta[2]
+            if row.count > 0:
+                updated.append(row)
+            else:
+                removed.append(row.id)
+        # Rows which aren't found were removed along with their hive
+        if updated:
+            DailyInterventionRollup.objects.bulk_update(
+                updated, ["count", "honey", "syrup"]
+            )
+        if removed:
+            DailyInterventionRollup.objects.filter(id__in=removed).delete()
+
+
+def sync_interventions(interventions):
+    """Function to update the rollup after interventions were created or
+    changed. Each intervention's previous contribution, remembered when it was
+    loaded, is taken out and the current one added."""
+    changes = []
+    for intervention in interventions:
+        previous = getattr(intervention, "_rollup_state", None)
+        current = intervention.rollup_state()
+        if previous != current:
+            changes.append((previous, current))
+        intervention._rollup_state = current
+    if not changes:
+        return
+    states = [state for change in changes for state in change if state is not None]
+    quantities = load_quantities(states, interventions)
+    deltas = {}
+    for previous, current in changes:
+        if previous is not None:
+            honey, syrup = quantities.get(previous[3:], (0, 0))
+            add_delta(deltas, previous[:3], -1, -honey, -syrup)
+        honey, syrup = quantities.get(current[3:], (0, 0))
+        add_delta(deltas, current[:3], 1, honey, syrup)
+    apply_deltas(deltas)
+
+
+def remove_interventions(interventions):
+    """Function to take deleted interventions out of the rollup."""
+    states = [
+        getattr(intervention, "_rollup_state", None) or intervention.rollup_state()
+        for intervention in interventions
+    ]
+    quantities = load_quantities(states, interventions)
+    deltas = {}
+    for state in states:
+        honey, syrup = quantities.get(state[3:], (0, 0))
+        add_delta(deltas, state[:3], -1, -honey, -syrup)
+    apply_deltas(deltas)
+
+
+def change_quantity(content_object, difference):
+    """Function to add the change of quantity of a harvest or syrup distribution
+    to the rollup rows of the interventions using it."""
+    column = QUANTITY_COLUMNS[type(content_object)]
+    deltas = {}
+    for hive_id, date, intervention_type in Intervention.linked_to(
+        content_object
+    ).values_list("hive_affected_id", "date", "intervention_type"):
+        key = (hive_id, timezone.localdate(date), intervention_type)
+        add_delta(
+            deltas,
+            key,
+            0,
+            difference if column == "honey" else 0,
+            difference if column == "syrup" else 0,
+        )
+    apply_deltas(deltas)
+
+
+def move_hives(hive_ids):
+    """Function to copy the owner and beeyard of the hives, which may have been
+    changed by a bulk update, to their rollup rows with a single query."""
+    hive = Hive.objects.filter(id=OuterRef("hive_id"))
+    DailyInterventionRollup.objects.filter(hive_id__in=hive_ids).update(
+        owner_id=Subquery(hive.values("owner_id")),
+        beeyard_id=Subquery(hive.values("beeyard_id")),
+    )
+
+
+def content_quantity(model):
+    """Function returning the quantity of the harvest or syrup distribution of
+    each intervention, read by a subquery on the object id as the content
+    objects have no relation back to their interventions."""
+    return Subquery(model.objects.filter(id=OuterRef("object_id")).values("quantity"))
+
+
+def rollup_rows(hive_ids):
+    """Function returning the rollup rows of the given hives computed from the
+    interventions, with one aggregate query for the counts and one per type of
+    content object for the quantities."""
+    interventions = Intervention.objects.filter(hive_affected_id__in=hive_ids)
+    rows = {}
+    for row in (
+        interventions.values(
+            "hive_affected_id", "intervention_type", day=TruncDate("date")
+        )
+        .annotate(total=Count("id"))
+        .order_by()
+    ):
+        key = (row["hive_affected_id"], row["day"], row["intervention_type"])
+        rows[key] = DailyInterventionRollup(
+            hive_id=key[0], day=key[1], intervention_type=key[2], count=row["total"]
+        )
+    for model, column in QUANTITY_COLUMNS.items():
+        for row in (
+            interventions.filter(content_type=ContentType.objects.get_for_model(model))
+            .values("hive_affected_id", "intervention_type", day=TruncDate("date"))
+            .annotate(total=Sum(content_quantity(model)))
+            .order_by()
+        ):
+            key = (row["hive_affected_id"], row["day"], row["intervention_type"])
+            setattr(rows[key], column, row["total"] or 0)
+    return list(rows.values())
+
+
+def rebuild_hives(hive_ids):
+    """Function to replace the rollup rows of the given hives by ones computed
+    from their interventions. Returns the number of rows written."""
+    hives = Hive.objects.in_bulk(hive_ids)
+    rows = rollup_rows(list(hives))
+    for row in rows:
+        row.owner_id = hives[row.hive_id].owner_id
+        row.beeyard_id = hives[row.hive_id].beeyard_id
+    with transaction.atomic():
+        DailyInterventionRollup.objects.filter(hive_id__in=list(hives)).delete()
+        DailyInterventionRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_rollup(chunk_size=REBUILD_CHUNK_SIZE, hives=None):
+    """Function to rebuild the rollup of the hives, all of them by default, a
+    chunk of hives at a time so the memory used doesn't depend on the number of
+    interventions. Yields the number of hives and of rows written after each
+    chunk."""
+    if hives is None:
+        hives = Hive.objects.all()
+    hive_count = rows = 0
+    last_id = 0
+    while True:
+        hive_ids = list(
+            hives.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if not hive_ids:
+            break
+        rows += rebuild_hives(hive_ids)
+        hive_count += len(hive_ids)
+        last_id = hive_ids[-1]
+        yield hive_count, rows
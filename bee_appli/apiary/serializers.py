@@ -1,5 +1,7 @@
 # Third-party imports
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Exists, OuterRef
 from rest_framework import serializers
 
 # Local imports
@@ -12,15 +14,57 @@ from .models import (
     SyrupDistribution,
     Treatment,
 )
+from .fastpath import GenericObjectFastField
+from .sparse import SparseFieldsMixin
 
 
-class ContaminationSerializer(serializers.ModelSerializer):
+class OwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field which can be restricted to the objects owned by the
+    connected beekeeper. When a view validates a whole batch it loads the allowed
+    objects in advance and passes them in the context as "preloaded", so each
+    item is looked up in memory instead of with its own query."""
+
+    def __init__(self, owner_lookup=None, **kwargs):
+        # Lookup from the related model to its beekeeper, ex: "beekeeper"
+        self.owner_lookup = owner_lookup
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get("request")
+        if self.owner_lookup is not None and request is not None:
+            queryset = queryset.filter(**{self.owner_lookup: request.user})
+        return queryset
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded", {}).get(self.field_name)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            return preloaded[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class ContaminationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Contamination
         fields = ["id", "type", "date", "hive"]
 
 
-class HiveSerializer(serializers.ModelSerializer):
+class HiveSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Allows placing the hive in one of the beekeeper's beeyards
+    beeyard = OwnedPrimaryKeyRelatedField(
+        queryset=BeeYard.objects.all(),
+        owner_lookup="beekeeper",
+        write_only=True,
+        required=False,
+    )
+
     class Meta:
         model = Hive
         fields = [
@@ -31,15 +75,45 @@ class HiveSerializer(serializers.ModelSerializer):
             "beeyard_id",
             "queen_year",
             "id",
+            "beeyard",
         ]
 
 
-class BeeYardSerializer(serializers.ModelSerializer):
+class BeeYardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     hives_detailed = HiveSerializer(source="hives", read_only=True, many=True)
 
     class Meta:
         model = BeeYard
         fields = ["name", "beekeeper", "hives", "hives_detailed"]
+        # Only returned with ?expand= when the fields are chosen
+        expandable_fields = ["hives_detailed"]
+
+
+class HarvestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Harvest
+        fields = ["quantity"]
+
+
+class SyrupDistributionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SyrupDistribution
+        fields = ["quantity", "syrup_type"]
+
+
+class TreatmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Treatment
+        fields = ["treatment_type"]
+
+
+# Serializer of each type of object an intervention can relate to
+CONTENT_OBJECT_SERIALIZERS = {
+    Harvest: HarvestSerializer,
+    SyrupDistribution: SyrupDistributionSerializer,
+    Treatment: TreatmentSerializer,
+    Hive: HiveSerializer,
+}
 
 
 class ContentObjectRelatedField(serializers.RelatedField):
@@ -49,21 +123,26 @@ class ContentObjectRelatedField(serializers.RelatedField):
     """
 
     def to_representation(self, value):
-        if isinstance(value, Harvest):
-            return HarvestSerializer(value).data
-        elif isinstance(value, SyrupDistribution):
-            return SyrupDistributionSerializer(value).data
-        elif isinstance(value, Treatment):
-            return TreatmentSerializer(value).data
-        elif isinstance(value, Hive):
-            return HiveSerializer(value).data
-        raise Exception("Unexpected type of tagged object")
-
-
-class InterventionSerializer(serializers.ModelSerializer):
+        serializer_class = CONTENT_OBJECT_SERIALIZERS.get(type(value))
+        if serializer_class is None:
+            raise Exception("Unexpected type of tagged object")
+        return serializer_class(value).data
+
+
+class InterventionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Include the details of the object the intervention relates to (hive,
     # harves, treatment, etc.)
     content_object = ContentObjectRelatedField(read_only=True)
+    # Only the beekeeper's own hives can receive an intervention
+    hive_affected = OwnedPrimaryKeyRelatedField(
+        queryset=Hive.objects.all(), owner_lookup="owner"
+    )
+    # Only the types of objects an intervention can relate to
+    content_type = OwnedPrimaryKeyRelatedField(
+        queryset=ContentType.objects.filter(Intervention.limit),
+        required=False,
+        allow_null=True,
+    )
 
     class Meta:
         model = Intervention
@@ -75,27 +154,116 @@ class InterventionSerializer(serializers.ModelSerializer):
             "object_id",
             "content_object",
         ]
+        # Only returned with ?expand= when the fields are chosen
+        expandable_fields = ["content_object"]
 
+    # The related objects are read for a whole page of the list at once
+    fast_fields = {
+        "content_object": GenericObjectFastField(CONTENT_OBJECT_SERIALIZERS)
+    }
 
-class HarvestSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Harvest
-        fields = ["quantity"]
-
-
-class SyrupDistributionSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = SyrupDistribution
-        fields = ["quantity", "syrup_type"]
+    def allowed_content_objects(self, content_type, ids):
+        """Function returning the ids, among the given ones, of the objects of a
+        content type which exist and which the connected beekeeper may relate
+        an intervention to. Hives must be their own, and harvests and syrup
+        distributions must not be used by another beekeeper's interventions.
+        Treatments are shared by everyone."""
+        model = content_type.model_class()
+        queryset = model.objects.filter(id__in=ids)
+        request = self.context.get("request")
+        if request is None:
+            pass
+        elif model is Hive:
+            queryset = queryset.filter(owner=request.user)
+        elif model in (Harvest, SyrupDistribution):
+            queryset = queryset.exclude(
+                Exists(
+                    Intervention.objects.filter(
+                        content_type=content_type, object_id=OuterRef("id")
+                    ).exclude(owner=request.user)
+                )
+            )
+        return set(queryset.values_list("id", flat=True))
 
-
-class TreatmentSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Treatment
-        fields = ["treatment_type"]
+    def validate(self, data):
+        """Checks the content object of the intervention, given by its content
+        type and id or, in a partial update, by one of them and the other of the
+        intervention."""
+        if "content_type" not in data and "object_id" not in data:
+            return data
+        if "content_type" in data:
+            content_type = data["content_type"]
+        else:
+            # Content types are cached by Django, so this costs no query
+            content_type_id = getattr(self.instance, "content_type_id", None)
+            content_type = content_type_id and ContentType.objects.get_for_id(
+                content_type_id
+            )
+        object_id = data.get("object_id", getattr(self.instance, "object_id", None))
+        if content_type is None or object_id is None:
+            return data
+        # A batch checks the content objects of all its items beforehand
+        checked = self.context.get("preloaded", {}).get("content_object", {})
+        allowed = checked.get((content_type.id, object_id))
+        if allowed is None:
+            allowed = bool(self.allowed_content_objects(content_type, [object_id]))
+        if not allowed:
+            raise serializers.ValidationError(
+                {"object_id": f"Invalid pk \"{object_id}\" - object does not exist."}
+            )
+        return data
 
 
 class UserSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = User
         fields = ["url", "username", "email", "groups"]
+
+
+class TreatmentDetailSerializer(serializers.Serializer):
+    """Checks the treatment type of a bulk intervention. TreatmentSerializer
+    can't be used as it rejects existing treatments, which are unique."""
+
+    treatment_type = serializers.ChoiceField(choices=Treatment.TREATMENTS)
+
+
+class SwarmingDetailSerializer(serializers.Serializer):
+    """Checks the child hive of a bulk artificial swarming."""
+
+    child_hive = serializers.IntegerField()
+
+
+class ApplyInterventionSerializer(serializers.Serializer):
+    """Validates a request to apply one intervention to all the hives of a
+    beeyard or to a selection of them. The detail payload is checked against
+    the fields required by the intervention type."""
+
+    intervention_type = serializers.ChoiceField(
+        choices=Intervention.INTERVENTION_TYPES, default=Intervention.HEALTH_CHECK
+    )
+    # IDs of the hives to apply the intervention to, all hives if left out
+    hives = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False
+    )
+    detail = serializers.DictField(required=False, default=dict)
+
+    def validate(self, data):
+        intervention_type = data["intervention_type"]
+        detail = data["detail"]
+
+        if intervention_type == Intervention.HARVEST:
+            detail_serializer = HarvestSerializer(data=detail)
+        elif intervention_type == Intervention.SYRUP_DISTRIBUTION:
+            detail_serializer = SyrupDistributionSerializer(data=detail)
+        elif intervention_type == Intervention.TREATMENT:
+            detail_serializer = TreatmentDetailSerializer(data=detail)
+        elif intervention_type == Intervention.ARTIFICIAL_SWARMING:
+            detail_serializer = SwarmingDetailSerializer(data=detail)
+        else:
+            data["detail"] = {}
+            return data
+
+        if not detail_serializer.is_valid():
+            raise serializers.ValidationError({"detail": detail_serializer.errors})
+        data["detail"] = detail_serializer.validated_data
+        return data
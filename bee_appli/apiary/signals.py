@@ -0,0 +1,148 @@
+# Third-party imports
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+# Local imports
+from .caching import invalidate_beeyards_fragment, invalidate_stats
+from .models import (
+    BeeYard,
+    Contamination,
+    Harvest,
+    Hive,
+    Intervention,
+    SyrupDistribution,
+)
+from .rollup import (
+    change_quantity,
+    rebuild_hives,
+    remove_interventions,
+    sync_interventions,
+)
+
+# Keeps the owner columns in line with BeeYard.beekeeper and removes the
+# cached pages showing data which changed.
+
+
+@receiver(pre_save, sender=Hive)
+@receiver(pre_save, sender=Intervention)
+@receiver(pre_save, sender=Contamination)
+def set_owner(sender, instance, **kwargs):
+    """Fills in the owner of a hive, intervention or contamination before it is saved."""
+    instance.set_owner()
+
+
+@receiver(post_save, sender=BeeYard)
+def beeyard_saved(sender, instance, created, **kwargs):
+    """Passes a change of beekeeper on to everything in the beeyard."""
+    # Objects which weren't loaded from the database are treated as changed
+    previous = getattr(instance, "_loaded_beekeeper_id", None)
+    changed = not hasattr(instance, "_loaded_beekeeper_id")
+    if not created and (changed or previous != instance.beekeeper_id):
+        instance.update_owner(instance.beekeeper_id)
+    instance._loaded_beekeeper_id = instance.beekeeper_id
+    invalidate_beeyards_fragment(instance.beekeeper_id, previous)
+    invalidate_stats(instance.beekeeper_id, previous)
+
+
+@receiver(pre_delete, sender=BeeYard)
+def beeyard_deleting(sender, instance, **kwargs):
+    """Hives left without a beeyard no longer belong to its beekeeper."""
+    instance.update_owner(None)
+
+
+@receiver(post_delete, sender=BeeYard)
+def beeyard_deleted(sender, instance, **kwargs):
+    invalidate_beeyards_fragment(instance.beekeeper_id)
+
+
+@receiver(post_save, sender=Hive)
+def hive_saved(sender, instance, created, **kwargs):
+    """Passes a change of owner, when a hive moves to a beeyard of another
+    beekeeper, on to the hive's interventions and contaminations, and a change
+    of beeyard on to its daily rollup."""
+    previous = getattr(instance, "_loaded_owner_id", None)
+    changed = not hasattr(instance, "_loaded_owner_id")
+    moved = getattr(instance, "_loaded_beeyard_id", None) != instance.beeyard_id
+    if not created and (changed or moved or previous != instance.owner_id):
+        instance.update_owner()
+    instance._loaded_owner_id = instance.owner_id
+    instance._loaded_beeyard_id = instance.beeyard_id
+    invalidate_beeyards_fragment(instance.owner_id, previous)
+    invalidate_stats(instance.owner_id, previous)
+
+
+@receiver(post_delete, sender=Hive)
+def hive_deleted(sender, instance, **kwargs):
+    invalidate_beeyards_fragment(instance.owner_id)
+    invalidate_stats(instance.owner_id)
+
+
+@receiver(post_save, sender=Intervention)
+@receiver(post_delete, sender=Intervention)
+@receiver(post_save, sender=Contamination)
+@receiver(post_delete, sender=Contamination)
+def stats_data_changed(sender, instance, **kwargs):
+    """Makes the cached statistics of the beekeeper out of date."""
+    invalidate_stats(instance.owner_id)
+
+
+@receiver(post_save, sender=Intervention)
+def intervention_saved(sender, instance, created, **kwargs):
+    """Adds the intervention to the daily rollup, or moves it there if its hive,
+    date, type or content object changed."""
+    if created or hasattr(instance, "_rollup_state"):
+        sync_interventions([instance])
+    else:
+        # What it counted for before the change isn't known
+        rebuild_hives([instance.hive_affected_id])
+
+
+def deleted_hive_ids(origin):
+    """Function returning the ids of the hives deleted by the call to delete()
+    on `origin`, a hive or a queryset. Their rollup rows are deleted along with
+    them, so their interventions needn't be taken out one by one. The ids are
+    read once per deletion and kept on the queryset."""
+    if isinstance(origin, Hive):
+        return {origin.pk}
+    if not isinstance(origin, QuerySet) or origin.model is not Hive:
+        return set()
+    if not hasattr(origin, "_deleted_hive_ids"):
+        origin._deleted_hive_ids = set(origin.values_list("id", flat=True))
+    return origin._deleted_hive_ids
+
+
+@receiver(pre_delete, sender=Intervention)
+def intervention_deleting(sender, instance, origin=None, **kwargs):
+    """Takes the intervention out of the daily rollup while its content object,
+    which may be deleted along with it, can still be read. Interventions
+    deleted along with their hive are left, as its rollup rows go as well."""
+    if instance.hive_affected_id not in deleted_hive_ids(origin):
+        remove_interventions([instance])
+
+
+@receiver(post_save, sender=Harvest)
+@receiver(post_save, sender=SyrupDistribution)
+def quantity_saved(sender, instance, created, **kwargs):
+    """A changed quantity is in the statistics and the daily rollup of the
+    interventions using it."""
+    if not created:
+        invalidate_stats(
+            *set(
+                Intervention.linked_to(instance).values_list("owner_id", flat=True)
+            )
+        )
+        if hasattr(instance, "_loaded_quantity"):
+            change_quantity(instance, instance.quantity - instance._loaded_quantity)
+    instance._loaded_quantity = instance.quantity
+
+
+@receiver(pre_delete, sender=Harvest)
+@receiver(pre_delete, sender=SyrupDistribution)
+def quantity_deleting(sender, instance, **kwargs):
+    """The interventions of a deleted quantity are kept, without it in their
+    statistics and daily rollup."""
+    invalidate_stats(
+        *set(Intervention.linked_to(instance).values_list("owner_id", flat=True))
+    )
+    change_quantity(instance, -instance.quantity)
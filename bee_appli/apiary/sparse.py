@@ -0,0 +1,105 @@
+# Third-party imports
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+# Query parameters choosing the fields of a response
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse_names(value):
+    """Function returning the set of names of a comma separated query parameter,
+    None if the parameter isn't in the request."""
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def unknown_names(names):
+    """Function returning the error message of names which can't be chosen."""
+    return [f'Unknown field "{name}".' for name in sorted(names)]
+
+
+class SparseFieldsMixin:
+    """Mixin for the serializers of a view letting the client choose the fields of
+    the response with ?fields=name,status. The nested fields listed in the
+    serializer's Meta.expandable_fields are then only returned when asked for
+    with ?expand=hives_detailed. Without either parameter every field is
+    returned, as before. Only the serializer given the request, not the ones
+    nested in it, is pruned, and only for reads. Unknown names are answered
+    with a 400 listing them."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in ("GET", "HEAD"):
+            return
+        requested = parse_names(request.query_params.get(FIELDS_PARAM))
+        expand = parse_names(request.query_params.get(EXPAND_PARAM))
+        if requested is None and expand is None:
+            return
+        expandable = set(getattr(self.Meta, "expandable_fields", []))
+        errors = {}
+        if requested is not None and requested - set(self.fields):
+            errors[FIELDS_PARAM] = unknown_names(requested - set(self.fields))
+        if expand is not None and expand - expandable:
+            errors[EXPAND_PARAM] = unknown_names(expand - expandable)
+        if errors:
+            raise ValidationError(errors)
+        if requested is None:
+            requested = set(self.fields) - expandable
+        keep = requested | (expand or set())
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    """Mixin for the viewsets using a SparseFieldsMixin serializer which builds the
+    queryset of the list and detail routes from the fields being returned: only
+    the columns read by those fields are selected, and the relations each field
+    needs are joined or prefetched, so data left out of the response is never
+    fetched."""
+
+    # Relations to join with select_related or to prefetch for each field of
+    # the serializer, ex: {"hives_detailed": ["hives"]}
+    select_related_fields = {}
+    prefetch_related_fields = {}
+    # Columns loaded whatever the fields, such as the ones checked by the
+    # permissions
+    required_columns = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in ("list", "retrieve"):
+            return queryset
+        return self.prune_queryset(queryset)
+
+    def prune_queryset(self, queryset):
+        """Function to restrict the queryset to what the serializer fields need."""
+        model = queryset.model
+        columns = {model._meta.pk.name, *self.required_columns}
+        select_related = []
+        prefetch_related = []
+        for name, field in self.get_serializer().fields.items():
+            select_related.extend(self.select_related_fields.get(name, []))
+            prefetch_related.extend(self.prefetch_related_fields.get(name, []))
+            try:
+                model_field = model._meta.get_field(field.source.split(".")[0])
+            except FieldDoesNotExist:
+                # Computed fields, such as SerializerMethodField
+                continue
+            if isinstance(model_field, GenericForeignKey):
+                columns.update((model_field.ct_field, model_field.fk_field))
+            elif model_field.concrete:
+                columns.add(model_field.name)
+        # The foreign keys the joins go through
+        columns.update(lookup.split("__")[0] for lookup in select_related)
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select_related:
+            queryset = queryset.select_related(*dict.fromkeys(select_related))
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch_related))
+        return queryset.only(*columns)
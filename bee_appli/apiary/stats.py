@@ -0,0 +1,195 @@
+# Third-party imports
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Case, Count, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import ExtractMonth, ExtractYear
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+# Local imports
+from .caching import STATS_TIMEOUT, stats_cache_key
+from .models import (
+    Contamination,
+    DailyInterventionRollup,
+    Intervention,
+    SyrupDistribution,
+    Treatment,
+)
+
+# Periods the statistics can be grouped by, with ?group=
+MONTH = "month"
+SEASON = "season"
+GROUPS = (MONTH, SEASON)
+
+# Seasons in the order of the year, December being the start of the winter of
+# the following year
+SEASONS = {1: "winter", 2: "spring", 3: "summer", 4: "autumn"}
+SEASON_MONTHS = {1: [12, 1, 2], 2: [3, 4, 5], 3: [6, 7, 8], 4: [9, 10, 11]}
+
+
+def period_annotations(field, group):
+    """Function returning the annotations giving the period of a date field as a
+    year and a part of that year, the month or the number of the season."""
+    if group == MONTH:
+        return {"year": ExtractYear(field), "part": ExtractMonth(field)}
+    return {
+        "year": Case(
+            When(**{f"{field}__month": 12}, then=ExtractYear(field) + 1),
+            default=ExtractYear(field),
+        ),
+        "part": Case(
+            *[
+                When(**{f"{field}__month__in": months}, then=Value(season))
+                for season, months in SEASON_MONTHS.items()
+            ]
+        ),
+    }
+
+
+def period_label(row, group):
+    """Function returning the name of the period of an aggregated row."""
+    if group == MONTH:
+        return f"{row['year']}-{row['part']:02d}"
+    return f"{row['year']}-{SEASONS[row['part']]}"
+
+
+def grouped(queryset, date_field, group, *fields, **aggregates):
+    """Function returning the rows of a GROUP BY query on the period of the date
+    field and the given fields."""
+    return (
+        queryset.annotate(**period_annotations(date_field, group))
+        .values("year", "part", *fields)
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+
+def get_stats(hive_lookup, object_id, group):
+    """Function returning the interventions by type, the honey harvested, the
+    syrup distributed by type, the treatments by type and the contaminations by
+    type of the hives found with `hive_lookup`, the path from a hive to the
+    object ("" for a hive itself), by period. The interventions and the honey
+    are summed from the daily rollup, a row per hive, day and type. The syrup
+    and treatment types are read from the content objects of the interventions
+    by a subquery on their object id, so each total is one aggregate query."""
+    hive_filter = f"__{hive_lookup}" if hive_lookup else ""
+    interventions = Intervention.objects.filter(
+        **{f"hive_affected{hive_filter}": object_id}
+    )
+    # The rollup rows have the beeyard of their hive
+    rollup = grouped(
+        DailyInterventionRollup.objects.filter(**{hive_lookup or "hive": object_id}),
+        "day",
+        group,
+        "intervention_type",
+        total=Sum("count"),
+        honey=Sum("honey"),
+    )
+    syrup_distributions = SyrupDistribution.objects.filter(id=OuterRef("object_id"))
+    syrup = grouped(
+        interventions.filter(
+            content_type=ContentType.objects.get_for_model(SyrupDistribution)
+        ).annotate(
+            syrup_type=Subquery(syrup_distributions.values("syrup_type")),
+            quantity=Subquery(syrup_distributions.values("quantity")),
+        ),
+        "date",
+        group,
+        "syrup_type",
+        total=Sum("quantity"),
+    )
+    treatments = grouped(
+        interventions.filter(
+            content_type=ContentType.objects.get_for_model(Treatment)
+        ).annotate(
+            treatment_type=Subquery(
+                Treatment.objects.filter(id=OuterRef("object_id")).values(
+                    "treatment_type"
+                )
+            )
+        ),
+        "date",
+        group,
+        "treatment_type",
+        total=Count("id"),
+    )
+    contaminations = grouped(
+        Contamination.objects.filter(**{f"hive{hive_filter}": object_id}),
+        "date",
+        group,
+        "type",
+        total=Count("id"),
+    )
+
+    periods = {}
+
+    def add(row, key, name=None, value=None):
+        """Function to add an aggregated row to its period and the totals."""
+        period = periods.setdefault(
+            (row["year"], row["part"]),
+            {
+                "period": period_label(row, group),
+                "interventions": {},
+                "honey": 0,
+                "syrup": {},
+                "treatments": {},
+                "contaminations": {},
+            },
+        )
+        value = row["total"] if value is None else value
+        for target in (period, totals):
+            if name is None:
+                target[key] += value
+            else:
+                target[key][name] = target[key].get(name, 0) + value
+
+    totals = {
+        "interventions": {},
+        "honey": 0,
+        "syrup": {},
+        "treatments": {},
+        "contaminations": {},
+    }
+    for row in rollup:
+        add(row, "interventions", row["intervention_type"])
+        if row["intervention_type"] == Intervention.HARVEST:
+            add(row, "honey", value=row["honey"])
+    # Interventions whose content object was deleted have no type
+    for row in syrup:
+        if row["syrup_type"] is not None:
+            add(row, "syrup", row["syrup_type"])
+    for row in treatments:
+        if row["treatment_type"] is not None:
+            add(row, "treatments", row["treatment_type"])
+    for row in contaminations:
+        add(row, "contaminations", row["type"])
+    return {
+        "group": group,
+        "periods": [periods[key] for key in sorted(periods)],
+        "totals": totals,
+    }
+
+
+class StatsMixin:
+    """Mixin adding a stats route to the detail of a viewset, giving the
+    statistics of the hive or of the hives of the beeyard. They are cached for
+    each beekeeper until their data changes."""
+
+    # Path from a hive to the objects of the viewset, "" for hives
+    stats_hive_lookup = ""
+
+    @action(detail=True, methods=["GET"])
+    def stats(self, request, pk):
+        """Function returning the statistics of the object by month, or by season
+        with ?group=season."""
+        group = request.query_params.get("group", MONTH)
+        if group not in GROUPS:
+            raise ValidationError({"group": f"Must be one of: {', '.join(GROUPS)}."})
+        obj = self.get_object()
+        key = stats_cache_key(request.user.id, self.basename, obj.pk, group)
+        data = cache.get(key)
+        if data is None:
+            data = get_stats(self.stats_hive_lookup, obj.pk, group)
+            cache.set(key, data, STATS_TIMEOUT)
+        return Response(data)
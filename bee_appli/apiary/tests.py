@@ -1,11 +1,55 @@
+# Standard library imports
+import os
+import tempfile
+from io import StringIO
+
 # Third-party imports
+import msgpack
+import orjson
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.test import Client, LiveServerTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
-from unittest.mock import Mock
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from unittest.mock import Mock, patch
 
 # Local imports
-from .models import BeeYard, Contamination, Harvest, Hive
+from .fastpath import PLANS, FastListMixin
+from .models import (
+    BeeYard,
+    Contamination,
+    DailyInterventionRollup,
+    Harvest,
+    Hive,
+    Intervention,
+    SyrupDistribution,
+    Treatment,
+)
+from .permissions import IsKeeper
+from .rollup import rebuild_hives
+from public_api.models import BeekeeperSearchTerm, PublicContact
+from public_api.caching import clear_response_cache, get_cache_stats
+from public_api.caching import get_response_cache
+from public_api.serializers import NOT_AUTHORIZED
+from public_api.versions import BEEKEEPERS, HIVES, get_version
+
+# The public API responses are cached in a directory of their own during the
+# tests, so clearing them doesn't wipe the cache of a deployment on the host
+PUBLIC_API_CACHE_DIR = tempfile.TemporaryDirectory()
+TEST_CACHES = {
+    **settings.CACHES,
+    "public_api": {
+        **settings.CACHES["public_api"],
+        "LOCATION": PUBLIC_API_CACHE_DIR.name,
+    },
+}
 
 
 ##### Models Tests #####
@@ -86,6 +130,156 @@ class BeeYardAccessTest(TestCase):
         self.assertContains(resp, "TestYard1")
 
 
+    def test_beeyard_page_cached(self):
+        """Test that the beeyards page is built with one query, then cached until
+        the user's hives change."""
+        cache.clear()
+        self.user = User.objects.create_user(username="TestUser8", password="TestPW123")
+        self.client.force_login(self.user)
+        for i in range(3):
+            test_yard = BeeYard.objects.create(name=f"Yard{i}", beekeeper=self.user)
+            for j in range(3):
+                Hive.objects.create(
+                    status="active",
+                    species="black_bee",
+                    beeyard=test_yard,
+                    queen_year=2022,
+                    name=f"Hive_{i}_{j}",
+                )
+        url = reverse("show_beeyards")
+        # Two queries for the session and the user, one for the beeyards and hives
+        with self.assertNumQueries(3):
+            resp = self.client.get(url)
+        self.assertContains(resp, "Hive_2_2")
+        # The page is now cached
+        with self.assertNumQueries(2):
+            resp = self.client.get(url)
+        self.assertContains(resp, "Hive_2_2")
+
+        # Renaming a hive removes the cached page
+        hive = Hive.objects.get(name="Hive_2_2")
+        hive.name = "Renamed"
+        hive.save()
+        resp = self.client.get(url)
+        self.assertContains(resp, "Renamed")
+        self.assertNotContains(resp, "Hive_2_2")
+
+
+class OwnerTest(TestCase):
+    """Tests that the owner of hives, interventions and contaminations follows
+    the beekeeper of their beeyard."""
+
+    def setUp(self):
+        self.keeper = User.objects.create_user(username="Keeper", password="TestPW123")
+        self.other_keeper = User.objects.create_user(
+            username="OtherKeeper", password="TestPW123"
+        )
+        self.test_yard = BeeYard.objects.create(name="Yard", beekeeper=self.keeper)
+        self.hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=self.test_yard,
+            queen_year=2022,
+            name="A",
+        )
+        self.intervention = Intervention.objects.create(
+            intervention_type="health_check", hive_affected=self.hive
+        )
+        self.contamination = Contamination.objects.create(
+            type="illness", hive=self.hive
+        )
+
+    def assertOwner(self, owner):
+        """Checks the owner of the hive and of its intervention and contamination."""
+        for obj in (self.hive, self.intervention, self.contamination):
+            obj.refresh_from_db()
+            self.assertEqual(obj.owner, owner)
+
+    def test_owner_on_creation(self):
+        self.assertOwner(self.keeper)
+
+    def test_hive_moved_to_another_keeper(self):
+        other_yard = BeeYard.objects.create(name="Other", beekeeper=self.other_keeper)
+        hive = Hive.objects.get(id=self.hive.id)
+        hive.beeyard = other_yard
+        hive.save()
+        self.assertOwner(self.other_keeper)
+
+    def test_beeyard_given_to_another_keeper(self):
+        beeyard = BeeYard.objects.get(id=self.test_yard.id)
+        beeyard.beekeeper = self.other_keeper
+        beeyard.save()
+        self.assertOwner(self.other_keeper)
+
+    def test_beeyard_deleted(self):
+        BeeYard.objects.filter(id=self.test_yard.id).delete()
+        self.assertOwner(None)
+
+
+class DetailQueryCountTest(TestCase):
+    """Tests that the ownership checks on the detail routes don't run any queries."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser7", password="TestPW123")
+        self.client.force_login(self.user)
+        self.test_yard = BeeYard.objects.create(name="TestYard7", beekeeper=self.user)
+        self.hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=self.test_yard,
+            queen_year=2022,
+            name="A",
+        )
+        self.intervention = Intervention.objects.create(
+            intervention_type="health_check", hive_affected=self.hive
+        )
+        self.contamination = Contamination.objects.create(
+            type="illness", hive=self.hive
+        )
+        # Load the content types so they don't count as queries
+        ContentType.objects.get_for_model(Intervention)
+
+    def test_permission_without_queries(self):
+        """Test that IsKeeper only reads columns of the object it is given."""
+        request = Mock()
+        request.user = self.user
+        for model, obj in (
+            (BeeYard, self.test_yard),
+            (Hive, self.hive),
+            (Intervention, self.intervention),
+            (Contamination, self.contamination),
+        ):
+            loaded = model.objects.get(id=obj.id)
+            with self.assertNumQueries(0):
+                self.assertTrue(IsKeeper().has_object_permission(request, None, loaded))
+
+    def test_detail_query_counts(self):
+        """Test the number of queries of each detail route: two for the session and
+        the user, one for the object, then what the serializer needs."""
+        routes = [
+            # One more query for the hives of the beeyard
+            (f"/beeyards/{self.test_yard.id}/", 4),
+            (f"/hives/{self.hive.id}/", 3),
+            (f"/interventions/{self.intervention.id}/", 3),
+            (f"/contaminations/{self.contamination.id}/", 3),
+        ]
+        for url, query_count in routes:
+            with self.assertNumQueries(query_count):
+                get_req = self.client.get(url)
+            self.assertEqual(get_req.status_code, 200)
+
+    def test_other_keeper_detail(self):
+        """Test that another beekeeper's objects are not found."""
+        other_user = User.objects.create_user(username="Other7", password="TestPW123")
+        self.client.force_login(other_user)
+        with self.assertNumQueries(3):
+            get_req = self.client.get(f"/hives/{self.hive.id}/")
+        self.assertEqual(get_req.status_code, 404)
+        delete_req = self.client.delete(f"/interventions/{self.intervention.id}/")
+        self.assertEqual(delete_req.status_code, 404)
+        self.assertTrue(Intervention.objects.filter(id=self.intervention.id).exists())
+
+
 class BeeYardActionTest(TestCase):
     """Tests to make sure the action function works."""
 
@@ -114,6 +308,490 @@ class BeeYardActionTest(TestCase):
         # Send a post request with beeyard ID and check the result.
         post_req = self.client.post(url, {})
         self.assertEqual(post_req.status_code, 201)
+        self.assertEqual(len(post_req.json()["interventions"]), 5)
+        self.assertEqual(
+            Intervention.objects.filter(
+                hive_affected__beeyard=test_yard, intervention_type="health_check"
+            ).count(),
+            5,
+        )
+
+    def apply_to_yard(self, hive_count, data):
+        """Function to make a beeyard with the given number of hives and
+        apply an intervention to all of them."""
+        self.user = User.objects.create_user(
+            username="TestUser" + str(hive_count), password="TestPW123"
+        )
+        self.client.force_login(self.user)
+        test_yard = BeeYard.objects.create(name="BulkYard", beekeeper=self.user)
+        Hive.objects.bulk_create(
+            Hive(
+                status="active",
+                species="black_bee",
+                beeyard=test_yard,
+                owner=self.user,
+                queen_year=2022,
+                name="Hive_" + str(i),
+            )
+            for i in range(hive_count)
+        )
+        url = f"/beeyards/{test_yard.id}/apply_intervention/"
+        return self.client.post(url, data, content_type="application/json")
+
+    def test_apply_harvest_to_yard(self):
+        """Test that a harvest is logged for every hive with its own quantity row."""
+        data = {"intervention_type": "harvest", "detail": {"quantity": 2.5}}
+        post_req = self.apply_to_yard(4, data)
+        self.assertEqual(post_req.status_code, 201)
+        interventions = post_req.json()["interventions"]
+        self.assertEqual(len(interventions), 4)
+        self.assertEqual(interventions[0]["content_object"], {"quantity": 2.5})
+        self.assertEqual(Harvest.objects.count(), 4)
+
+    def test_apply_intervention_query_count(self):
+        """Test that the number of queries does not depend on the number of hives."""
+        ContentType.objects.clear_cache()
+        data = {
+            "intervention_type": "syrup_distribution",
+            "detail": {"quantity": 1.5, "syrup_type": "nectar"},
+        }
+        small_yard = self.apply_to_yard(2, data).json()
+        # Content types are cached after the first lookup
+        ContentType.objects.clear_cache()
+        big_yard = self.apply_to_yard(50, data).json()
+        self.assertEqual(len(big_yard["interventions"]), 50)
+        self.assertEqual(small_yard["query_count"], big_yard["query_count"])
+
+    def test_apply_intervention_invalid_detail(self):
+        """Test that a treatment without a valid type is refused."""
+        data = {"intervention_type": "treatment", "detail": {"treatment_type": "x"}}
+        post_req = self.apply_to_yard(2, data)
+        self.assertEqual(post_req.status_code, 400)
+        self.assertFalse(Intervention.objects.exists())
+
+
+class BatchRequestTest(TestCase):
+    """Tests for creating and updating several hives and interventions in one request."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser5", password="TestPW123")
+        self.client.force_login(self.user)
+        self.test_yard = BeeYard.objects.create(name="TestYard5", beekeeper=self.user)
+        self.hives = [
+            Hive.objects.create(
+                status="active",
+                species="black_bee",
+                beeyard=self.test_yard,
+                queen_year=2022,
+                name="Hive_" + str(i),
+            )
+            for i in range(3)
+        ]
+        # A hive belonging to someone else
+        other_user = User.objects.create_user(username="Other", password="TestPW123")
+        other_yard = BeeYard.objects.create(name="OtherYard", beekeeper=other_user)
+        self.other_hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=other_yard,
+            queen_year=2022,
+            name="Other",
+        )
+
+    def post_interventions(self, hive_ids):
+        data = [
+            {"intervention_type": "health_check", "hive_affected": hive_id}
+            for hive_id in hive_ids
+        ]
+        return self.client.post("/interventions/", data, content_type="application/json")
+
+    def test_batch_create_interventions(self):
+        """Test that a list of interventions is created with one result per item."""
+        post_req = self.post_interventions([hive.id for hive in self.hives])
+        self.assertEqual(post_req.status_code, 201)
+        results = post_req.json()
+        self.assertEqual([result["status"] for result in results], [201, 201, 201])
+        self.assertEqual(results[1]["data"]["hive_affected"], self.hives[1].id)
+        self.assertEqual(Intervention.objects.count(), 3)
+
+    def test_batch_create_refuses_other_keepers_hives(self):
+        """Test that items on hives of another beekeeper are refused without
+        blocking the rest of the batch."""
+        post_req = self.post_interventions([self.hives[0].id, self.other_hive.id])
+        self.assertEqual(post_req.status_code, 207)
+        results = post_req.json()
+        self.assertEqual(results[0]["status"], 201)
+        self.assertEqual(results[1]["status"], 400)
+        self.assertIn("hive_affected", results[1]["errors"])
+        self.assertEqual(Intervention.objects.count(), 1)
+
+    def test_batch_create_query_count(self):
+        """Test that the number of queries does not depend on the size of the batch."""
+        with CaptureQueriesContext(connection) as small_batch:
+            self.post_interventions([self.hives[0].id])
+        with CaptureQueriesContext(connection) as big_batch:
+            self.post_interventions([hive.id for hive in self.hives] * 20)
+        self.assertEqual(len(small_batch), len(big_batch))
+
+    def test_content_object_must_be_allowed(self):
+        """Test that an intervention can only relate to the keeper's own hives
+        and to the types of objects interventions relate to."""
+        hive_type = ContentType.objects.get_for_model(Hive)
+        user_type = ContentType.objects.get_for_model(User)
+
+        def post(content_type, object_id):
+            data = {
+                "intervention_type": "artificial_swarming",
+                "hive_affected": self.hives[0].id,
+                "content_type": content_type.id,
+                "object_id": object_id,
+            }
+            return self.client.post(
+                "/interventions/", data, content_type="application/json"
+            )
+
+        response = post(hive_type, self.other_hive.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("object_id", response.json())
+        response = post(hive_type, 0)
+        self.assertEqual(response.status_code, 400)
+        response = post(user_type, self.user.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("content_type", response.json())
+        response = post(hive_type, self.hives[1].id)
+        self.assertEqual(response.status_code, 201)
+        # A partial update is checked against the content type it keeps
+        intervention_id = Intervention.objects.get().id
+        response = self.client.patch(
+            f"/interventions/{intervention_id}/",
+            {"object_id": self.other_hive.id},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_quantity_of_another_keeper(self):
+        """Test that a harvest used by another beekeeper's intervention can't be
+        used, while an unused one and the keeper's own can."""
+        harvest_type = ContentType.objects.get_for_model(Harvest)
+        other_harvest, free_harvest = [
+            Harvest.objects.create(quantity=quantity) for quantity in (7, 2)
+        ]
+        Intervention.objects.create(
+            intervention_type="harvest",
+            hive_affected=self.other_hive,
+            content_object=other_harvest,
+        )
+
+        def post(harvest):
+            data = {
+                "intervention_type": "harvest",
+                "hive_affected": self.hives[0].id,
+                "content_type": harvest_type.id,
+                "object_id": harvest.id,
+            }
+            return self.client.post(
+                "/interventions/", data, content_type="application/json"
+            )
+
+        response = post(other_harvest)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("object_id", response.json())
+        self.assertEqual(post(free_harvest).status_code, 201)
+        self.assertEqual(post(free_harvest).status_code, 201)
+        # Nor in a batch
+        response = self.client.post(
+            "/interventions/",
+            [
+                {
+                    "intervention_type": "harvest",
+                    "hive_affected": self.hives[0].id,
+                    "content_type": harvest_type.id,
+                    "object_id": harvest.id,
+                }
+                for harvest in (free_harvest, other_harvest)
+            ],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result["status"] for result in response.json()], [201, 400]
+        )
+
+    def test_batch_content_objects_query_count(self):
+        """Test that the content objects of a batch are checked with a number
+        of queries which doesn't depend on its size."""
+        hive_type = ContentType.objects.get_for_model(Hive).id
+
+        def post(hives):
+            data = [
+                {
+                    "intervention_type": "artificial_swarming",
+                    "hive_affected": self.hives[0].id,
+                    "content_type": hive_type,
+                    "object_id": hive.id,
+                }
+                for hive in hives
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    "/interventions/", data, content_type="application/json"
+                )
+            return response, len(queries)
+
+        # The first request fills Django's cache of the content types
+        post(self.hives[1:2])
+        response, small_batch = post([self.hives[1], self.other_hive])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result["status"] for result in response.json()], [201, 400])
+        response, big_batch = post([*self.hives[1:], self.other_hive] * 10)
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(small_batch, big_batch)
+
+    def test_batch_create_hives_requires_beeyard(self):
+        """Test that hives created in a batch must be placed in one of the keeper's beeyards."""
+        data = [
+            {"name": "New", "status": "active", "species": "black_bee"},
+            {
+                "name": "New2",
+                "status": "active",
+                "species": "black_bee",
+                "beeyard": self.test_yard.id,
+            },
+        ]
+        post_req = self.client.post("/hives/", data, content_type="application/json")
+        self.assertEqual(post_req.status_code, 207)
+        self.assertEqual([result["status"] for result in post_req.json()], [400, 201])
+        self.assertTrue(Hive.objects.filter(name="New2", beeyard=self.test_yard).exists())
+
+    def test_bulk_update_hives(self):
+        """Test that several hives are updated at once and that hives of other
+        beekeepers are not found."""
+        data = [
+            {"id": self.hives[0].id, "status": "destroyed"},
+            {"id": self.hives[1].id, "name": "Renamed"},
+            {"id": self.other_hive.id, "status": "destroyed"},
+        ]
+        patch_req = self.client.patch("/hives/", data, content_type="application/json")
+        self.assertEqual(patch_req.status_code, 207)
+        results = patch_req.json()
+        self.assertEqual([result["status"] for result in results], [200, 200, 404])
+        self.assertEqual(results[1]["data"]["name"], "Renamed")
+        self.hives[0].refresh_from_db()
+        self.other_hive.refresh_from_db()
+        self.assertEqual(self.hives[0].status, "destroyed")
+        self.assertEqual(self.other_hive.status, "active")
+
+
+class InterventionListTest(TestCase):
+    """Tests for reading interventions with the details of their content object."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser6", password="TestPW123")
+        self.client.force_login(self.user)
+        test_yard = BeeYard.objects.create(name="TestYard6", beekeeper=self.user)
+        self.hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=test_yard,
+            queen_year=2022,
+            name="Parent",
+        )
+        self.child_hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=test_yard,
+            queen_year=2022,
+            name="Child",
+        )
+        self.treatment = Treatment.objects.create(treatment_type="apivar")
+
+    def add_interventions(self):
+        """Function to add one intervention of each type with a content object."""
+        Intervention.objects.create(
+            intervention_type="harvest",
+            hive_affected=self.hive,
+            content_object=Harvest.objects.create(quantity=3),
+        )
+        Intervention.objects.create(
+            intervention_type="syrup_distribution",
+            hive_affected=self.hive,
+            content_object=SyrupDistribution.objects.create(
+                quantity=1, syrup_type="nectar"
+            ),
+        )
+        Intervention.objects.create(
+            intervention_type="treatment",
+            hive_affected=self.hive,
+            content_object=self.treatment,
+        )
+        Intervention.objects.create(
+            intervention_type="artificial_swarming",
+            hive_affected=self.hive,
+            content_object=self.child_hive,
+        )
+
+    def test_list_query_count(self):
+        """Test that the number of queries for a page does not depend on the
+        number of interventions in it."""
+        self.add_interventions()
+        with CaptureQueriesContext(connection) as small_page:
+            get_req = self.client.get("/interventions/")
+        self.assertEqual(get_req.json()["count"], 4)
+        self.add_interventions()
+        with CaptureQueriesContext(connection) as full_page:
+            get_req = self.client.get("/interventions/")
+        self.assertEqual(len(get_req.json()["results"]), 8)
+        self.assertEqual(len(small_page), len(full_page))
+
+    def test_retrieve_content_object(self):
+        """Test that a single intervention includes the details of its content object."""
+        self.add_interventions()
+        swarming = Intervention.objects.get(intervention_type="artificial_swarming")
+        get_req = self.client.get(f"/interventions/{swarming.id}/")
+        self.assertEqual(get_req.status_code, 200)
+        self.assertEqual(get_req.json()["content_object"]["name"], "Child")
+
+    def filter_interventions(self, query):
+        """Function returning the intervention types found by a filter and the
+        number of queries used to list them."""
+        with CaptureQueriesContext(connection) as queries:
+            get_req = self.client.get("/interventions/?" + query)
+        self.assertEqual(get_req.status_code, 200)
+        found = sorted(
+            result["intervention_type"] for result in get_req.json()["results"]
+        )
+        return found, len(queries)
+
+    def test_filters_on_content_object(self):
+        """Test the filters on the details of the content objects."""
+        self.add_interventions()
+        self.assertEqual(self.filter_interventions("treatment_type=api")[0], ["treatment"])
+        self.assertEqual(
+            self.filter_interventions("syrup_type=nect")[0], ["syrup_distribution"]
+        )
+        self.assertEqual(self.filter_interventions("harvest_gt=2")[0], ["harvest"])
+        self.assertEqual(self.filter_interventions("harvest_lt=2")[0], [])
+        self.assertEqual(
+            self.filter_interventions("syrup_lt=2")[0], ["syrup_distribution"]
+        )
+        self.assertEqual(self.filter_interventions("syrup_gt=2")[0], [])
+        self.assertEqual(
+            self.filter_interventions("detail=i")[0],
+            ["artificial_swarming", "treatment"],
+        )
+
+    def test_filters_check_content_type(self):
+        """Test that a harvest doesn't match a treatment filter because it has
+        the same ID as a treatment."""
+        harvest = Harvest.objects.create(quantity=1, id=self.treatment.id)
+        Intervention.objects.create(
+            intervention_type="harvest", hive_affected=self.hive, content_object=harvest
+        )
+        self.assertEqual(self.filter_interventions("treatment_type=api")[0], [])
+
+    def test_filters_query_count(self):
+        """Test that filtering doesn't run a query per intervention."""
+        self.add_interventions()
+        found, few_interventions = self.filter_interventions("harvest_gt=1")
+        for i in range(10):
+            self.add_interventions()
+        found, many_interventions = self.filter_interventions("harvest_gt=1")
+        self.assertEqual(len(found), 10)
+        self.assertEqual(few_interventions, many_interventions)
+
+
+class InterventionTimelineTest(TestCase):
+    """Tests for the template view listing the interventions and contaminations of a hive."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser9", password="TestPW123")
+        self.client.force_login(self.user)
+        test_yard = BeeYard.objects.create(name="TestYard9", beekeeper=self.user)
+        self.hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=test_yard,
+            queen_year=2022,
+            name="Timeline",
+        )
+        self.url = f"/apiary/interventions/?hive={self.hive.id}"
+
+    def add_history(self, count):
+        """Function to add a harvest, a treatment and a contamination `count` times."""
+        treatment = Treatment.objects.get_or_create(treatment_type="apivar")[0]
+        for i in range(count):
+            Intervention.objects.create(
+                intervention_type="harvest",
+                hive_affected=self.hive,
+                content_object=Harvest.objects.create(quantity=i + 1),
+            )
+            Intervention.objects.create(
+                intervention_type="treatment",
+                hive_affected=self.hive,
+                content_object=treatment,
+            )
+            Contamination.objects.create(type="parasite", hive=self.hive)
+
+    def test_hive_without_interventions(self):
+        """Test that a hive with no history shows an empty timeline."""
+        get_req = self.client.get(self.url)
+        self.assertEqual(get_req.status_code, 200)
+        self.assertContains(get_req, "No interventions recorded")
+
+    def test_timeline_pages(self):
+        """Test that following the pages shows every entry once, with their details."""
+        self.add_history(12)
+        entries = []
+        params = {"hive": self.hive.id}
+        pages = 0
+        while params:
+            get_req = self.client.get("/apiary/interventions/", params)
+            self.assertEqual(get_req.status_code, 200)
+            entries += get_req.context["interventions"]
+            next_page = get_req.context.get("next_page")
+            params = {"hive": self.hive.id, "after": next_page} if next_page else None
+            pages += 1
+        self.assertEqual(pages, 2)
+        self.assertEqual(len(entries), 36)
+        self.assertEqual(
+            sorted(entry["quantity"] for entry in entries if "quantity" in entry),
+            list(range(1, 13)),
+        )
+        self.assertTrue(
+            all(
+                entry["treatment_type"] == "apivar"
+                for entry in entries
+                if entry["intervention_type"] == "treatment"
+            )
+        )
+
+    def test_timeline_query_count(self):
+        """Test that the details of a page are loaded with one query per type."""
+        self.add_history(1)
+        with CaptureQueriesContext(connection) as short_history:
+            self.client.get(self.url)
+        self.add_history(10)
+        with CaptureQueriesContext(connection) as long_history:
+            self.client.get(self.url)
+        self.assertEqual(len(short_history), len(long_history))
+
+    def test_full_history_streamed(self):
+        """Test that the full history is streamed with every entry."""
+        self.add_history(30)
+        get_req = self.client.get(self.url + "&full=1")
+        self.assertEqual(get_req.status_code, 200)
+        self.assertTrue(get_req.streaming)
+        page = b"".join(get_req.streaming_content).decode()
+        self.assertEqual(page.count("<strong> harvest </strong>"), 30)
+        self.assertEqual(page.count("<strong> contamination </strong>"), 30)
+        self.assertIn("Return to bee yard list", page)
+
+    def test_other_keepers_hive(self):
+        """Test that another beekeeper can't see the hive's timeline."""
+        other_user = User.objects.create_user(username="Other9", password="TestPW123")
+        self.client.force_login(other_user)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url + "&full=1").status_code, 401)
 
 
 class TestContaminationCRUD(TestCase):
@@ -205,3 +883,1736 @@ class TestContaminationCRUD(TestCase):
         delete_req = self.client.delete(url)
         # Test that it is successfully deleted.
         self.assertEqual(delete_req.status_code, 204)
+
+
+class ExplainRoutesTest(TestCase):
+    """Test for the command checking the query plans of the private API."""
+
+    def test_explain_routes(self):
+        """Test that every route is explained and the seeded data is rolled back."""
+        out = StringIO()
+        call_command(
+            "explainroutes", keepers=3, yards=1, hives=2, interventions=4, stdout=out
+        )
+        self.assertIn("GET /interventions/", out.getvalue())
+        self.assertIn("GET /apiary/", out.getvalue())
+        self.assertFalse(Hive.objects.exists())
+
+
+class KeysetPaginationTest(TestCase):
+    """Tests for the cursor pagination of the private API."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser9", password="TestPW123")
+        self.client.force_login(self.user)
+        test_yard = BeeYard.objects.create(name="TestYard9", beekeeper=self.user)
+        self.hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=test_yard,
+            queen_year=2022,
+            name="Keyset",
+        )
+        # Several contaminations on the same day, so the id breaks the ties.
+        # The date is set with update() as it is filled in on save.
+        for day in (1, 2, 3):
+            ids = [
+                Contamination.objects.create(type="parasite", hive=self.hive).id
+                for i in range(9)
+            ]
+            Contamination.objects.filter(id__in=ids).update(date=f"2023-05-0{day}")
+
+    def walk(self, url):
+        """Function to follow the next links from a url and return every page."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            url = response.json()["next"]
+        return pages
+
+    def test_walk_contaminations(self):
+        """Test that the pages hold every contamination once, newest first."""
+        pages = self.walk("/contaminations/?cursor=")
+        self.assertEqual([len(page["results"]) for page in pages], [10, 10, 7])
+        self.assertNotIn("count", pages[0])
+        self.assertIsNone(pages[0]["previous"])
+        dates = [row["date"] for page in pages for row in page["results"]]
+        expected = Contamination.objects.order_by("-date", "-id")
+        self.assertEqual(dates, [str(row.date) for row in expected])
+
+    def test_previous_link(self):
+        """Test that the previous link of a page leads back to the page before."""
+        first, second, third = self.walk("/contaminations/?cursor=")
+        back = self.client.get(third["previous"]).json()
+        self.assertEqual(back["results"], second["results"])
+        self.assertIsNotNone(back["next"])
+        back = self.client.get(back["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNone(back["previous"])
+
+    def test_interventions_with_filter(self):
+        """Test that the cursor keeps the filters and the page size of the request."""
+        for i in range(5):
+            Intervention.objects.create(
+                intervention_type="health_check", hive_affected=self.hive
+            )
+        Intervention.objects.create(
+            intervention_type="destruction_queen_cells", hive_affected=self.hive
+        )
+        pages = self.walk(
+            "/interventions/?cursor=&size=2&intervention_type=health_check"
+        )
+        self.assertEqual([len(page["results"]) for page in pages], [2, 2, 1])
+        self.assertIn("size=2", pages[0]["next"])
+        self.assertIn("intervention_type=health_check", pages[0]["next"])
+
+    def test_hives_by_id(self):
+        """Test that hives are paginated by id and the query has no OFFSET or COUNT."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/hives/?cursor=")
+        self.assertEqual(response.json()["results"][0]["name"], "Keyset")
+        self.assertIsNone(response.json()["next"])
+        for query in queries:
+            self.assertNotIn("OFFSET", query["sql"])
+            self.assertNotIn("COUNT(", query["sql"])
+
+    def test_page_numbers_unchanged(self):
+        """Test that requests without a cursor are still paginated by page number."""
+        response = self.client.get("/contaminations/?page=2")
+        self.assertEqual(response.json()["count"], 27)
+        self.assertEqual(len(response.json()["results"]), 10)
+        self.assertIn("page=3", response.json()["next"])
+
+    def test_invalid_cursor(self):
+        """Test that a cursor which wasn't made by the API answers 404."""
+        response = self.client.get("/contaminations/?cursor=bm90IGEgY3Vyc29y")
+        self.assertEqual(response.status_code, 404)
+
+    def test_benchmark_command(self):
+        """Test that the benchmark reads the deep page both ways and rolls back."""
+        out = StringIO()
+        call_command("benchpagination", page=3, hives=2, repeat=1, stdout=out)
+        self.assertIn("/interventions/?page=3", out.getvalue())
+        self.assertIn("/contaminations/?cursor=", out.getvalue())
+        self.assertEqual(Contamination.objects.count(), 27)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PublicAPIQueryCountTest(TestCase):
+    """Tests that the public lists cost the same number of queries for any page."""
+
+    def setUp(self):
+        self.public_keeper = User.objects.create_user(
+            username="Public10", password="TestPW123", first_name="Maya"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            PublicContact.objects.create(public_beekeeper_info=self.public_keeper)
+        self.private_keeper = User.objects.create_user(
+            username="Private10", password="TestPW123"
+        )
+        self.add_hives(2)
+        clear_response_cache()
+
+    def add_hives(self, count):
+        """Function to add a beeyard with hives for each beekeeper."""
+        # The versions of the public collections are raised on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for keeper in (self.public_keeper, self.private_keeper):
+                test_yard = BeeYard.objects.create(name="TestYard10", beekeeper=keeper)
+                for i in range(count):
+                    Hive.objects.create(
+                        status="active",
+                        species="black_bee",
+                        beeyard=test_yard,
+                        queen_year=2022,
+                        name=f"Hive {i}",
+                    )
+
+    def test_hive_list_queries(self):
+        """Test that a page of hives costs a query for the version of the list,
+        a count and one query for the page."""
+        with self.assertNumQueries(3):
+            self.client.get("/public_api/hives/")
+        self.add_hives(3)
+        with self.assertNumQueries(3):
+            response = self.client.get("/public_api/hives/")
+        details = [hive["beekeeper_detail"] for hive in response.json()["results"]]
+        public = [detail for detail in details if "public_beekeeper_info" in detail]
+        self.assertEqual(len(public), 5)
+        self.assertEqual(
+            public[0]["public_beekeeper_info_details"]["first_name"], "Maya"
+        )
+        self.assertEqual(details.count(NOT_AUTHORIZED), 5)
+
+    def test_beeyard_list_queries(self):
+        """Test that a page of beeyards costs a query for the version of the list,
+        a count, one query for the page and one for the hives of the page."""
+        with self.assertNumQueries(4):
+            self.client.get("/public_api/beeyards/")
+        self.add_hives(3)
+        with self.assertNumQueries(4):
+            response = self.client.get("/public_api/beeyards/")
+        self.assertEqual(len(response.json()["results"]), 4)
+
+    def test_hive_without_beeyard(self):
+        """Test that the beekeeper of a hive outside any beeyard isn't shown."""
+        hive = Hive.objects.create(
+            status="pending", species="black_bee", queen_year=2022, name="Alone"
+        )
+        response = self.client.get(f"/public_api/hives/{hive.id}/")
+        self.assertEqual(response.json()["beekeeper_detail"], NOT_AUTHORIZED)
+
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PublicConditionalGetTest(TestCase):
+    """Tests for the ETag and Last-Modified headers of the public API."""
+
+    def setUp(self):
+        # The versions of the public collections are raised on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(
+                username="TestUser11", password="TestPW123"
+            )
+            PublicContact.objects.create(public_beekeeper_info=self.user)
+            self.test_yard = BeeYard.objects.create(
+                name="TestYard11", beekeeper=self.user
+            )
+            self.hive = Hive.objects.create(
+                status="active",
+                species="black_bee",
+                beeyard=self.test_yard,
+                queen_year=2022,
+                name="Conditional",
+            )
+        clear_response_cache()
+
+    def test_not_modified(self):
+        """Test that a request with the current ETag answers 304 after one query."""
+        for url in (
+            "/public_api/hives/",
+            f"/public_api/hives/{self.hive.id}/",
+            "/public_api/beeyards/",
+            "/public_api/beekeepers/",
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("Last-Modified", response)
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+
+    def test_changes_update_etag(self):
+        """Test that changing a hive changes the ETag of the hives and beeyards
+        but not of the beekeepers."""
+        etags = {
+            url: self.client.get(url)["ETag"]
+            for url in (
+                "/public_api/hives/",
+                "/public_api/beeyards/",
+                "/public_api/beekeepers/",
+            )
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hive.status = "destroyed"
+            self.hive.save()
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            expected = 304 if url == "/public_api/beekeepers/" else 200
+            self.assertEqual(response.status_code, expected)
+
+    def test_versions_raised_on_commit(self):
+        """Test that the versions of the public collections are raised once per
+        transaction when it commits, and not by changes which are rolled back
+        or to the name of a beekeeper who doesn't share it."""
+        version = get_version(HIVES)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            for status in ("pending", "destroyed"):
+                self.hive.status = status
+                self.hive.save()
+            self.assertEqual(get_version(HIVES)[0], version)
+        self.assertEqual(get_version(HIVES)[0], version + 1)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                self.hive.save()
+                Hive.objects.create(status="active", species=None, name="Invalid")
+        self.assertEqual(callbacks, [])
+        beekeepers = get_version(BEEKEEPERS)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(username="Private11", password="TestPW123")
+        self.assertEqual(get_version(BEEKEEPERS)[0], beekeepers)
+
+    def test_login_keeps_etag(self):
+        """Test that a beekeeper logging in doesn't change the public data."""
+        etag = self.client.get("/public_api/beekeepers/")["ETag"]
+        # Logging in saves the date of the last login of the user
+        self.client.force_login(self.user)
+        response = self.client.get("/public_api/beekeepers/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_batch_create_updates_etag(self):
+        """Test that hives created in a batch, without post_save, change the ETag."""
+        etag = self.client.get("/public_api/hives/")["ETag"]
+        self.client.force_login(self.user)
+        hives = [
+            {
+                "name": "Batch",
+                "status": "pending",
+                "species": "black_bee",
+                "beeyard": self.test_yard.id,
+            }
+        ] * 2
+        with self.captureOnCommitCallbacks(execute=True):
+            post_req = self.client.post(
+                "/hives/", hives, content_type="application/json"
+            )
+        self.assertEqual(post_req.status_code, 201)
+        response = self.client.get("/public_api/hives/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 3)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PublicResponseCacheTest(TestCase):
+    """Tests for the response cache of the public hives and beeyards."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser12", password="TestPW123")
+        # The versions of the public collections are raised on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.test_yard = BeeYard.objects.create(
+                name="TestYard12", beekeeper=self.user
+            )
+            self.hive = Hive.objects.create(
+                status="active",
+                species="black_bee",
+                beeyard=self.test_yard,
+                queen_year=2022,
+                name="Cached",
+            )
+        clear_response_cache()
+
+    def test_hit_with_normalized_params(self):
+        """Test that requests for the same data only read the collection version."""
+        response = self.client.get("/public_api/hives/?status=active&name=Cached")
+        self.assertEqual(response["X-Cache"], "MISS")
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/public_api/hives/?name=Cached&page=1&status=active&utm=x"
+            )
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["results"][0]["name"], "Cached")
+        response = self.client.get("/public_api/hives/?status=destroyed")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 0)
+        self.assertEqual(get_cache_stats(), {"hit": 1, "miss": 2, "stale": 0})
+
+    def test_invalidated_by_changes(self):
+        """Test that saving a hive or a user rebuilds the cached pages."""
+        self.client.get(f"/public_api/beeyards/{self.test_yard.id}/")
+        # The versions of the public collections are raised on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hive.name = "Renamed"
+            self.hive.save()
+        response = self.client.get(f"/public_api/beeyards/{self.test_yard.id}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["hives_detailed"][0]["name"], "Renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            PublicContact.objects.create(public_beekeeper_info=self.user)
+        response = self.client.get("/public_api/hives/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn(
+            "public_beekeeper_info", response.json()["results"][0]["beekeeper_detail"]
+        )
+
+    def test_stale_while_refreshing(self):
+        """Test that the old page is served while another request rebuilds it."""
+        self.client.get("/public_api/hives/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hive.name = "Renamed"
+            self.hive.save()
+        # Another worker holds the refresh lock
+        with patch.object(get_response_cache(), "add", return_value=False):
+            response = self.client.get("/public_api/hives/")
+        self.assertEqual(response["X-Cache"], "STALE")
+        self.assertEqual(response.json()["results"][0]["name"], "Cached")
+        response = self.client.get("/public_api/hives/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["name"], "Renamed")
+
+    def test_stale_validators(self):
+        """Test that stale data is sent with the ETag and Last-Modified of the
+        version it was built from, so the client doesn't keep it once the data
+        is rebuilt."""
+        old = self.client.get("/public_api/hives/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hive.name = "Renamed"
+            self.hive.save()
+        with patch.object(get_response_cache(), "add", return_value=False):
+            response = self.client.get(
+                "/public_api/hives/", HTTP_IF_NONE_MATCH=old["ETag"]
+            )
+        self.assertEqual(response["X-Cache"], "STALE")
+        self.assertEqual(response["ETag"], old["ETag"])
+        self.assertEqual(response["Last-Modified"], old["Last-Modified"])
+        response = self.client.get("/public_api/hives/", HTTP_IF_NONE_MATCH=old["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], old["ETag"])
+        self.assertEqual(response.json()["results"][0]["name"], "Renamed")
+
+    def test_warm_up_command(self):
+        """Test that the warm-up command fills the cache for the next requests."""
+        out = StringIO()
+        call_command("warmpubliccache", pages=1, clear=True, stdout=out)
+        self.assertIn("GET /public_api/hives/ MISS", out.getvalue())
+        # The pages are cached for the host given to the command
+        response = self.client.get("/public_api/beeyards/", HTTP_HOST="localhost")
+        self.assertEqual(response["X-Cache"], "HIT")
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BeekeeperSearchTest(TestCase):
+    """Tests for the search of public beekeepers by name."""
+
+    def setUp(self):
+        self.helene = self.add_keeper("Hélène", "Dupont", public=True)
+        self.helen = self.add_keeper("Helen", "Smith", public=True)
+        self.add_keeper("Marc", "Helene", public=False)
+        clear_response_cache()
+
+    def add_keeper(self, first_name, last_name, public):
+        """Function to add a beekeeper with a beeyard of one hive."""
+        keeper = User.objects.create_user(
+            username=first_name + last_name,
+            password="TestPW123",
+            first_name=first_name,
+            last_name=last_name,
+        )
+        if public:
+            PublicContact.objects.create(public_beekeeper_info=keeper)
+        test_yard = BeeYard.objects.create(name=f"Yard {last_name}", beekeeper=keeper)
+        Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=test_yard,
+            queen_year=2022,
+            name=f"Hive {last_name}",
+        )
+        return keeper
+
+    def search(self, value):
+        """Function returning the names of the beeyards found by a search."""
+        response = self.client.get("/public_api/beeyards/", {"beekeeper": value})
+        return [yard["name"] for yard in response.json()["results"]]
+
+    def test_accents_and_private_keepers(self):
+        """Test that accents and case are ignored and private beekeepers are left out."""
+        self.assertEqual(self.search("HELENE"), ["Yard Dupont"])
+        self.assertEqual(self.search("hélène"), ["Yard Dupont"])
+        self.assertEqual(self.search("Marc"), [])
+
+    def test_ranking(self):
+        """Test that beekeepers matching more words, and whole words, come first."""
+        self.assertEqual(self.search("hel"), ["Yard Dupont", "Yard Smith"])
+        self.assertEqual(self.search("smith helen"), ["Yard Smith", "Yard Dupont"])
+        self.assertEqual(self.search("elen"), ["Yard Dupont", "Yard Smith"])
+        self.assertEqual(self.search("du"), ["Yard Dupont"])
+
+    def test_words_matched_on_their_own(self):
+        """Test that a word of the search is only found inside one word of a name,
+        not from trigrams spread over several."""
+        self.add_keeper("Xabc", "Bcdy", public=True)
+        self.assertEqual(self.search("abcd"), [])
+        self.assertEqual(self.search("bcd"), ["Yard Bcdy"])
+        self.assertEqual(self.search("abcd helen"), ["Yard Smith", "Yard Dupont"])
+
+    def test_hive_search(self):
+        """Test the search of hives by the name of their beekeeper."""
+        response = self.client.get(
+            "/public_api/hives/", {"beeyard__beekeeper": "dupont"}
+        )
+        self.assertEqual(
+            [hive["name"] for hive in response.json()["results"]], ["Hive Dupont"]
+        )
+
+    def test_index_updates(self):
+        """Test that the index follows name changes and public contact removals."""
+        self.helene.last_name = "Martin"
+        self.helene.save()
+        self.assertEqual(self.search("dupont"), [])
+        self.assertEqual(self.search("martin"), ["Yard Dupont"])
+        PublicContact.objects.filter(public_beekeeper_info=self.helen).delete()
+        self.assertEqual(self.search("helen"), ["Yard Dupont"])
+        self.assertFalse(self.helen.search_terms.exists())
+
+    def test_rebuild_command(self):
+        """Test that the rebuild command indexes users created without signals."""
+        keeper = User.objects.bulk_create(
+            [User(username="Bulk", first_name="Zoé", last_name="Bulk")]
+        )[0]
+        PublicContact.objects.bulk_create([PublicContact(public_beekeeper_info=keeper)])
+        BeeYard.objects.create(name="Yard Bulk", beekeeper=keeper)
+        self.assertEqual(self.search("zoe"), [])
+        call_command("rebuildsearchindex", stdout=StringIO())
+        self.assertEqual(self.search("zoe"), ["Yard Bulk"])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SparseFieldsTest(TestCase):
+    """Tests for choosing the fields of a response with ?fields= and ?expand=."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser13", password="TestPW123")
+        PublicContact.objects.create(public_beekeeper_info=self.user)
+        self.client.force_login(self.user)
+        self.test_yard = BeeYard.objects.create(name="TestYard13", beekeeper=self.user)
+        self.hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=self.test_yard,
+            queen_year=2022,
+            name="Sparse",
+        )
+        Intervention.objects.create(
+            intervention_type="harvest",
+            hive_affected=self.hive,
+            content_object=Harvest.objects.create(quantity=3),
+        )
+        ContentType.objects.get_for_model(Harvest)
+        clear_response_cache()
+
+    def get(self, url, query_count):
+        """Function to send a GET request, check its number of queries and return
+        the results."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), query_count)
+        self.queries = [query["sql"] for query in queries]
+        return response.json()["results"]
+
+    def test_all_fields_by_default(self):
+        """Test that the responses are unchanged without the parameters."""
+        results = self.get("/beeyards/", 5)
+        self.assertEqual(
+            set(results[0]), {"name", "beekeeper", "hives", "hives_detailed"}
+        )
+
+    def test_private_fields(self):
+        """Test that only the chosen columns are read and the hives not prefetched."""
+        # Session, user, count and page
+        results = self.get("/beeyards/?fields=name", 4)
+        self.assertEqual(results, [{"name": "TestYard13"}])
+        self.assertNotIn("apiary_hive", self.queries[-1])
+
+        results = self.get("/beeyards/?fields=name&expand=hives_detailed", 5)
+        self.assertEqual(set(results[0]), {"name", "hives_detailed"})
+        self.assertEqual(results[0]["hives_detailed"][0]["name"], "Sparse")
+
+        results = self.get("/interventions/?fields=intervention_type", 4)
+        self.assertEqual(results, [{"intervention_type": "harvest"}])
+        results = self.get("/interventions/?expand=content_object", 5)
+        self.assertEqual(results[0]["content_object"], {"quantity": 3})
+        self.assertIn("hive_affected", results[0])
+
+    def test_public_fields(self):
+        """Test that the public hives only join the beekeeper when it is expanded."""
+        self.client.logout()
+        results = self.get("/public_api/hives/?fields=name,status", 3)
+        self.assertEqual(results, [{"name": "Sparse", "status": "active"}])
+        self.assertNotIn("auth_user", self.queries[-1])
+        self.assertNotIn('"apiary_hive"."species"', self.queries[-1])
+
+        results = self.get("/public_api/hives/?fields=name&expand=beekeeper_detail", 3)
+        self.assertIn("public_beekeeper_info", results[0]["beekeeper_detail"])
+        self.assertIn("auth_user", self.queries[-1])
+
+        results = self.get("/public_api/beeyards/?expand=hives_detailed", 4)
+        self.assertEqual(
+            set(results[0]), {"name", "beekeeper", "hives", "hives_detailed"}
+        )
+        self.assertIn(
+            "public_beekeeper_info",
+            results[0]["hives_detailed"][0]["beekeeper_detail"],
+        )
+
+    def test_unknown_fields(self):
+        """Test that unknown names in ?fields= or ?expand= are answered with a 400
+        listing them."""
+        response = self.client.get("/beeyards/?fields=name,colour,size")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {"fields": ['Unknown field "colour".', 'Unknown field "size".']},
+        )
+        response = self.client.get("/public_api/hives/?expand=name")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"expand": ['Unknown field "name".']})
+
+    def test_writes_ignore_fields(self):
+        """Test that the parameters don't remove fields from the data being saved."""
+        response = self.client.post(
+            "/hives/?fields=name",
+            {
+                "name": "Written",
+                "status": "pending",
+                "species": "black_bee",
+                "beeyard": self.test_yard.id,
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Hive.objects.get(name="Written").status, "pending")
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FastListTest(TestCase):
+    """Tests that the fast path of the list routes returns the same data as the
+    serializers."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="TestUser14", password="TestPW123", first_name="Ana"
+        )
+        hidden = User.objects.create_user(username="Hidden14", password="TestPW123")
+        PublicContact.objects.create(public_beekeeper_info=self.user)
+        self.client.force_login(self.user)
+        yard = BeeYard.objects.create(name="TestYard14", beekeeper=self.user)
+        BeeYard.objects.create(name="EmptyYard14", beekeeper=self.user)
+        hidden_yard = BeeYard.objects.create(name="HiddenYard14", beekeeper=hidden)
+        hives = [
+            Hive.objects.create(
+                status=status,
+                species="black_bee",
+                beeyard=beeyard,
+                queen_year=queen_year,
+                name=f"Golden {i}",
+            )
+            for i, (status, beeyard, queen_year) in enumerate(
+                [
+                    ("active", yard, 2022),
+                    ("pending", yard, 2023),
+                    ("destroyed", None, 2021),
+                    ("active", hidden_yard, 2020),
+                ]
+            )
+        ]
+        content_objects = [
+            Harvest.objects.create(quantity=2.5),
+            SyrupDistribution.objects.create(syrup_type="nectar", quantity=1),
+            Treatment.objects.create(treatment_type="apivar"),
+            hives[1],
+            None,
+        ]
+        types = ["harvest", "syrup_distribution", "treatment", "artificial_swarming"]
+        for i, content_object in enumerate(content_objects):
+            Intervention.objects.create(
+                intervention_type=(types + ["health_check"])[i],
+                hive_affected=hives[i % 2],
+                content_object=content_object,
+            )
+        for hive in hives[:3]:
+            Contamination.objects.create(type="parasite", hive=hive)
+        clear_response_cache()
+
+    def assertSameData(self, url):
+        """Function to check that a url returns the same data through the fast
+        path and through the serializers."""
+        with override_settings(PUBLIC_API_CACHE_TIMEOUT=0):
+            with patch.object(FastListMixin, "use_fast_list", False):
+                expected = self.client.get(url)
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertEqual(response.content, expected.content, url)
+        return response.json()
+
+    def test_private_lists(self):
+        """Test the lists of the private API, with each option of the routes."""
+        for url in [
+            "/hives/",
+            "/hives/?fields=name,beeyard_id",
+            "/hives/?status=active",
+            "/hives/?cursor=&size=1",
+            "/interventions/",
+            "/interventions/?expand=content_object",
+            "/interventions/?fields=date,object_id",
+            "/interventions/?cursor=&size=3",
+            "/contaminations/",
+            "/contaminations/?fields=type",
+        ]:
+            self.assertSameData(url)
+        data = self.assertSameData("/interventions/")
+        content_objects = [row["content_object"] for row in data["results"]]
+        self.assertIn({"quantity": 2.5}, content_objects)
+        self.assertIn(None, content_objects)
+        # Following the links of a cursor page
+        data = self.assertSameData("/hives/?cursor=&size=1")
+        self.assertSameData(data["next"])
+
+    def test_public_lists(self):
+        """Test the lists of the public API, with and without public contacts."""
+        self.client.logout()
+        for url in [
+            "/public_api/hives/",
+            "/public_api/hives/?expand=beekeeper_detail&fields=name",
+            "/public_api/hives/?status=active",
+            "/public_api/beeyards/",
+            "/public_api/beeyards/?fields=name,hives",
+            "/public_api/beekeepers/",
+            "/public_api/beekeepers/?fields=public_beekeeper_info",
+        ]:
+            self.assertSameData(url)
+        data = self.assertSameData("/public_api/hives/")
+        details = [row["beekeeper_detail"] for row in data["results"]]
+        self.assertIn(NOT_AUTHORIZED, details)
+        self.assertNotIn(None, PLANS.values())
+
+    def test_benchmark_command(self):
+        """Test that the benchmark checks both paths and rolls back."""
+        out = StringIO()
+        call_command("benchserializers", keepers=2, repeat=1, stdout=out)
+        self.assertIn("rows/s", out.getvalue())
+        self.assertEqual(Hive.objects.count(), 4)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RendererTest(TestCase):
+    """Tests for the orjson and MessagePack renderers and the orjson parser."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser15", password="TestPW123")
+        self.client.force_login(self.user)
+        self.test_yard = BeeYard.objects.create(name="TestYard15", beekeeper=self.user)
+        hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=self.test_yard,
+            queen_year=2022,
+            # Characters DRF's renderer writes as is or escapes
+            name="Ruche d'été\u2028",
+        )
+        Intervention.objects.create(
+            intervention_type="harvest",
+            hive_affected=hive,
+            content_object=Harvest.objects.create(quantity=1.5),
+        )
+        clear_response_cache()
+
+    def test_same_json(self):
+        """Test that the JSON is byte for byte the one of DRF's renderer."""
+        for url in ["/hives/", "/interventions/", "/public_api/beeyards/"]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertIn(b"\\u2028", response.content)
+        self.assertIn("été".encode(), response.content)
+
+    def test_msgpack(self):
+        """Test that MessagePack is sent when asked for by Accept or ?format=."""
+        expected = self.client.get("/interventions/").json()
+        response = self.client.get("/interventions/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), expected)
+
+        expected = self.client.get("/public_api/hives/").json()
+        response = self.client.get("/public_api/hives/?format=msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), expected)
+
+    def test_browsable_api(self):
+        """Test that browsers still get the browsable API."""
+        response = self.client.get("/hives/", HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("text/html", response["Content-Type"])
+
+    def test_parser(self):
+        """Test that JSON bodies are read, and malformed ones answer 400."""
+        response = self.client.post(
+            "/hives/",
+            '{"name": "Parsed", "status": "pending", "species": "black_bee", '
+            f'"beeyard": {self.test_yard.id}}}',
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Hive.objects.get(name="Parsed").status, "pending")
+
+        response = self.client.post(
+            "/hives/", '{"name": ', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.json()["detail"])
+
+    def test_benchmark_command(self):
+        """Test that the benchmark compares the formats and rolls back."""
+        out = StringIO()
+        call_command("benchrenderers", rows=200, repeat=1, stdout=out)
+        self.assertIn("Page of 200 interventions", out.getvalue())
+        self.assertIn("msgpack", out.getvalue())
+        self.assertEqual(Intervention.objects.count(), 1)
+
+
+class HiveLineageTest(TestCase):
+    """Tests for the lineage of a hive through artificial swarmings."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser16", password="TestPW123")
+        self.client.force_login(self.user)
+        self.test_yard = BeeYard.objects.create(name="TestYard16", beekeeper=self.user)
+
+    def make_hive(self, name, beeyard=None):
+        return Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=beeyard or self.test_yard,
+            queen_year=2022,
+            name=name,
+        )
+
+    def swarm(self, parent, child):
+        Intervention.objects.create(
+            intervention_type="artificial_swarming",
+            hive_affected=parent,
+            content_object=child,
+        )
+
+    def make_chain(self, length):
+        """Function to create hives each swarmed from the one before."""
+        hives = [self.make_hive(f"Generation {i}") for i in range(length)]
+        for parent, child in zip(hives, hives[1:]):
+            self.swarm(parent, child)
+        return hives
+
+    def get_lineage(self, hive):
+        """Function returning the lineage of a hive and its number of queries,
+        leaving out the session, the user and the hive's permission check."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/hives/{hive.id}/lineage/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries) - 3
+
+    def test_ancestors_and_descendants(self):
+        """Test that every generation is found both ways, with the links."""
+        hives = self.make_chain(5)
+        sibling = self.make_hive("Sibling")
+        self.swarm(hives[1], sibling)
+        # Another kind of intervention on a hive isn't a link
+        Intervention.objects.create(
+            intervention_type="health_check", hive_affected=hives[2]
+        )
+
+        data, query_count = self.get_lineage(hives[2])
+        self.assertEqual(query_count, 1)
+        self.assertEqual(data["hive"], hives[2].id)
+        self.assertEqual(
+            [(hive["id"], hive["generation"]) for hive in data["ancestors"]],
+            [(hives[1].id, 1), (hives[0].id, 2)],
+        )
+        self.assertEqual(
+            [(hive["id"], hive["generation"]) for hive in data["descendants"]],
+            [(hives[3].id, 1), (hives[4].id, 2)],
+        )
+        self.assertEqual(data["ancestors"][0]["name"], "Generation 1")
+        self.assertEqual(
+            data["links"],
+            [
+                {"parent": parent.id, "child": child.id}
+                for parent, child in zip(hives, hives[1:])
+            ],
+        )
+
+    def test_one_query_whatever_the_depth(self):
+        """Test that a lineage of 30 generations costs as much as a short one."""
+        hives = self.make_chain(30)
+        data, query_count = self.get_lineage(hives[-1])
+        self.assertEqual(query_count, 1)
+        self.assertEqual(len(data["ancestors"]), 29)
+        self.assertEqual(data["ancestors"][-1]["generation"], 29)
+
+        data, query_count = self.get_lineage(hives[0])
+        self.assertEqual(query_count, 1)
+        self.assertEqual(len(data["descendants"]), 29)
+
+    def test_other_keepers_hives(self):
+        """Test that the hives of other beekeepers are left out of the lineage and
+        can't be read."""
+        other = User.objects.create_user(username="Other16", password="TestPW123")
+        other_yard = BeeYard.objects.create(name="OtherYard16", beekeeper=other)
+        parent, child = self.make_hive("Parent"), self.make_hive("Child")
+        foreign = self.make_hive("Foreign", other_yard)
+        grandchild = self.make_hive("Grandchild")
+        self.swarm(parent, child)
+        self.swarm(child, foreign)
+        self.swarm(foreign, grandchild)
+
+        data, query_count = self.get_lineage(parent)
+        self.assertEqual(
+            [hive["id"] for hive in data["descendants"]], [child.id, grandchild.id]
+        )
+        self.assertEqual(data["links"], [{"parent": parent.id, "child": child.id}])
+
+        response = self.client.get(f"/hives/{foreign.id}/lineage/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_cycle(self):
+        """Test that a hive recorded as its own ancestor doesn't loop forever."""
+        hives = self.make_chain(3)
+        self.swarm(hives[2], hives[0])
+        data, query_count = self.get_lineage(hives[0])
+        self.assertEqual(
+            {hive["id"] for hive in data["ancestors"]}, {hive.id for hive in hives}
+        )
+
+
+class StatsTest(TestCase):
+    """Tests for the statistics of the hives and beeyards."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="TestUser17", password="TestPW123")
+        self.client.force_login(self.user)
+        self.test_yard = BeeYard.objects.create(name="TestYard17", beekeeper=self.user)
+        self.hive, self.other_hive = [
+            Hive.objects.create(
+                status="active",
+                species="black_bee",
+                beeyard=self.test_yard,
+                queen_year=2022,
+                name=name,
+            )
+            for name in ("Stats", "Other stats")
+        ]
+        for hive, intervention_type, content_object, date in [
+            (self.hive, "harvest", Harvest(quantity=2.5), "2023-05-02"),
+            (self.other_hive, "harvest", Harvest(quantity=1.5), "2023-05-20"),
+            (self.hive, "harvest", Harvest(quantity=4), "2023-12-10"),
+            (
+                self.hive,
+                "syrup_distribution",
+                SyrupDistribution(syrup_type="nectar", quantity=1),
+                "2023-05-03",
+            ),
+            (
+                self.hive,
+                "treatment",
+                Treatment.objects.get_or_create(treatment_type="apivar")[0],
+                "2023-05-04",
+            ),
+            (
+                self.other_hive,
+                "treatment",
+                Treatment.objects.get_or_create(treatment_type="apivar")[0],
+                "2023-06-04",
+            ),
+        ]:
+            content_object.save()
+            intervention = Intervention.objects.create(
+                intervention_type=intervention_type,
+                hive_affected=hive,
+                content_object=content_object,
+            )
+            # The date is set with update() as it is filled in on save
+            Intervention.objects.filter(id=intervention.id).update(
+                date=f"{date}T10:00:00Z"
+            )
+        # update() doesn't send the signals keeping the rollup up to date
+        rebuild_hives([self.hive.id, self.other_hive.id])
+        for hive in (self.hive, self.other_hive):
+            Contamination.objects.create(type="parasite", hive=hive)
+        Contamination.objects.update(date="2023-05-10")
+
+    def get_stats(self, url):
+        """Function returning the statistics of a url and the number of queries."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_beeyard_by_month(self):
+        """Test that the beeyard totals cover all its hives, month by month."""
+        data, query_count = self.get_stats(f"/beeyards/{self.test_yard.id}/stats/")
+        # Session, user, beeyard, then one aggregate query per total
+        self.assertEqual(query_count, 7)
+        self.assertEqual(
+            data["periods"],
+            [
+                {
+                    "period": "2023-05",
+                    "interventions": {
+                        "harvest": 2,
+                        "syrup_distribution": 1,
+                        "treatment": 1,
+                    },
+                    "honey": 4.0,
+                    "syrup": {"nectar": 1.0},
+                    "treatments": {"apivar": 1},
+                    "contaminations": {"parasite": 2},
+                },
+                {
+                    "period": "2023-06",
+                    "interventions": {"treatment": 1},
+                    "honey": 0,
+                    "syrup": {},
+                    "treatments": {"apivar": 1},
+                    "contaminations": {},
+                },
+                {
+                    "period": "2023-12",
+                    "interventions": {"harvest": 1},
+                    "honey": 4.0,
+                    "syrup": {},
+                    "treatments": {},
+                    "contaminations": {},
+                },
+            ],
+        )
+        self.assertEqual(data["totals"]["honey"], 8.0)
+        self.assertEqual(data["totals"]["treatments"], {"apivar": 2})
+        self.assertEqual(data["totals"]["interventions"]["harvest"], 3)
+
+    def test_hive_by_season(self):
+        """Test that a hive only counts its own data and December is winter of
+        the following year."""
+        data, query_count = self.get_stats(f"/hives/{self.hive.id}/stats/?group=season")
+        self.assertEqual(
+            [(period["period"], period["honey"]) for period in data["periods"]],
+            [("2023-spring", 2.5), ("2024-winter", 4.0)],
+        )
+        self.assertEqual(data["periods"][0]["contaminations"], {"parasite": 1})
+        self.assertEqual(data["totals"]["treatments"], {"apivar": 1})
+
+    def test_cache(self):
+        """Test that the statistics are cached until the beekeeper's data changes."""
+        url = f"/hives/{self.hive.id}/stats/"
+        data, query_count = self.get_stats(url)
+        cached, cached_query_count = self.get_stats(url)
+        self.assertEqual(cached, data)
+        self.assertEqual(cached_query_count, query_count - 4)
+
+        Intervention.objects.create(
+            intervention_type="harvest",
+            hive_affected=self.hive,
+            content_object=Harvest.objects.create(quantity=10),
+        )
+        data, query_count = self.get_stats(url)
+        self.assertEqual(data["totals"]["honey"], 16.5)
+
+        # A batch of interventions doesn't send signals
+        response = self.client.post(
+            f"/beeyards/{self.test_yard.id}/apply_intervention/",
+            {
+                "intervention_type": "harvest",
+                "hives": [self.hive.id],
+                "detail": {"quantity": 1},
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        data, query_count = self.get_stats(url)
+        self.assertEqual(data["totals"]["honey"], 17.5)
+
+    def test_deleted_content_objects(self):
+        """Test that deleting a harvest, a syrup distribution or a treatment,
+        which every beekeeper shares, keeps the interventions using it and
+        takes it out of the statistics."""
+        Harvest.objects.get(quantity=4).delete()
+        SyrupDistribution.objects.get().delete()
+        Treatment.objects.get(treatment_type="apivar").delete()
+        self.assertEqual(Intervention.objects.count(), 6)
+        data, query_count = self.get_stats(f"/beeyards/{self.test_yard.id}/stats/")
+        self.assertEqual(data["totals"]["honey"], 4.0)
+        self.assertEqual(data["totals"]["syrup"], {})
+        self.assertEqual(data["totals"]["treatments"], {})
+        self.assertEqual(data["totals"]["interventions"]["harvest"], 3)
+        # The rollup matches one rebuilt from the interventions
+        rows = list(DailyInterventionRollup.objects.values_list("day", "honey"))
+        rebuild_hives([self.hive.id, self.other_hive.id])
+        self.assertCountEqual(
+            DailyInterventionRollup.objects.values_list("day", "honey"), rows
+        )
+
+    def test_errors(self):
+        """Test that other beekeepers' beeyards and unknown groups are refused."""
+        other = User.objects.create_user(username="Other17", password="TestPW123")
+        other_yard = BeeYard.objects.create(name="OtherYard17", beekeeper=other)
+        response = self.client.get(f"/beeyards/{other_yard.id}/stats/")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(f"/hives/{self.hive.id}/stats/?group=week")
+        self.assertEqual(response.status_code, 400)
+
+
+class RollupTest(TestCase):
+    """Tests for the daily rollup of the interventions."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser18", password="TestPW123")
+        self.client.force_login(self.user)
+        self.test_yard, self.other_yard = [
+            BeeYard.objects.create(name=name, beekeeper=self.user)
+            for name in ("TestYard18", "OtherYard18")
+        ]
+        self.hives = [
+            Hive.objects.create(
+                status="active",
+                species="black_bee",
+                beeyard=self.test_yard,
+                queen_year=2022,
+                name="Rollup_" + str(i),
+            )
+            for i in range(3)
+        ]
+        self.today = timezone.localdate()
+
+    def rollup(self):
+        """Function returning the rollup rows as tuples."""
+        return set(
+            DailyInterventionRollup.objects.values_list(
+                "owner_id",
+                "beeyard_id",
+                "hive_id",
+                "day",
+                "intervention_type",
+                "count",
+                "honey",
+                "syrup",
+            )
+        )
+
+    def harvest(self, hive, quantity):
+        """Function to log a harvest on the hive."""
+        return Intervention.objects.create(
+            intervention_type="harvest",
+            hive_affected=hive,
+            content_object=Harvest.objects.create(quantity=quantity),
+        )
+
+    def assert_rebuilt_equal(self):
+        """Asserts that the rebuild command gives the rollup kept up to date."""
+        incremental = self.rollup()
+        call_command("rebuildrollup", chunk_size=2, stdout=StringIO())
+        self.assertEqual(self.rollup(), incremental)
+
+    def test_created_and_deleted(self):
+        """Test that interventions of the same hive, day and type share a row."""
+        hive = self.hives[0]
+        first = self.harvest(hive, 2)
+        second = self.harvest(hive, 3)
+        Intervention.objects.create(
+            intervention_type="health_check", hive_affected=hive
+        )
+        key = (self.user.id, self.test_yard.id, hive.id, self.today)
+        self.assertEqual(
+            self.rollup(),
+            {(*key, "harvest", 2, 5.0, 0.0), (*key, "health_check", 1, 0.0, 0.0)},
+        )
+        self.assert_rebuilt_equal()
+
+        first.delete()
+        self.assertIn((*key, "harvest", 1, 3.0, 0.0), self.rollup())
+        # Deleting a harvest keeps its intervention, without its quantity
+        second.content_object.delete()
+        self.assertIn((*key, "harvest", 1, 0.0, 0.0), self.rollup())
+        self.assert_rebuilt_equal()
+
+    def test_hive_deletion(self):
+        """Test that deleting a hive doesn't take its interventions out of the
+        rollup one by one, while a swarming logged on another hive, deleted with
+        the child hive it points to, is."""
+        hive, parent = self.hives[:2]
+        for i in range(50):
+            self.harvest(hive, 1)
+        Intervention.objects.create(
+            intervention_type="artificial_swarming",
+            hive_affected=parent,
+            content_object=hive,
+        )
+        # Whatever the number of interventions: the interventions, contaminations
+        # and swarmings of the hive, the swarming taken out of the rollup of the
+        # parent and the deletes. The public versions are raised on commit.
+        with self.assertNumQueries(10):
+            hive.delete()
+        self.assertEqual(self.rollup(), set())
+        for i in range(50):
+            self.harvest(parent, 1)
+        # The ids of the hives of a queryset are read once
+        with self.assertNumQueries(8):
+            Hive.objects.filter(id=parent.id).delete()
+        self.assertEqual(self.rollup(), set())
+
+    def test_changes(self):
+        """Test that changes of quantity, of type and of hive move the totals."""
+        intervention = self.harvest(self.hives[0], 2)
+        harvest = Harvest.objects.get()
+        harvest.quantity = 7
+        harvest.save()
+        key = (self.user.id, self.test_yard.id)
+        self.assertEqual(
+            self.rollup(), {(*key, self.hives[0].id, self.today, "harvest", 1, 7, 0)}
+        )
+
+        intervention = Intervention.objects.get(id=intervention.id)
+        intervention.hive_affected = self.hives[1]
+        intervention.save()
+        self.assertEqual(
+            self.rollup(), {(*key, self.hives[1].id, self.today, "harvest", 1, 7, 0)}
+        )
+        self.assert_rebuilt_equal()
+
+        # A hive moved to another beeyard takes its rows along
+        hive = self.hives[1]
+        hive.beeyard = self.other_yard
+        hive.save()
+        self.assertEqual(
+            self.rollup(),
+            {
+                (
+                    self.user.id,
+                    self.other_yard.id,
+                    hive.id,
+                    self.today,
+                    "harvest",
+                    1,
+                    7.0,
+                    0.0,
+                )
+            },
+        )
+
+    def test_batch_requests(self):
+        """Test that the bulk writes, which don't send signals, update the rollup."""
+        response = self.client.post(
+            f"/beeyards/{self.test_yard.id}/apply_intervention/",
+            {
+                "intervention_type": "syrup_distribution",
+                "hives": [hive.id for hive in self.hives],
+                "detail": {"quantity": 2, "syrup_type": "nectar"},
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(
+            "/interventions/",
+            [
+                {"intervention_type": "health_check", "hive_affected": hive.id}
+                for hive in self.hives * 2
+            ],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        key = (self.user.id, self.test_yard.id)
+        self.assertEqual(
+            self.rollup(),
+            {
+                row
+                for hive in self.hives
+                for row in [
+                    (*key, hive.id, self.today, "syrup_distribution", 1, 0.0, 2.0),
+                    (*key, hive.id, self.today, "health_check", 2, 0.0, 0.0),
+                ]
+            },
+        )
+
+        response = self.client.patch(
+            "/interventions/",
+            [
+                {"id": intervention_id, "intervention_type": "destruction_queen_cells"}
+                # One of the two interventions of each hive
+                for intervention_id in Intervention.objects.filter(
+                    intervention_type="health_check"
+                ).order_by("id").values_list("id", flat=True)[:3]
+            ],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            DailyInterventionRollup.objects.filter(
+                intervention_type="health_check", count=1
+            ).count(),
+            3,
+        )
+        self.assertEqual(
+            DailyInterventionRollup.objects.filter(
+                intervention_type="destruction_queen_cells"
+            ).count(),
+            3,
+        )
+        self.assert_rebuilt_equal()
+
+
+class ExportTest(TestCase):
+    """Tests for the streamed CSV and NDJSON exports."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser19", password="TestPW123")
+        self.client.force_login(self.user)
+        self.test_yard = BeeYard.objects.create(name="TestYard19", beekeeper=self.user)
+        self.hive, self.child = [
+            Hive.objects.create(
+                status="active",
+                species="black_bee",
+                beeyard=self.test_yard,
+                queen_year=2022,
+                name=name,
+            )
+            for name in ("Exported", "Child")
+        ]
+        for intervention_type, content_object in [
+            ("harvest", Harvest.objects.create(quantity=2.5)),
+            (
+                "syrup_distribution",
+                SyrupDistribution.objects.create(syrup_type="nectar", quantity=1),
+            ),
+            (
+                "treatment",
+                Treatment.objects.get_or_create(treatment_type="apivar")[0],
+            ),
+            ("artificial_swarming", self.child),
+            ("health_check", None),
+        ]:
+            Intervention.objects.create(
+                intervention_type=intervention_type,
+                hive_affected=self.hive,
+                content_object=content_object,
+            )
+        Contamination.objects.create(type="parasite", hive=self.hive)
+        # Rows of another beekeeper aren't exported
+        other = User.objects.create_user(username="Other19", password="TestPW123")
+        other_yard = BeeYard.objects.create(name="OtherYard19", beekeeper=other)
+        Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=other_yard,
+            queen_year=2022,
+            name="Other",
+        )
+
+    def export(self, url):
+        """Function returning the streamed content of an export and its number of
+        queries."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            content = b"".join(response.streaming_content)
+        return response, content.decode(), len(queries)
+
+    def test_interventions_csv(self):
+        """Test that the content objects are flattened into columns."""
+        response, content, query_count = self.export("/interventions/export/")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="interventions.csv"', response["Content-Disposition"])
+        lines = content.splitlines()
+        self.assertEqual(
+            lines[0],
+            "id,date,intervention_type,hive_affected,hive_affected_name,"
+            "harvest_quantity,syrup_type,syrup_quantity,treatment_type,child_hive",
+        )
+        rows = [line.split(",")[2:] for line in lines[1:]]
+        self.assertEqual(
+            [row[:1] + row[3:] for row in rows],
+            [
+                ["harvest", "2.5", "", "", "", ""],
+                ["syrup_distribution", "", "nectar", "1.0", "", ""],
+                ["treatment", "", "", "", "apivar", ""],
+                ["artificial_swarming", "", "", "", "", str(self.child.id)],
+                ["health_check", "", "", "", "", ""],
+            ],
+        )
+
+    def test_ndjson(self):
+        """Test the NDJSON format and that the list filters apply."""
+        response, content, query_count = self.export(
+            "/hives/export/?format=ndjson&name=Child"
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = content.splitlines()
+        self.assertEqual(len(lines), 1)
+        row = orjson.loads(lines[0])
+        self.assertEqual(row["id"], self.child.id)
+        self.assertEqual(row["beeyard_name"], "TestYard19")
+
+        response, content, query_count = self.export("/contaminations/export/")
+        self.assertEqual(content.splitlines()[0], "id,date,type,hive,hive_name")
+        self.assertEqual(len(content.splitlines()), 2)
+        response, content, query_count = self.export("/beeyards/export/")
+        self.assertEqual(content.splitlines()[1:], [f"{self.test_yard.id},TestYard19"])
+
+    def test_query_count(self):
+        """Test that the number of queries doesn't depend on the number of rows,
+        the content objects being read with one query per model."""
+        response, content, query_count = self.export("/interventions/export/")
+        for i in range(50):
+            Intervention.objects.create(
+                intervention_type="harvest",
+                hive_affected=self.child,
+                content_object=Harvest.objects.create(quantity=i),
+            )
+        response, content, more_query_count = self.export("/interventions/export/")
+        self.assertEqual(len(content.splitlines()), 56)
+        self.assertEqual(more_query_count, query_count)
+
+    def test_anonymous(self):
+        """Test that the exports need a beekeeper to be logged in."""
+        self.client.logout()
+        response = self.client.get("/interventions/export/")
+        self.assertEqual(response.status_code, 403)
+
+
+class ImportHistoryTest(TestCase):
+    """Tests for the import of historical records."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser20", password="TestPW123")
+        self.test_yard = BeeYard.objects.create(name="TestYard20", beekeeper=self.user)
+        self.hive, self.child = [
+            Hive.objects.create(
+                status="active",
+                species="black_bee",
+                beeyard=self.test_yard,
+                queen_year=2022,
+                name=name,
+            )
+            for name in ("Imported", "Child")
+        ]
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def import_file(self, name, content, *args):
+        """Function to write a file and import it, returns the output."""
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        out = StringIO()
+        call_command(
+            "importhistory",
+            path,
+            "--owner",
+            "TestUser20",
+            *args,
+            stdout=out,
+            stderr=out,
+        )
+        return out.getvalue()
+
+    def interventions_csv(self):
+        """Function returning a CSV file of interventions of every kind."""
+        hive, child = self.hive.id, self.child.id
+        return (
+            "date,intervention_type,hive_affected,harvest_quantity,syrup_type,"
+            "syrup_quantity,treatment_type,child_hive\n"
+            f"2021-05-02T10:00:00Z,harvest,{hive},2.5,,,,\n"
+            f"2021-05-02T11:00:00Z,harvest,{hive},1.5,,,,\n"
+            f"2021-04-01,syrup_distribution,{hive},,nectar,3,,\n"
+            f"2021-04-02T09:00:00Z,treatment,{hive},,,,apivar,\n"
+            f"2021-06-10T09:00:00Z,artificial_swarming,{hive},,,,,{child}\n"
+        )
+
+    def check_interventions(self):
+        """Asserts that the interventions of interventions_csv() were imported."""
+        self.assertEqual(Intervention.objects.count(), 5)
+        harvests = Intervention.objects.filter(intervention_type="harvest")
+        self.assertEqual(
+            sorted((i.date.isoformat(), i.content_object.quantity) for i in harvests),
+            [("2021-05-02T10:00:00+00:00", 2.5), ("2021-05-02T11:00:00+00:00", 1.5)],
+        )
+        self.assertEqual(
+            Intervention.objects.get(intervention_type="treatment").content_object,
+            Treatment.objects.get(treatment_type="apivar"),
+        )
+        swarming = Intervention.objects.get(intervention_type="artificial_swarming")
+        self.assertEqual(swarming.content_object, self.child)
+        self.assertEqual(swarming.owner_id, self.user.id)
+        # The rollup is rebuilt for the imported days
+        self.assertEqual(
+            DailyInterventionRollup.objects.get(intervention_type="harvest").honey, 4
+        )
+
+    def test_interventions_copy(self):
+        """Test the import with COPY, keeping the dates of the file."""
+        output = self.import_file(
+            "history.csv", self.interventions_csv(), "--type", "interventions"
+        )
+        self.assertIn("5 interventions imported", output)
+        self.check_interventions()
+
+    def test_interventions_bulk_create(self):
+        """Test the import with bulk_create, keeping the dates of the file."""
+        self.import_file(
+            "history.csv",
+            self.interventions_csv(),
+            "--type",
+            "interventions",
+            "--no-copy",
+            "--batch-size",
+            "2",
+        )
+        self.check_interventions()
+        # The dates are filled in again afterwards
+        intervention = Intervention.objects.create(
+            intervention_type="health_check", hive_affected=self.hive
+        )
+        self.assertEqual(intervention.date.year, timezone.now().year)
+
+    def test_ndjson(self):
+        """Test the import of contaminations and hives as newline delimited JSON."""
+        self.import_file(
+            "contaminations.ndjson",
+            f'{{"date": "2020-08-01", "type": "parasite", "hive": {self.hive.id}}}\n',
+            "--type",
+            "contaminations",
+        )
+        contamination = Contamination.objects.get()
+        self.assertEqual(contamination.date.isoformat(), "2020-08-01")
+        self.assertEqual(contamination.owner_id, self.user.id)
+        self.import_file(
+            "hives.ndjson",
+            '{"name": "Old", "status": "destroyed", "species": "black_bee", '
+            f'"queen_year": 2019, "date_updated": "2020-09-01", '
+            f'"beeyard": {self.test_yard.id}}}\n',
+            "--type",
+            "hives",
+            "--no-copy",
+        )
+        hive = Hive.objects.get(name="Old")
+        self.assertEqual(hive.date_updated.isoformat(), "2020-09-01")
+        self.assertEqual(hive.owner_id, self.user.id)
+
+    def test_ndjson_numbers(self):
+        """Test that JSON numbers given as dates or choices are invalid rows."""
+        hive = self.hive.id
+        with self.assertRaisesMessage(CommandError, "date: 20200101 is not a valid"):
+            self.import_file(
+                "contaminations.ndjson",
+                f'{{"date": 20200101, "type": "parasite", "hive": {hive}}}\n',
+                "--type",
+                "contaminations",
+            )
+        with self.assertRaisesMessage(CommandError, "date: 20200101 is not a valid"):
+            self.import_file(
+                "history.ndjson",
+                '{"date": 20200101, "intervention_type": "health_check", '
+                f'"hive_affected": {hive}}}\n',
+                "--type",
+                "interventions",
+            )
+        with self.assertRaisesMessage(CommandError, "type: 1 is not a valid choice"):
+            self.import_file(
+                "contaminations.ndjson",
+                f'{{"date": "2020-08-01", "type": 1, "hive": {hive}}}\n',
+                "--type",
+                "contaminations",
+            )
+        self.assertFalse(Contamination.objects.exists())
+        self.assertFalse(Intervention.objects.exists())
+
+    def test_invalid_rows(self):
+        """Test that a dry run lists the invalid rows and that nothing is imported
+        from a file with an invalid row."""
+        content = self.interventions_csv() + (
+            f"2021-05-02,harvest,{self.hive.id},,,,,\n"
+            f"2021-05-02,unknown,{self.hive.id},,,,,\n"
+        )
+        output = self.import_file(
+            "history.csv",
+            self.interventions_csv(),
+            "--type",
+            "interventions",
+            "--dry-run",
+        )
+        self.assertIn("5 valid rows", output)
+        with self.assertRaisesMessage(CommandError, "2 invalid rows"):
+            self.import_file(
+                "history.csv", content, "--type", "interventions", "--dry-run"
+            )
+        with self.assertRaisesMessage(CommandError, "Line 7: harvest_quantity"):
+            self.import_file("history.csv", content, "--type", "interventions")
+        self.assertFalse(Intervention.objects.exists())
+        self.assertFalse(Harvest.objects.exists())
+        # Hives of other beekeepers are refused
+        other = User.objects.create_user(username="Other20", password="TestPW123")
+        other_yard = BeeYard.objects.create(name="OtherYard20", beekeeper=other)
+        other_hive = Hive.objects.create(
+            status="active",
+            species="black_bee",
+            beeyard=other_yard,
+            queen_year=2022,
+            name="Other",
+        )
+        with self.assertRaisesMessage(CommandError, "not one of the beekeeper's"):
+            self.import_file(
+                "contaminations.csv",
+                f"type,hive\nparasite,{other_hive.id}\n",
+                "--type",
+                "contaminations",
+            )
+
+
+class FillTestDBTest(TestCase):
+    """Tests for the generation of the test dataset."""
+
+    def fill(self, *args):
+        """Function to generate a dataset and return its content without the ids,
+        which depend on the database sequences. Nothing is kept afterwards."""
+        with transaction.atomic():
+            call_command("filltestdb", *args, stdout=StringIO())
+            hive = "hive_affected__"
+            dataset = [
+                sorted(
+                    Hive.objects.values_list(
+                        "owner__username",
+                        "beeyard__name",
+                        "name",
+                        "status",
+                        "species",
+                        "queen_year",
+                        "date_updated",
+                    )
+                ),
+                sorted(
+                    Intervention.objects.values_list(
+                        f"{hive}owner__username",
+                        f"{hive}beeyard__name",
+                        f"{hive}name",
+                        "intervention_type",
+                        "date",
+                    )
+                ),
+                sorted(Harvest.objects.values_list("quantity", flat=True)),
+                sorted(Contamination.objects.values_list("hive__name", "type", "date")),
+            ]
+            transaction.set_rollback(True)
+        return dataset
+
+    def test_same_seed(self):
+        """Test that a seed always gives the same dataset."""
+        dataset = self.fill("--seed", "3")
+        self.assertEqual(self.fill("--seed", "3"), dataset)
+        self.assertNotEqual(self.fill("--seed", "4"), dataset)
+
+    def test_scale_and_seasons(self):
+        """Test that the scale multiplies the beekeepers and that the dates follow
+        the season of each type of intervention."""
+        with transaction.atomic():
+            call_command(
+                "filltestdb",
+                "--scale",
+                "3",
+                "--interventions-per-hive",
+                "20",
+                stdout=StringIO(),
+            )
+            self.assertEqual(User.objects.filter(is_superuser=False).count(), 30)
+            self.assertTrue(User.objects.filter(username="IdgieThreadgood2").exists())
+            harvest_months = {
+                date.month
+                for date in Intervention.objects.filter(
+                    intervention_type="harvest"
+                ).values_list("date", flat=True)
+            }
+            self.assertTrue(harvest_months)
+            self.assertTrue(harvest_months.issubset(range(4, 11)))
+            # The rollup and the search index are filled in
+            self.assertEqual(
+                DailyInterventionRollup.objects.aggregate(total=Sum("count"))["total"],
+                Intervention.objects.count(),
+            )
+            self.assertTrue(
+                BeekeeperSearchTerm.objects.filter(term__icontains="frank").exists()
+            )
+            transaction.set_rollback(True)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BenchAPITest(TestCase):
+    """Tests for the benchmark of the API routes and its budgets."""
+
+    def test_committed_budgets(self):
+        """Test that every route answers and that none runs more queries than the
+        committed baseline allows. The latencies depend on the machine so are
+        left to the command."""
+        clear_response_cache()
+        out = StringIO()
+        call_command("benchapi", "--repeat", "1", "--queries-only", stdout=out)
+        # The public responses built from the rolled back rows aren't kept
+        self.assertEqual(get_cache_stats(), {"hit": 0, "miss": 0, "stale": 0})
+        self.assertIn("All routes are within their budgets", out.getvalue())
+        self.assertNotIn("No budget", out.getvalue())
+        for name in (
+            "POST apiary:beeyards-health-check-all-hives",
+            "GET apiary:hives-stats",
+            "GET public_api:beekeepers-detail",
+            "GET show_interventions?hive",
+        ):
+            self.assertIn(name, out.getvalue())
+        self.assertFalse(Hive.objects.exists())
+
+    def test_exceeded_budget(self):
+        """Test that the command fails when a route goes over its budget."""
+        options = ["--keepers", "1", "--yards", "1", "--hives", "2"]
+        options += ["--interventions", "4", "--repeat", "1"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            call_command(
+                "benchapi",
+                *options,
+                "--write-baseline",
+                "--baseline",
+                path,
+                stdout=StringIO(),
+            )
+            with open(path) as file:
+                baseline = orjson.loads(file.read())
+            self.assertEqual(baseline["dataset"]["hives"], 2)
+            baseline["routes"]["GET apiary:hives-list"]["queries"] = 1
+            with open(path, "wb") as file:
+                file.write(orjson.dumps(baseline))
+            with self.assertRaisesMessage(CommandError, "GET apiary:hives-list"):
+                call_command(
+                    "benchapi",
+                    *options,
+                    "--queries-only",
+                    "--baseline",
+                    path,
+                    stdout=StringIO(),
+                )
+            # The budgets don't apply to another dataset
+            with self.assertRaisesMessage(CommandError, "same dataset"):
+                call_command("benchapi", "--baseline", path, stdout=StringIO())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LoadTestTest(LiveServerTestCase):
+    """Tests for the load generator, run against a live server."""
+
+    def test_load(self):
+        """Test that every scenario runs without errors and that the simulated
+        beekeepers are removed afterwards."""
+        out = StringIO()
+        call_command(
+            "loadtest",
+            "--url",
+            self.live_server_url,
+            "--duration",
+            "4",
+            "--beekeepers",
+            "2",
+            "--scrapers",
+            "2",
+            "--think-time",
+            "0",
+            "--max-error-rate",
+            "0",
+            stdout=out,
+        )
+        for scenario in ("login", "dashboard", "intervention sync", "public search"):
+            self.assertIn(scenario, out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith="loadtest").exists())
+        self.assertFalse(Hive.objects.exists())
+        self.assertFalse(Intervention.objects.exists())
+
+    def test_no_server(self):
+        """Test that the command stops if no server answers."""
+        with self.assertRaisesMessage(CommandError, "No server answers"):
+            call_command("loadtest", "--url", "http://127.0.0.1:9", stdout=StringIO())
@@ -0,0 +1,152 @@
+# Third-party imports
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import DateTimeField, F, IntegerField, Q, Value
+from django.db.models.functions import Cast
+from django.utils.dateparse import parse_datetime
+
+# Local imports
+from .models import (
+    Contamination,
+    Harvest,
+    Hive,
+    Intervention,
+    SyrupDistribution,
+    Treatment,
+)
+
+# Entries shown per page of a hive's timeline
+TIMELINE_PAGE_SIZE = 20
+
+# Rows fetched at a time when streaming the full history
+TIMELINE_CHUNK_SIZE = 500
+
+# Order of interventions and contaminations happening at the same time
+INTERVENTION_RANK = 1
+CONTAMINATION_RANK = 0
+
+# Columns selected from both tables, in the same order. They are all
+# annotations as Django puts model fields before annotations in a SELECT.
+TIMELINE_COLUMNS = (
+    "sort_date",
+    "rank",
+    "row_id",
+    "label",
+    "detail",
+    "detail_type",
+    "detail_id",
+)
+
+
+def before_cursor(queryset, rank, cursor):
+    """Function to keep the rows of one table which come after the cursor, the
+    timeline being sorted from the newest (date, rank, id) to the oldest."""
+    if cursor is None:
+        return queryset
+    date, cursor_rank, cursor_id = cursor
+    if rank < cursor_rank:
+        return queryset.filter(sort_date__lte=date)
+    if rank > cursor_rank:
+        return queryset.filter(sort_date__lt=date)
+    return queryset.filter(
+        Q(sort_date__lt=date) | Q(sort_date=date, row_id__lt=cursor_id)
+    )
+
+
+def timeline_query(hive_id, cursor=None):
+    """Function returning the interventions and contaminations of a hive, newest
+    first, as a single UNION query. Contamination dates are cast to datetimes
+    so both tables can be sorted together."""
+    interventions = Intervention.objects.filter(hive_affected_id=hive_id).annotate(
+        sort_date=F("date"),
+        rank=Value(INTERVENTION_RANK),
+        row_id=F("id"),
+        label=F("intervention_type"),
+        detail=Value(""),
+        detail_type=F("content_type_id"),
+        detail_id=F("object_id"),
+    )
+    contaminations = Contamination.objects.filter(hive_id=hive_id).annotate(
+        sort_date=Cast("date", DateTimeField()),
+        rank=Value(CONTAMINATION_RANK),
+        row_id=F("id"),
+        label=Value("contamination"),
+        detail=F("type"),
+        # Contaminations have no content object
+        detail_type=Value(None, output_field=IntegerField()),
+        detail_id=Value(None, output_field=IntegerField()),
+    )
+    interventions = before_cursor(interventions, INTERVENTION_RANK, cursor)
+    contaminations = before_cursor(contaminations, CONTAMINATION_RANK, cursor)
+    return (
+        interventions.values_list(*TIMELINE_COLUMNS)
+        .union(contaminations.values_list(*TIMELINE_COLUMNS), all=True)
+        .order_by("-sort_date", "-rank", "-row_id")
+    )
+
+
+def make_cursor(row):
+    """Function returning the cursor pointing after a timeline row."""
+    return f"{row[0].isoformat()},{row[1]},{row[2]}"
+
+
+def parse_cursor(value):
+    """Function to read a cursor made by make_cursor, returns None if it isn't valid."""
+    try:
+        date, rank, row_id = value.split(",")
+        date = parse_datetime(date)
+        if date is None:
+            return None
+        return date, int(rank), int(row_id)
+    except ValueError:
+        return None
+
+
+def load_content_objects(rows):
+    """Function to fetch the content objects of a list of timeline rows with one
+    query per content type. Returns a dict keyed by (content_type_id, object_id)."""
+    ids_by_type = {}
+    for row in rows:
+        if row[5] is not None and row[6] is not None:
+            ids_by_type.setdefault(row[5], set()).add(row[6])
+    content_objects = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        queryset = model._default_manager.all()
+        if model is Hive:
+            # The beeyard is part of the child hive's description
+            queryset = queryset.select_related("beeyard")
+        for object_id, obj in queryset.in_bulk(ids).items():
+            content_objects[(content_type_id, object_id)] = obj
+    return content_objects
+
+
+def build_entries(rows):
+    """Function to turn timeline rows into the dictionaries shown by the template."""
+    content_objects = load_content_objects(rows)
+    entries = []
+    for row in rows:
+        sort_date, rank, row_id, label, detail, content_type_id, object_id = row
+        entry = {"intervention_type": label, "date": sort_date}
+        if rank == CONTAMINATION_RANK:
+            entry["date"] = sort_date.date()
+            entry["type"] = detail
+            entries.append(entry)
+            continue
+        content_object = content_objects.get((content_type_id, object_id))
+        # Add details for interventions with a generic foreign key
+        if isinstance(content_object, SyrupDistribution):
+            entry["quantity"] = content_object.quantity
+            entry["units"] = "liters"
+            entry["syrup_type"] = content_object.syrup_type
+        elif isinstance(content_object, Harvest):
+            entry["quantity"] = content_object.quantity
+            entry["units"] = "kilos"
+        elif isinstance(content_object, Treatment):
+            entry["treatment_type"] = content_object.treatment_type
+        elif isinstance(content_object, Hive):
+            if content_object.beeyard_id:
+                entry["child_hive"] = str(content_object)
+            else:
+                entry["child_hive"] = f"Hive {content_object.name}"
+        entries.append(entry)
+    return entries
@@ -1,3 +1,6 @@
+# Standard library imports
+import copy
+
 # Third-party imports
 from django.contrib.auth.models import AnonymousUser
 from django.urls import path
@@ -21,6 +24,9 @@ class BeeAppliPrivateApiaryAPI(routers.APIRootView):
 
 class DocumentedPrivateRouter(routers.DefaultRouter):
     APIRootView = BeeAppliPrivateApiaryAPI
+    # Send PATCH requests on the list route to the batch update of viewsets which have one
+    routes = copy.deepcopy(routers.DefaultRouter.routes)
+    routes[0].mapping["patch"] = "bulk_partial_update"
 
 
 # Create a router to organize API views
@@ -0,0 +1,24 @@
+# Third-party imports
+from django.db import connection
+
+
+class CountQueries:
+    """Context manager which counts the SQL queries run on the default
+    database connection while it is open. Works with DEBUG turned off,
+    unlike connection.queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Called by Django for every query executed on the connection
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
@@ -1,9 +1,16 @@
+# Standard library imports
+from collections import defaultdict
+from itertools import islice
+
 # Third-party imports
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth.views import LoginView
+from django.http import StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.utils.functional import SimpleLazyObject
 from django_filters import rest_framework as filters
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
@@ -11,15 +18,43 @@ from rest_framework.response import Response
 
 
 # Local imports
+from .bulk import BatchModelMixin, as_pk, bulk_apply_intervention
+from .caching import (
+    BEEYARDS_FRAGMENT_TIMEOUT,
+    invalidate_beeyards_fragment,
+    invalidate_stats,
+)
+from .export import ExportMixin, InterventionExportMixin
+from .fastpath import FastListMixin
 from .models import BeeYard, Contamination, Hive, Intervention
+from .pagination import PrivateAPIPagination
 from .permissions import IsKeeper
+from .rollup import move_hives, sync_interventions
 from .serializers import (
+    ApplyInterventionSerializer,
     BeeYardSerializer,
     ContaminationSerializer,
     HiveSerializer,
     InterventionSerializer,
 )
+from .sparse import SparseQuerysetMixin
+from .stats import StatsMixin
 from .filters import BeeYardFilter, ContaminationFilter, HiveFilter, InterventionFilter
+from .lineage import get_lineage
+from .timeline import (
+    TIMELINE_CHUNK_SIZE,
+    TIMELINE_PAGE_SIZE,
+    build_entries,
+    make_cursor,
+    parse_cursor,
+    timeline_query,
+)
+from .utils import CountQueries
+from public_api.versions import BEEYARDS, HIVES, bump_versions_on_commit
+
+
+# Placeholder for the list of entries when streaming the interventions page
+STREAM_MARKER = "<!-- timeline entries -->"
 
 
 # custom 404 view
@@ -35,12 +70,17 @@ def custom_401(request, exception):
 ##### Views for Beekeeper Access to Data via private API #####
 
 
-class BeeYardViewSet(viewsets.ModelViewSet):
+class BeeYardViewSet(
+    SparseQuerysetMixin, StatsMixin, ExportMixin, viewsets.ModelViewSet
+):
     """API to allow CRUD on beeyard data."""
 
     # Set the queryset to all beeyard objects
     queryset = BeeYard.objects.all()
     serializer_class = BeeYardSerializer
+    pagination_class = PrivateAPIPagination
+    # Order of the pages when a cursor is requested
+    keyset_ordering = ("id",)
     permission_classes = [
         # Only allow access to the beeyards of
         # the authenticated beekeeper
@@ -50,38 +90,92 @@ class BeeYardViewSet(viewsets.ModelViewSet):
     ]
     filterset_class = BeeYardFilter
     filter_backends = (filters.DjangoFilterBackend,)
+    # The hive IDs and details both come from one query
+    prefetch_related_fields = {"hives": ["hives"], "hives_detailed": ["hives"]}
+    required_columns = ("beekeeper",)
+    # The stats cover the hives of the beeyard
+    stats_hive_lookup = "beeyard"
+    export_columns = ("id", "name")
 
     def get_queryset(self, *args, **kwargs):
         """Restricts the queryset to only items owned by the requesting user."""
         return BeeYard.objects.all().filter(beekeeper=self.request.user)
 
-    @action(detail=True, methods=["POST"])
-    def health_check_all_hives(self, request, pk):
-        """Function to apply a health check to all the hives in the same beeyard."""
-        # Get the beeyard object for the provided ID
-        beeyard = BeeYard.objects.get(id=pk)
-        # Find hives which belong to the beeyard
-        hives = Hive.objects.filter(beeyard=beeyard)
-        # Save a copy of the intervention object for the HTTP response
-        interventions = []
-        # Make an intervention object for each hive and add it to the response data
-        for hive in hives:
-            intervention = Intervention.objects.create(
-                intervention_type="Health Check", hive_affected=hive
+    def apply_to_hives(self, request, beeyard, data):
+        """Function to apply the validated intervention to the hives of the beeyard
+        and build the HTTP response including the number of queries used."""
+        with CountQueries() as queries:
+            # Find hives which belong to the beeyard, optionally only the selected ones
+            hives = Hive.objects.filter(beeyard=beeyard)
+            if "hives" in data:
+                hives = hives.filter(id__in=data["hives"])
+                if len(hives) != len(set(data["hives"])):
+                    return Response(
+                        {"hives": "Some hives were not found in this beeyard."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+            detail = data["detail"]
+            if data["intervention_type"] == Intervention.ARTIFICIAL_SWARMING:
+                # A child hive can only come from one parent
+                if len(hives) != 1:
+                    return Response(
+                        {"hives": "An artificial swarming applies to a single hive."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                child_hive = Hive.objects.filter(
+                    id=detail["child_hive"], owner=request.user
+                ).first()
+                if child_hive is None:
+                    return Response(
+                        {"detail": {"child_hive": "Hive not found."}},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                detail = {"child_hive": child_hive}
+            # Insert every intervention at once
+            interventions = bulk_apply_intervention(
+                hives, data["intervention_type"], detail
             )
-            intervention = InterventionSerializer(intervention)
-            interventions.append(intervention.data)
-        # Put the expected JSON format.
-        response_data = {"interventions": interventions}
+            invalidate_stats(request.user.id)
+            # Serialize all the created rows in one pass
+            serializer = InterventionSerializer(interventions, many=True)
+            response_data = {"interventions": serializer.data}
+        response_data["query_count"] = queries.count
         # Return the created data and a 201 Created code
         return Response(response_data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=["POST"])
+    def apply_intervention(self, request, pk):
+        """Function to apply any type of intervention to all the hives in the same beeyard,
+        or to the hives listed in the request."""
+        beeyard = self.get_object()
+        serializer = ApplyInterventionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self.apply_to_hives(request, beeyard, serializer.validated_data)
 
-class HiveViewSet(viewsets.ModelViewSet):
-    """View to allow CRUD operations on hive data."""
+    @action(detail=True, methods=["POST"])
+    def health_check_all_hives(self, request, pk):
+        """Function to apply a health check to all the hives in the same beeyard."""
+        beeyard = self.get_object()
+        data = {"intervention_type": Intervention.HEALTH_CHECK, "detail": {}}
+        return self.apply_to_hives(request, beeyard, data)
+
+
+class HiveViewSet(
+    SparseQuerysetMixin,
+    FastListMixin,
+    StatsMixin,
+    ExportMixin,
+    BatchModelMixin,
+    viewsets.ModelViewSet,
+):
+    """View to allow CRUD operations on hive data. Several hives can be created
+    or updated at once by sending a list."""
 
     queryset = Hive.objects.all()
     serializer_class = HiveSerializer
+    pagination_class = PrivateAPIPagination
+    # Order of the pages when a cursor is requested
+    keyset_ordering = ("id",)
     permission_classes = [
         permissions.IsAuthenticated,
         # Only allows access to the beeyards of
@@ -90,17 +184,73 @@ class HiveViewSet(viewsets.ModelViewSet):
     ]
     filterset_class = HiveFilter
     filter_backends = (filters.DjangoFilterBackend,)
+    required_columns = ("owner",)
+    export_columns = (
+        "id",
+        "name",
+        "status",
+        "species",
+        "queen_year",
+        "date_updated",
+        "beeyard",
+        "beeyard__name",
+    )
 
     def get_queryset(self, *args, **kwargs):
         """Restricts the queryset to only hives belonging to the connected beekeeper."""
-        return Hive.objects.all().filter(beeyard__beekeeper=self.request.user)
-
+        return Hive.objects.all().filter(owner=self.request.user)
+
+    @action(detail=True, methods=["GET"])
+    def lineage(self, request, pk):
+        """Function returning the ancestors and descendants of the hive through
+        artificial swarmings, to any depth, read with a single query."""
+        hive = self.get_object()
+        ancestors, descendants, links = get_lineage(hive.id, request.user.id)
+        return Response(
+            {
+                "hive": hive.id,
+                "ancestors": self.serialize_generations(ancestors),
+                "descendants": self.serialize_generations(descendants),
+                "links": [
+                    {"parent": parent, "child": child} for parent, child in links
+                ],
+            }
+        )
 
-class InterventionViewSet(viewsets.ModelViewSet):
-    """View to allow CRUD operations on intervention data."""
+    def serialize_generations(self, hives):
+        """Function to serialize lineage hives along with their generation, 1 for
+        the parents or children of the hive."""
+        data = self.get_serializer(hives, many=True).data
+        for hive, hive_data in zip(hives, data):
+            hive_data["generation"] = hive.generation
+        return data
+
+    def batch_saved(self, objects):
+        # The beekeeper's cached list of hives is out of date, and so are the
+        # public lists as bulk_create and bulk_update don't send post_save
+        invalidate_beeyards_fragment(self.request.user.id)
+        invalidate_stats(self.request.user.id)
+        bump_versions_on_commit(BEEYARDS, HIVES)
+        # The rollup rows follow the hives moved to another beeyard
+        move_hives([hive.id for hive in objects])
+
+
+class InterventionViewSet(
+    SparseQuerysetMixin,
+    FastListMixin,
+    InterventionExportMixin,
+    BatchModelMixin,
+    viewsets.ModelViewSet,
+):
+    """View to allow CRUD operations on intervention data. Several interventions
+    can be created or updated at once by sending a list."""
 
     queryset = Intervention.objects.all()
     serializer_class = InterventionSerializer
+    pagination_class = PrivateAPIPagination
+    # Order of the pages when a cursor is requested
+    keyset_ordering = ("-date", "-id")
+    batch_prefetch = ("content_object",)
     permission_classes = [
         permissions.IsAuthenticated,
         # Only allows access to the beeyards of
@@ -109,21 +259,56 @@ class InterventionViewSet(viewsets.ModelViewSet):
     ]
     filterset_class = InterventionFilter
     filter_backends = (filters.DjangoFilterBackend,)
+    # Load the content objects of a whole page with one IN query per
+    # content type instead of one query per intervention
+    prefetch_related_fields = {"content_object": ["content_object"]}
+    required_columns = ("owner",)
 
     def get_queryset(self, *args, **kwargs):
         """Restricts the queryset to only interventions on hives
         belonging to the connected beekeeper."""
 
-        return Intervention.objects.all().filter(
-            hive_affected__beeyard__beekeeper=self.request.user
-        )
-
-
-class ContaminationViewSet(viewsets.ModelViewSet):
+        return Intervention.objects.all().filter(owner=self.request.user)
+
+    def preload_related(self, items):
+        """Function to also check the content objects of all the items, with one
+        query per content type."""
+        super().preload_related(items)
+        content_types = self.preloaded["content_type"]
+        ids = defaultdict(set)
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            content_type = content_types.get(as_pk(item.get("content_type")))
+            object_id = as_pk(item.get("object_id"))
+            if content_type is not None and object_id is not None:
+                ids[content_type].add(object_id)
+        serializer = self.get_serializer()
+        # Whether each content object of the batch may be used
+        checked = {}
+        for content_type, object_ids in ids.items():
+            allowed = serializer.allowed_content_objects(content_type, object_ids)
+            for object_id in object_ids:
+                checked[content_type.id, object_id] = object_id in allowed
+        self.preloaded["content_object"] = checked
+
+    def batch_saved(self, objects):
+        # Bulk writes don't send the post_save signal clearing the stats and
+        # updating the rollup
+        invalidate_stats(self.request.user.id)
+        sync_interventions(objects)
+
+
+class ContaminationViewSet(
+    SparseQuerysetMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet
+):
     """View to allow CRUD operations on hive data."""
 
     queryset = Contamination.objects.all()
     serializer_class = ContaminationSerializer
+    pagination_class = PrivateAPIPagination
+    # Order of the pages when a cursor is requested
+    keyset_ordering = ("-date", "-id")
     permission_classes = [
         permissions.IsAuthenticated,
         # Only allows access to the beeyards of
@@ -132,12 +317,13 @@ class ContaminationViewSet(viewsets.ModelViewSet):
     ]
     filterset_class = ContaminationFilter
     filter_backends = (filters.DjangoFilterBackend,)
+    required_columns = ("owner",)
+    export_columns = ("id", "date", "type", "hive", "hive__name")
+    export_ordering = ("date", "id")
 
     def get_queryset(self, *args, **kwargs):
         """Restricts the queryset to only hives belonging to the connected beekeeper."""
-        return Contamination.objects.all().filter(
-            hive__beeyard__beekeeper=self.request.user
-        )
+        return Contamination.objects.all().filter(owner=self.request.user)
 
 
 ##### Template Views #####
@@ -154,6 +340,46 @@ def logout_request(request):
     return redirect("/apiary/login")
 
 
+def get_beeyard_data(user):
+    """Function returning the beeyards of the user with the details of their hives,
+    loaded in one query which only selects the columns shown in the template."""
+    rows = (
+        BeeYard.objects.filter(beekeeper=user)
+        .order_by("id", "hives__id")
+        .values_list(
+            "id",
+            "name",
+            "hives__id",
+            "hives__name",
+            "hives__status",
+            "hives__species",
+            "hives__date_updated",
+            "hives__queen_year",
+        )
+    )
+    data = []
+    beeyard_id = None
+    for row in rows:
+        # Rows are sorted by beeyard, start a new one when the ID changes
+        if row[0] != beeyard_id:
+            beeyard_id = row[0]
+            hives = []
+            data.append({"beeyard_name": row[1], "hives": hives})
+        # Beeyards without hives have a single row with no hive
+        if row[2] is not None:
+            hives.append(
+                {
+                    "id": row[2],
+                    "name": row[3],
+                    "status": row[4],
+                    "species": row[5],
+                    "date_updated": row[6],
+                    "queen_year": row[7],
+                }
+            )
+    return data
+
+
 def show_beeyards(request):
     """Returns a view of all the bee yards and hives of the connected user."""
     # If the user is not connected, return a 401 page
@@ -164,32 +390,22 @@ def show_beeyards(request):
             status=status.HTTP_401_UNAUTHORIZED,
         )
 
-    # Query beeyards for those belonging to the user
-    beeyard_query = BeeYard.objects.filter(beekeeper=request.user)
-
-    # If none are found display a message
-    if len(beeyard_query) == 0:
-        return render(request, "index.html", {"beeyard_data": None})
-
-    # For each beeyard, get data for each hive
-    data = []
-    for beeyard in beeyard_query.all():
-        hive_query = Hive.objects.filter(beeyard=beeyard.id).all()
-        hives = []
-        for hive in hive_query:
-            hives.append(hive.__dict__)
-        data.append({"beeyard_name": beeyard.name, "hives": hives})
-
-    # Create the json type object to pass the results to the template
-    context = {"beeyard_data": data, "user": request.user.username}
-    # test_context = {"beeyard_data": None, "user": "bob"}
+    user = request.user
+    # The query only runs if the page isn't already cached for this user
+    context = {
+        "beeyard_data": SimpleLazyObject(lambda: get_beeyard_data(user)),
+        "user": user.username,
+        "user_id": user.id,
+        "cache_timeout": BEEYARDS_FRAGMENT_TIMEOUT,
+    }
     # Return an http response to the request with the filled-in template
     return render(request, "index.html", context)
 
 
 def show_interventions(request):
-    """Returns a view which shows all of the interventions for a given hive if
-    it belongs to the connected user"""
+    """Returns a view which shows the interventions and contaminations of a given
+    hive, newest first, if it belongs to the connected user. The timeline is
+    shown one page at a time, or streamed in full with ?full=1."""
     # If the user is not connected, return a 401 page
     if isinstance(request.user, AnonymousUser):
         return render(
@@ -197,10 +413,10 @@ def show_interventions(request):
             "401.html",
             status=status.HTTP_401_UNAUTHORIZED,
         )
-    # If no hive number is specified, return 404 error
+    # If no valid hive number is specified, return 404 error
     try:
-        hive_id = request.GET["hive"]
-    except:
+        hive_id = int(request.GET["hive"])
+    except (KeyError, ValueError):
         return render(
             request,
             "404.html",
@@ -208,48 +424,65 @@ def show_interventions(request):
         )
 
     # Query the given hive ID
-    hive_query = Hive.objects.filter(id=hive_id).values()
+    hive = Hive.objects.filter(id=hive_id).values("name", "owner_id").first()
 
     # If no hive is found, return not found page
-    if len(hive_query) == 0:
+    if hive is None:
         return render(
             request,
             "404.html",
             status=status.HTTP_404_NOT_FOUND,
         )
-    # Verify that the hive belongs to the connected user
-    beeyard_id = hive_query[0]["beeyard_id"]
-    beeyard = BeeYard.objects.filter(id=beeyard_id).values()
-
     # If the hive doesn't belong to the user, return 401 page
-    if beeyard[0]["beekeeper_id"] != request.user.id:
+    if hive["owner_id"] != request.user.id:
         return render(
             request,
             "401.html",
             status=status.HTTP_401_UNAUTHORIZED,
         )
-    # Query and return a view of the hive's interventions
-    intervention_query = Intervention.objects.filter(hive_affected=hive_id).all()
-    interventions = []
-    hive = intervention_query[0].hive_affected
-    for intervention in intervention_query:
-        intervention_data = {
-            "intervention_type": intervention.intervention_type,
-            "date": intervention.date,
-        }
-        # Add details for interventions with a generic foreign key
-        if intervention.intervention_type == "syrup_distribution":
-            intervention_data["quantity"] = intervention.content_object.quantity
-            intervention_data["units"] = "liters"
-            intervention_data["syrup_type"] = intervention.content_object.syrup_type
-        elif intervention.intervention_type == "harvest":
-            intervention_data["quantity"] = intervention.content_object.quantity
-            intervention_data["units"] = "kilos"
-        elif intervention.intervention_type == "treatment":
-            intervention_data["type"] = intervention.content_object.type
-        elif intervention.intervention_type == "artificial_swarming":
-            intervention_data["child_hive"] = intervention.content_object.__str__
-
-        interventions.append(intervention_data)
-    context = {"hive": hive.name, "interventions": interventions}
+
+    context = {"hive": hive["name"], "hive_id": hive_id}
+
+    if request.GET.get("full"):
+        return stream_interventions(request, hive_id, context)
+
+    # Start after the last entry of the previous page if one is given
+    cursor = None
+    if "after" in request.GET:
+        cursor = parse_cursor(request.GET["after"])
+        if cursor is None:
+            return render(
+                request,
+                "404.html",
+                status=status.HTTP_404_NOT_FOUND,
+            )
+    # Fetch one more row than needed to know if there is a next page
+    rows = list(timeline_query(hive_id, cursor)[: TIMELINE_PAGE_SIZE + 1])
+    if len(rows) > TIMELINE_PAGE_SIZE:
+        rows = rows[:TIMELINE_PAGE_SIZE]
+        context["next_page"] = make_cursor(rows[-1])
+    context["interventions"] = build_entries(rows)
     return render(request, "interventions.html", context)
+
+
+def stream_interventions(request, hive_id, context):
+    """Returns the full timeline of a hive as a streamed page. Rows are read from
+    the database and rendered in chunks so memory use doesn't grow with the
+    length of the hive's history."""
+    # Render the page around the list, then send the list in between
+    context["stream_marker"] = STREAM_MARKER
+    page = render_to_string("interventions.html", context, request)
+    head, tail = page.split(STREAM_MARKER)
+
+    def entries():
+        yield head
+        rows = timeline_query(hive_id).iterator(chunk_size=TIMELINE_CHUNK_SIZE)
+        chunk = list(islice(rows, TIMELINE_CHUNK_SIZE))
+        while chunk:
+            yield render_to_string(
+                "timeline_entries.html", {"interventions": build_entries(chunk)}
+            )
+            chunk = list(islice(rows, TIMELINE_CHUNK_SIZE))
+        yield tail
+
+    return StreamingHttpResponse(entries())
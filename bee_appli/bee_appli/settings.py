@@ -1,5 +1,6 @@
 # Standard library imports
 import os
+import tempfile
 from pathlib import Path
 
 # Third-party imports
@@ -145,10 +146,49 @@ AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",
 ]
 
-# Pagination settings
+# Cache, used for template fragments. Cached data is removed by signals in the
+# process making the change, so servers running several processes should use a
+# shared backend such as FileBasedCache or Memcached.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Responses of the public API. Kept in files so every process shares them
+    # and the warmpubliccache command can fill them in before starting.
+    "public_api": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": env(
+            "PUBLIC_API_CACHE_DIR",
+            default=os.path.join(tempfile.gettempdir(), "bee_appli_public_api"),
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+# Seconds a cached public API response is fresh, 0 turns the cache off
+PUBLIC_API_CACHE_TIMEOUT = 300
+
+# Seconds a response which is no longer fresh can still be served while
+# another request rebuilds it
+PUBLIC_API_CACHE_STALE = 3600
+
+# API settings
 
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "public_api.paginaton.PublicAPIPagination"
+    "DEFAULT_PAGINATION_CLASS": "public_api.paginaton.PublicAPIPagination",
+    # JSON is written and read with orjson, and MessagePack is sent to the
+    # clients which ask for it with 'Accept: application/msgpack'
+    "DEFAULT_RENDERER_CLASSES": [
+        "apiary.renderers.ORJSONRenderer",
+        "apiary.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apiary.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 # Login settings
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PublicApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'public_api'
+
+    def ready(self):
+        # Connect the signal receivers
+        from . import signals
@@ -0,0 +1,134 @@
+# Standard library imports
+import hashlib
+import time
+
+# Third-party imports
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+# Local imports
+from .versions import CollectionViewMixin
+
+# Events counted by the response cache
+HIT = "hit"
+MISS = "miss"
+STALE = "stale"
+
+# Query parameters of the pagination and of the fields returned, kept in the
+# cache keys with the filters
+RESPONSE_PARAMS = ("page", "size", "fields", "expand")
+
+# Seconds during which a worker is left to refresh a stale entry before
+# another one tries
+REFRESH_LOCK_TIMEOUT = 30
+
+
+def get_response_cache():
+    """Function returning the cache backend holding the public API responses."""
+    return caches["public_api"]
+
+
+def count(event):
+    """Function to add one to the counter of a cache event."""
+    response_cache = get_response_cache()
+    key = f"public_api:stats:{event}"
+    response_cache.add(key, 0, None)
+    try:
+        response_cache.incr(key)
+    except ValueError:
+        # The counter was removed in between
+        response_cache.set(key, 1, None)
+
+
+def get_cache_stats():
+    """Function returning the number of hits, misses and stale entries served."""
+    response_cache = get_response_cache()
+    keys = {event: f"public_api:stats:{event}" for event in (HIT, MISS, STALE)}
+    values = response_cache.get_many(keys.values())
+    return {event: values.get(key, 0) for event, key in keys.items()}
+
+
+def clear_response_cache():
+    """Function to remove every cached response and the counters."""
+    get_response_cache().clear()
+
+
+class CachedResponseMixin(CollectionViewMixin):
+    """Mixin caching the data of the list and detail responses of a collection of
+    the public API. An entry is fresh while the version of the collection, raised
+    by signals on every change, is the one it was built from and for
+    PUBLIC_API_CACHE_TIMEOUT seconds. Once it is out of date, the first request
+    rebuilds it while the others are still served the stale data for up to
+    PUBLIC_API_CACHE_STALE seconds, so all the workers don't rebuild the same
+    page at once."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        """Function returning the cache key of a request. The query parameters which
+        aren't filters, pagination or fields are left out and the others are sorted, so
+        that requests for the same data share an entry."""
+        allowed = set(RESPONSE_PARAMS)
+        if self.filterset_class is not None:
+            allowed.update(self.filterset_class.base_filters)
+        params = []
+        for name in sorted(allowed & set(request.query_params)):
+            values = [value.strip() for value in request.query_params.getlist(name)]
+            values = [value for value in values if value]
+            if name == "page" and values == ["1"]:
+                # The first page is the same with or without its number
+                continue
+            if values:
+                params.append((name, sorted(values)))
+        # The links to the other pages hold the host
+        normalized = repr((request.get_host(), self.kwargs.get("pk"), params))
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return f"public_api:entry:{self.collection}:{self.action}:{digest}"
+
+    def cached(self, view, request, *args, **kwargs):
+        """Function returning the cached response data of the request when it is
+        fresh, or when it is stale and another worker is rebuilding it, and
+        otherwise calling the view and caching its data. Entries keep the version
+        of the collection they were built from and the time it changed, which
+        are set in the collection_version of stale responses."""
+        timeout = settings.PUBLIC_API_CACHE_TIMEOUT
+        if not timeout:
+            return view(request, *args, **kwargs)
+        response_cache = get_response_cache()
+        key = self.get_cache_key(request)
+        version, last_modified = self.get_collection_version()
+        entry = response_cache.get(key)
+        lock = None
+        if entry is None:
+            count(MISS)
+        else:
+            entry_version, entry_modified, fresh_until, data = entry
+            if entry_version == version and fresh_until > time.time():
+                count(HIT)
+                return Response(data, headers={"X-Cache": "HIT"})
+            lock = f"{key}:refresh"
+            if not response_cache.add(lock, 1, REFRESH_LOCK_TIMEOUT):
+                count(STALE)
+                response = Response(data, headers={"X-Cache": "STALE"})
+                response.collection_version = (entry_version, entry_modified)
+                return response
+            count(MISS)
+
+        try:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response_cache.set(
+                    key,
+                    (version, last_modified, time.time() + timeout, response.data),
+                    timeout + settings.PUBLIC_API_CACHE_STALE,
+                )
+        finally:
+            if lock is not None:
+                response_cache.delete(lock)
+        response["X-Cache"] = "MISS"
+        return response
@@ -1,10 +1,10 @@
 # Third-party imports
 from django_filters import rest_framework as filters
-from django.db.models import Q
 
 # Local imports
 from apiary.models import BeeYard, Hive
 from .models import PublicContact
+from .search import filter_by_beekeeper_search
 
 
 class HiveFilter(filters.FilterSet):
@@ -15,25 +15,10 @@ class HiveFilter(filters.FilterSet):
 
     def find_keeper(self, queryset, name, value):
         """A function to search for a hive by the  beekeeper's name which returns results only
-        for beekeepers who have agreed to make their contact information public."""
-        # Exclude keepers who have not agreed to share their contact info
-        queryset = queryset.exclude(beeyard__beekeeper__allows_public_contact=None)
-        # If the user enters a first and last name this splits it into two
-        names = value.split()
-        if len(names) == 1:
-            # if only one name is provided search first and last for it
-            filter_condition = Q(
-                beeyard__beekeeper__first_name__icontains=names[0]
-            ) | Q(beeyard__beekeeper__last_name__icontains=names[0])
-
-        elif len(names) > 1:
-            # if two names are provided search first names for the first or
-            # last names for the second
-            filter_condition = Q(
-                beeyard__beekeeper__first_name__icontains=names[0]
-            ) | Q(beeyard__beekeeper__last_name__icontains=names[1])
-        queryset = queryset.filter(filter_condition)
-        return queryset
+        for beekeepers who have agreed to make their contact information public.
+        The best matches come first."""
+        # Only public beekeepers are in the search index
+        return filter_by_beekeeper_search(queryset, "beeyard__beekeeper", value)
 
     class Meta:
         model = Hive
@@ -56,30 +41,10 @@ class BeeYardFilter(filters.FilterSet):
 
     def find_keeper(self, queryset, name, value):
         """A function to search for a hive by the  beekeeper's name which returns results only
-        for beekeepers who have agreed to make their contact information public."""
-
-        # Exclude keepers who have not agreed to share their contact info
-        queryset = queryset.exclude(beekeeper__allows_public_contact=None)
-
-        # If the user enters a first and last name this splits it into two
-        names = value.split()
-
-        # if only one name is provided search first and last for it
-        if len(names) == 1:
-            filter_condition = Q(beekeeper__first_name__icontains=names[0]) | Q(
-                beekeeper__last_name__icontains=names[0]
-            )
-
-        # if two names are provided search first names for the first or
-        # last names for the second
-        elif len(names) > 1:
-            filter_condition = Q(beekeeper__first_name__icontains=names[0]) | Q(
-                beekeeper__last_name__icontains=names[1]
-            )
-
-        queryset = queryset.filter(filter_condition)
-
-        return queryset
+        for beekeepers who have agreed to make their contact information public.
+        The best matches come first."""
+        # Only public beekeepers are in the search index
+        return filter_by_beekeeper_search(queryset, "beekeeper", value)
 
     class Meta:
         model = BeeYard
@@ -0,0 +1,61 @@
+# Third-party imports
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+
+# Local imports
+from apiary.management.commands._benchmark import BenchmarkCommand
+from public_api.caching import clear_response_cache, get_cache_stats
+
+# Requests compared with and without the response cache. The last page is the
+# deepest one whatever the number of beekeepers seeded.
+URLS = [
+    "/public_api/hives/",
+    "/public_api/hives/?page=last",
+    "/public_api/hives/?status=active&size=40",
+    "/public_api/beeyards/",
+    "/public_api/beeyards/?name__icontains=yard",
+]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Compares the throughput of the public API with and without its "
+        "response cache"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keepers", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=50, help="Requests per url")
+
+    def run_benchmark(self, *args, **options):
+        keepers = self.seed_dataset(options["keepers"], 2, 10, 0, 0)
+        client = self.make_client()
+        # The cached data is built from rows which are rolled back at the end
+        clear_response_cache()
+        try:
+            self.stdout.write(
+                f"{'url':<44}{'uncached/s':>12}{'cached/s':>12}{'speedup':>9}"
+            )
+            for url in URLS:
+                with override_settings(PUBLIC_API_CACHE_TIMEOUT=0):
+                    uncached = self.measure(client, url, options["repeat"])
+                # Fill the entry first so only hits are timed
+                client.get(url)
+                cached = self.measure(client, url, options["repeat"])
+                self.stdout.write(
+                    f"{url:<44}{uncached:>12.1f}{cached:>12.1f}"
+                    f"{cached / uncached:>8.1f}x"
+                )
+            stats = get_cache_stats()
+            self.stdout.write(
+                f"{stats['hit']} hits, {stats['miss']} misses, {stats['stale']} stale"
+            )
+        finally:
+            clear_response_cache()
+
+    def measure(self, client, url, repeat):
+        """Function returning the number of requests per second answered for a url."""
+        elapsed, response = self.time_calls(lambda: client.get(url), repeat)
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} answered {response.status_code}")
+        return repeat / elapsed
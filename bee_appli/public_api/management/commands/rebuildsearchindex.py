@@ -0,0 +1,24 @@
+# Standard library imports
+import time
+
+# Third-party imports
+from django.core.management.base import BaseCommand
+
+# Local imports
+from public_api.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the search index of the public beekeeper names, for users "
+        "created without sending signals (bulk inserts, raw SQL)"
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild_search_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} beekeepers indexed in {time.perf_counter() - start:.2f} s"
+            )
+        )
@@ -0,0 +1,61 @@
+# Standard library imports
+import time
+
+# Third-party imports
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+# Local imports
+from public_api.caching import clear_response_cache, get_cache_stats
+
+# Lists of the public API which are cached
+CACHED_LISTS = ["/public_api/hives/", "/public_api/beeyards/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the response cache of the public API with the first pages of the "
+        "hives and beeyards lists"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages", type=int, default=5, help="Pages of each list to load"
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host the API is served on, as the links in the pages include it",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Empty the cache first so every page is rebuilt",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            clear_response_cache()
+        client = Client(SERVER_NAME=options["host"])
+        start = time.perf_counter()
+        for url in CACHED_LISTS:
+            for page in range(options["pages"]):
+                page_start = time.perf_counter()
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url} answered {response.status_code}")
+                self.stdout.write(
+                    f"GET {url} {response['X-Cache']} "
+                    f"{(time.perf_counter() - page_start) * 1000:.1f} ms"
+                )
+                url = response.json()["next"]
+                if url is None:
+                    break
+        stats = get_cache_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Cache warmed in {time.perf_counter() - start:.2f} s "
+                f"({stats['hit']} hits, {stats['miss']} misses, "
+                f"{stats['stale']} stale)"
+            )
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_api', '0002_alter_publiccontact_public_beekeeper_info'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('name', models.CharField(help_text='The name of the collection.', max_length=30, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0, help_text='Raised by one on every change.')),
+                ('last_modified', models.DateTimeField(auto_now=True, help_text='The time of the last change.')),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 16:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_api', '0003_collectionversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BeekeeperSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('token', 'Token'), ('trigram', 'Trigram')], help_text='A whole word or a trigram.', max_length=10)),
+                ('term', models.CharField(help_text='The accent-folded, lowercase word or trigram.', max_length=150)),
+                ('beekeeper', models.ForeignKey(db_index=False, help_text='The beekeeper whose name contains the term.', on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term'], name='search_kind_term_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='beekeepersearchterm',
+            constraint=models.UniqueConstraint(fields=('beekeeper', 'kind', 'term'), name='search_unique_term'),
+        ),
+    ]
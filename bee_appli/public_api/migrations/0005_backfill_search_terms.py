@@ -0,0 +1,40 @@
+# Indexes the names of the beekeepers who already share their contact information
+
+from django.db import migrations
+
+from public_api.search import make_trigrams, normalize
+
+# Terms inserted per statement
+BATCH_SIZE = 1000
+
+
+def backfill_search_terms(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    BeekeeperSearchTerm = apps.get_model("public_api", "BeekeeperSearchTerm")
+
+    rows = []
+    users = User.objects.filter(allows_public_contact__isnull=False)
+    for user in users.iterator(chunk_size=BATCH_SIZE):
+        terms = set()
+        for word in normalize(f"{user.first_name} {user.last_name}"):
+            terms.add(("token", word))
+            terms.update(("trigram", trigram) for trigram in make_trigrams(word))
+        rows.extend(
+            BeekeeperSearchTerm(beekeeper_id=user.id, kind=kind, term=term)
+            for kind, term in terms
+        )
+        if len(rows) >= BATCH_SIZE:
+            BeekeeperSearchTerm.objects.bulk_create(rows)
+            rows = []
+    BeekeeperSearchTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_api", "0004_beekeepersearchterm"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_terms, migrations.RunPython.noop),
+    ]
@@ -13,3 +13,60 @@ class PublicContact(models.Model):
         on_delete=CASCADE,
         related_name="allows_public_contact",
     )
+
+
+class CollectionVersion(models.Model):
+    """This model stores a version number for each collection of the public API,
+    raised every time data shown by the collection changes. It is used to answer
+    conditional requests without reading the collection."""
+
+    name = models.CharField(
+        max_length=30, primary_key=True, help_text="The name of the collection."
+    )
+    version = models.PositiveBigIntegerField(
+        default=0, help_text="Raised by one on every change."
+    )
+    last_modified = models.DateTimeField(
+        auto_now=True, help_text="The time of the last change."
+    )
+
+
+class BeekeeperSearchTerm(models.Model):
+    """This model is the search index of the names of the beekeepers who allow
+    their contact information to be made public. Each name is stored as its
+    normalized words and their trigrams, which can be looked up by equality
+    on an index. It is kept up to date by public_api.signals."""
+
+    TOKEN = "token"
+    TRIGRAM = "trigram"
+
+    TERM_KINDS = [
+        (TOKEN, "Token"),
+        (TRIGRAM, "Trigram"),
+    ]
+
+    beekeeper = models.ForeignKey(
+        User,
+        on_delete=CASCADE,
+        # Covered by the unique constraint
+        db_index=False,
+        related_name="search_terms",
+        help_text="The beekeeper whose name contains the term.",
+    )
+    kind = models.CharField(
+        max_length=10, choices=TERM_KINDS, help_text="A whole word or a trigram."
+    )
+    term = models.CharField(
+        max_length=150, help_text="The accent-folded, lowercase word or trigram."
+    )
+
+    class Meta:
+        indexes = [
+            # Finding the beekeepers with a term
+            models.Index(fields=["kind", "term"], name="search_kind_term_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["beekeeper", "kind", "term"], name="search_unique_term"
+            ),
+        ]
@@ -0,0 +1,172 @@
+# Standard library imports
+import re
+import unicodedata
+
+# Third-party imports
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, Count, Exists, OuterRef, Q, Value, When
+
+# Local imports
+from .models import BeekeeperSearchTerm, PublicContact
+from .versions import BEEYARDS, HIVES, bump_versions
+
+# Words of a search taken into account, the others are ignored
+MAX_SEARCH_WORDS = 5
+
+# Points given for a word of the search matching a whole word of a name, or
+# being found inside one
+EXACT_SCORE = 2
+PARTIAL_SCORE = 1
+
+# Anything which isn't a letter or a digit separates two words
+WORD_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """Function returning the words of a text in lowercase without accents,
+    so that 'Hélène' and 'helene' are the same word."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return [word for word in WORD_SEPARATORS.split(folded.casefold()) if word]
+
+
+def make_trigrams(word):
+    """Function returning the trigrams of a word of a name. The word is padded
+    with spaces, so words of one or two letters have trigrams and the start of
+    a word can be told from its middle."""
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def search_trigrams(word):
+    """Function returning the trigrams a name must contain to contain a word
+    of the search. Short words must start a word of the name."""
+    if len(word) < 3:
+        return {f"  {word}"[i : i + 3] for i in range(len(word))}
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+def get_terms(user):
+    """Function returning the (kind, term) pairs indexing the name of a user."""
+    terms = set()
+    for word in normalize(f"{user.first_name} {user.last_name}"):
+        terms.add((BeekeeperSearchTerm.TOKEN, word))
+        terms.update(
+            (BeekeeperSearchTerm.TRIGRAM, trigram) for trigram in make_trigrams(word)
+        )
+    return terms
+
+
+@transaction.atomic
+def update_search_index(user):
+    """Function to bring the search terms of a user in line with their name,
+    writing only the terms which changed. Users who don't share their contact
+    information are removed from the index."""
+    if PublicContact.objects.filter(public_beekeeper_info=user).exists():
+        terms = get_terms(user)
+    else:
+        terms = set()
+    existing = {
+        (kind, term): term_id
+        for term_id, kind, term in BeekeeperSearchTerm.objects.filter(
+            beekeeper=user
+        ).values_list("id", "kind", "term")
+    }
+    removed = [term_id for key, term_id in existing.items() if key not in terms]
+    if removed:
+        BeekeeperSearchTerm.objects.filter(id__in=removed).delete()
+    BeekeeperSearchTerm.objects.bulk_create(
+        BeekeeperSearchTerm(beekeeper=user, kind=kind, term=term)
+        for kind, term in terms
+        if (kind, term) not in existing
+    )
+
+
+@transaction.atomic
+def rebuild_search_index(batch_size=1000):
+    """Function to index the names of every public beekeeper from scratch, for
+    data which was written without sending signals. Returns the number of
+    beekeepers indexed."""
+    BeekeeperSearchTerm.objects.all().delete()
+    users = User.objects.filter(allows_public_contact__isnull=False).only(
+        "id", "first_name", "last_name"
+    )
+    count = 0
+    rows = []
+    for user in users.iterator(chunk_size=batch_size):
+        rows.extend(
+            BeekeeperSearchTerm(beekeeper_id=user.id, kind=kind, term=term)
+            for kind, term in get_terms(user)
+        )
+        count += 1
+        if len(rows) >= batch_size:
+            BeekeeperSearchTerm.objects.bulk_create(rows)
+            rows = []
+    BeekeeperSearchTerm.objects.bulk_create(rows)
+    # The cached search results may have changed
+    bump_versions(BEEYARDS, HIVES)
+    return count
+
+
+def word_candidates(word):
+    """Function returning the ids of the beekeepers who may have a word of the
+    search in their name: it is one of their words or they have all of its
+    trigrams, maybe spread over several words. Looked up on the index of the
+    terms, it narrows down the rows the score is computed for."""
+    trigrams = search_trigrams(word)
+    return (
+        BeekeeperSearchTerm.objects.filter(
+            Q(kind=BeekeeperSearchTerm.TOKEN, term=word)
+            | Q(kind=BeekeeperSearchTerm.TRIGRAM, term__in=trigrams)
+        )
+        .values("beekeeper_id")
+        .annotate(
+            exact=Count("id", filter=Q(kind=BeekeeperSearchTerm.TOKEN)),
+            found=Count("id", filter=Q(kind=BeekeeperSearchTerm.TRIGRAM)),
+        )
+        .filter(Q(exact__gt=0) | Q(found=len(trigrams)))
+        .values("beekeeper_id")
+    )
+
+
+def word_score(word, field):
+    """Function returning the points a word of the search gives to the beekeeper
+    at `field` of the rows: a whole word of their name scores more than a word
+    containing it. Short words must start a word of the name. Each word of the
+    name is checked on its own, so trigrams found in different words don't
+    make a match."""
+    tokens = BeekeeperSearchTerm.objects.filter(
+        beekeeper=OuterRef(field), kind=BeekeeperSearchTerm.TOKEN
+    )
+    if len(word) < 3:
+        contained = tokens.filter(term__startswith=word)
+    else:
+        contained = tokens.filter(term__contains=word)
+    return Case(
+        When(Exists(tokens.filter(term=word)), then=Value(EXACT_SCORE)),
+        When(Exists(contained), then=Value(PARTIAL_SCORE)),
+        default=Value(0),
+    )
+
+
+def filter_by_beekeeper_search(queryset, field, value):
+    """Function to keep the rows of a queryset belonging to the beekeepers found by
+    the search, ordered from the best match. `field` is the path to the beekeeper.
+    A beekeeper matches when one word of the search is a word of their name or is
+    contained in one; each word found adds to their score, whole words counting
+    more. The score is computed by the query of the rows."""
+    words = normalize(value)[:MAX_SEARCH_WORDS]
+    if not words:
+        return queryset.none()
+    candidates = Q()
+    score = Value(0)
+    for word in words:
+        candidates |= Q(**{f"{field}__in": word_candidates(word)})
+        score += word_score(word, field)
+    return (
+        queryset.filter(candidates)
+        .annotate(search_score=score)
+        .filter(search_score__gt=0)
+        .order_by("-search_score", field, "id")
+    )
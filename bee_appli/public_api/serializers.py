@@ -7,10 +7,56 @@ from apiary.models import (
     BeeYard,
     Hive,
 )
+from apiary.fastpath import compile_serializer
+from apiary.sparse import SparseFieldsMixin
 from .models import PublicContact
 
+# Shown in place of the details of beekeepers who haven't agreed to share them
+NOT_AUTHORIZED = {
+    "first_name": "Not Authorized",
+    "last_name": "Not Authorized",
+    "email": "Not Authorized",
+}
 
-class HiveSerializerReadOnly(serializers.ModelSerializer):
+
+def get_contact_detail(beekeeper):
+    """Function to get the public contact details of a beekeeper, or 'Not
+    Authorized' if they haven't agreed to share them. The PublicContact is
+    read through the beekeeper, so no query is run when the view loaded it
+    with select_related."""
+
+    try:
+        keeper = beekeeper.allows_public_contact
+    except (AttributeError, PublicContact.DoesNotExist):
+        # No beekeeper, or one without a PublicContact
+        return dict(NOT_AUTHORIZED)
+    return PublicContactSerializerReadOnly(keeper).data
+
+
+class ContactDetailFastField:
+    """Fast version of the beekeeper_detail fields for the list routes, reading
+    the public contact joined through `path`, the lookup to the beekeeper."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def compile(self, serializer, name, plan, prefix):
+        contact = f"{prefix}{self.path}__allows_public_contact"
+        index = plan.column(contact)
+        convert_contact = compile_serializer(
+            PublicContactSerializerReadOnly(), plan, f"{contact}__"
+        )
+
+        def convert(row, loaded):
+            if row[index] is None:
+                # No beekeeper, or one without a PublicContact
+                return dict(NOT_AUTHORIZED)
+            return convert_contact(row, loaded)
+
+        return convert
+
+
+class HiveSerializerReadOnly(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for read-only public version of hive information.
     Unlike the private API, this one includes details on the beekeeper
     if the beekeeper has accepted sharing their information with the public."""
@@ -29,6 +75,8 @@ class HiveSerializerReadOnly(serializers.ModelSerializer):
             "id",
             "beekeeper_detail",
         ]
+        # Only returned with ?expand= when the fields are chosen
+        expandable_fields = ["beekeeper_detail"]
 
         read_only_fields = [
             "name",
@@ -41,24 +89,17 @@ class HiveSerializerReadOnly(serializers.ModelSerializer):
             "beekeeper_detail",
         ]
 
+    # Read from joined columns in the list route
+    fast_fields = {"beekeeper_detail": ContactDetailFastField("beeyard__beekeeper")}
+
     def get_beekeeper_detail(self, obj):
         """Function to get contact details for beeekeepers which replaces
         data with 'Not Authorized' for any keepers who have not agreed to
         share their information publicly."""
 
-        if hasattr(obj.beeyard.beekeeper, "allows_public_contact"):
-            keeper = PublicContact.objects.get(
-                public_beekeeper_info=obj.beeyard.beekeeper
-            )
-            beekeeper_detail = PublicContactSerializerReadOnly(keeper)
-            return beekeeper_detail.data
-        else:
-            anonymous = {
-                "first_name": "Not Authorized",
-                "last_name": "Not Authorized",
-                "email": "Not Authorized",
-            }
-            return anonymous
+        if obj.beeyard is None:
+            return dict(NOT_AUTHORIZED)
+        return get_contact_detail(obj.beeyard.beekeeper)
 
 
 class UserSerializerReadOnly(serializers.ModelSerializer):
@@ -70,7 +111,7 @@ class UserSerializerReadOnly(serializers.ModelSerializer):
         read_only_fields = ["first_name", "last_name", "email"]
 
 
-class PublicContactSerializerReadOnly(serializers.ModelSerializer):
+class PublicContactSerializerReadOnly(SparseFieldsMixin, serializers.ModelSerializer):
     """Uses the UserSerializerReadOnly to validate contact details for
     keepers who have agreed to share their contact information."""
 
@@ -82,9 +123,11 @@ class PublicContactSerializerReadOnly(serializers.ModelSerializer):
         model = PublicContact
         fields = ["public_beekeeper_info", "public_beekeeper_info_details"]
         read_only_fields = ["public_beekeeper_info", "public_beekeeper_info_details"]
+        # Only returned with ?expand= when the fields are chosen
+        expandable_fields = ["public_beekeeper_info_details"]
 
 
-class BeeYardSerializerReadOnly(serializers.ModelSerializer):
+class BeeYardSerializerReadOnly(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer that allows for read only data on beeyards and includes the details
     of the hive and the keeper while withholding information on keepers who have not
     agreed to make their information public.
@@ -103,20 +146,15 @@ class BeeYardSerializerReadOnly(serializers.ModelSerializer):
             "hives_detailed",
             "beekeeper_detail",
         ]
+        # Only returned with ?expand= when the fields are chosen
+        expandable_fields = ["hives_detailed", "beekeeper_detail"]
+
+    # Read from joined columns in the list route
+    fast_fields = {"beekeeper_detail": ContactDetailFastField("beekeeper")}
 
     def get_beekeeper_detail(self, obj):
         """Function to get contact details for beeekeepers which replaces
         data with 'Not Authorized' for any keepers who have not agreed to
         share their information publicly."""
 
-        if hasattr(obj.beekeeper, "allows_public_contact"):
-            keeper = PublicContact.objects.get(public_beekeeper_info=obj.beekeeper)
-            beekeeper_detail = PublicContactSerializerReadOnly(keeper)
-            return beekeeper_detail.data
-        else:
-            anonymous = {
-                "first_name": "Not Authorized",
-                "last_name": "Not Authorized",
-                "email": "Not Authorized",
-            }
-            return anonymous
+        return get_contact_detail(obj.beekeeper)
@@ -0,0 +1,72 @@
+# Third-party imports
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+# Local imports
+from apiary.models import BeeYard, Hive
+from .models import BeekeeperSearchTerm, PublicContact
+from .search import update_search_index
+from .versions import BEEKEEPERS, BEEYARDS, HIVES, bump_versions_on_commit
+
+# Collections of the public API showing data of each model. Beeyards list their
+# hives and hives show the contact details of their beekeeper.
+COLLECTIONS = {
+    BeeYard: (BEEYARDS, HIVES),
+    Hive: (BEEYARDS, HIVES),
+    User: (BEEYARDS, HIVES, BEEKEEPERS),
+    PublicContact: (BEEYARDS, HIVES, BEEKEEPERS),
+}
+
+
+@receiver(post_save, sender=BeeYard)
+@receiver(post_save, sender=Hive)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=PublicContact)
+def data_saved(sender, instance, update_fields=None, **kwargs):
+    """Raises the version of the collections showing the saved object once the
+    change is committed."""
+    # Logging in only saves the date of the last login, which isn't public
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    # Only the id of a beekeeper who doesn't share their contact is shown
+    if (
+        sender is User
+        and not PublicContact.objects.filter(public_beekeeper_info=instance).exists()
+    ):
+        return
+    bump_versions_on_commit(*COLLECTIONS[sender])
+
+
+@receiver(post_delete, sender=BeeYard)
+@receiver(post_delete, sender=Hive)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=PublicContact)
+def data_deleted(sender, instance, **kwargs):
+    """Raises the version of the collections which showed the deleted object
+    once the change is committed."""
+    bump_versions_on_commit(*COLLECTIONS[sender])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Indexes the new name of a public beekeeper."""
+    # New users can't have agreed to share their contact information yet
+    if created or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    update_search_index(instance)
+
+
+@receiver(post_save, sender=PublicContact)
+def public_contact_saved(sender, instance, **kwargs):
+    """Adds a beekeeper sharing their contact information to the search index."""
+    update_search_index(instance.public_beekeeper_info)
+
+
+@receiver(post_delete, sender=PublicContact)
+def public_contact_deleted(sender, instance, **kwargs):
+    """Removes a beekeeper who no longer shares their contact information from
+    the search index."""
+    BeekeeperSearchTerm.objects.filter(
+        beekeeper_id=instance.public_beekeeper_info_id
+    ).delete()
@@ -0,0 +1,127 @@
+# Third-party imports
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Local imports
+from .models import CollectionVersion
+
+# Names of the collections of the public API
+BEEYARDS = "beeyards"
+HIVES = "hives"
+BEEKEEPERS = "beekeepers"
+
+
+def bump_versions(*names):
+    """Function to raise the version of the given collections, creating the rows
+    of collections which were never changed before."""
+    now = timezone.now()
+    updated = CollectionVersion.objects.filter(name__in=names).update(
+        version=F("version") + 1, last_modified=now
+    )
+    if updated < len(names):
+        for name in names:
+            CollectionVersion.objects.get_or_create(name=name, defaults={"version": 1})
+
+
+def bump_versions_on_commit(*names):
+    """Function to raise the version of the given collections once the current
+    transaction commits, or right away outside of one. The rows of the
+    versions, which every write shares, are then only locked for the statement
+    raising them instead of until the end of the writing transaction, and a
+    transaction changing many objects raises each version once."""
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        bump_versions(*names)
+        return
+    pending = getattr(connection, "pending_collection_versions", None)
+    # A rolled back transaction discards its callback along with the names
+    if pending is None or pending.callback not in [
+        callback for sids, callback, *robust in connection.run_on_commit
+    ]:
+        pending = PendingVersions(connection)
+        connection.pending_collection_versions = pending
+        transaction.on_commit(pending.callback)
+    pending.names.update(names)
+
+
+class PendingVersions:
+    """Class holding the collections whose version is raised when the current
+    transaction commits."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.names = set()
+
+    def callback(self):
+        # Changes made from now on are raised by the next commit
+        if getattr(self.connection, "pending_collection_versions", None) is self:
+            self.connection.pending_collection_versions = None
+        # Always in the same order so concurrent commits can't deadlock
+        bump_versions(*sorted(self.names))
+
+
+def get_version(name):
+    """Function returning the version number and the time of the last change
+    of a collection, (0, None) if it never changed."""
+    row = CollectionVersion.objects.filter(name=name).values_list(
+        "version", "last_modified"
+    )
+    return row.first() or (0, None)
+
+
+class CollectionViewMixin:
+    """Mixin for the views of a collection of the public API, giving access to
+    the version of the collection."""
+
+    collection = None
+
+    def get_collection_version(self):
+        """Function returning the version of the collection, read once per request."""
+        if not hasattr(self, "_collection_version"):
+            self._collection_version = get_version(self.collection)
+        return self._collection_version
+
+
+class ConditionalGetMixin(CollectionViewMixin):
+    """Mixin for the read views of a collection adding an ETag and a Last-Modified
+    header built from the version of the collection. When the client already
+    has the current version the view answers 304 Not Modified, after one query
+    on the version and without reading the collection."""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def get_validators(self, request, version, last_modified):
+        """Function returning the ETag and the Last-Modified timestamp of a
+        version of the collection."""
+        # The format is part of the tag as the browsable API and the JSON of
+        # the same url are different representations
+        etag = quote_etag(
+            f"{self.collection}-{version}-{request.accepted_renderer.format}"
+        )
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def conditional(self, view, request, *args, **kwargs):
+        """Function to call the view unless the client's copy is up to date and
+        to add the validators to the response. A response holding the data of
+        an older version, set in its collection_version, gets the validators of
+        that version so the client revalidates it once the data is rebuilt."""
+        version, last_modified = self.get_collection_version()
+        etag, timestamp = self.get_validators(request, version, last_modified)
+        response = get_conditional_response(request, etag, timestamp)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            served = getattr(response, "collection_version", None)
+            if served is not None and served[0] != version:
+                etag, timestamp = self.get_validators(request, *served)
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
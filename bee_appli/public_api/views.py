@@ -1,9 +1,13 @@
 # Third-party imports
+from django.db.models import Prefetch
 from django_filters import rest_framework as filters
 from rest_framework import viewsets
 
 # Local imports
+from apiary.fastpath import FastListMixin
 from apiary.models import BeeYard, Hive
+from apiary.sparse import SparseQuerysetMixin
+from .caching import CachedResponseMixin
 from .filters import BeeYardFilter, HiveFilter, PublicContactFilter
 from .models import PublicContact
 from .serializers import (
@@ -11,27 +15,65 @@ from .serializers import (
     HiveSerializerReadOnly,
     PublicContactSerializerReadOnly,
 )
+from .versions import BEEKEEPERS, BEEYARDS, HIVES, ConditionalGetMixin
 
 
 ##### Views for Public Access to Data via API #####
 
 
-class BeeYardViewSet(viewsets.ModelViewSet):
+class BeeYardViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseQuerysetMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
+    collection = BEEYARDS
     queryset = BeeYard.objects.all()
     serializer_class = BeeYardSerializerReadOnly
     filterset_class = BeeYardFilter
     filter_backends = (filters.DjangoFilterBackend,)
+    # The beekeeper and their public contact are joined to the beeyards and the
+    # hives are loaded for the whole page with one query. The prefetched hives
+    # point back to their beeyard, so their beekeeper details are free too.
+    select_related_fields = {
+        "beekeeper_detail": ["beekeeper__allows_public_contact"],
+        "hives_detailed": ["beekeeper__allows_public_contact"],
+    }
+    # The hives are in ID order, as in the list route's fast path
+    prefetch_related_fields = {
+        "hives": [Prefetch("hives", queryset=Hive.objects.order_by("id"))],
+        "hives_detailed": [Prefetch("hives", queryset=Hive.objects.order_by("id"))],
+    }
 
 
-class HiveViewSet(viewsets.ModelViewSet):
+class HiveViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseQuerysetMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
+    collection = HIVES
     queryset = Hive.objects.all()
     serializer_class = HiveSerializerReadOnly
     filterset_class = HiveFilter
     filter_backends = (filters.DjangoFilterBackend,)
+    # Joins the beeyard, its beekeeper and their public contact to the hives so
+    # a page of hives costs a fixed number of queries
+    select_related_fields = {
+        "beekeeper_detail": ["beeyard__beekeeper__allows_public_contact"],
+    }
 
 
-class BeekeeperViewSet(viewsets.ModelViewSet):
+class BeekeeperViewSet(
+    ConditionalGetMixin, SparseQuerysetMixin, FastListMixin, viewsets.ModelViewSet
+):
+    collection = BEEKEEPERS
     queryset = PublicContact.objects.all()
+    select_related_fields = {
+        "public_beekeeper_info_details": ["public_beekeeper_info"],
+    }
     serializer_class = PublicContactSerializerReadOnly
     filterset_class = PublicContactFilter
     filter_backends = (filters.DjangoFilterBackend,)